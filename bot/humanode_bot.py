@@ -1,4 +1,7 @@
 import json
+import heapq
+import itertools
+import html
 import logging
 import subprocess
 import re
@@ -6,14 +9,21 @@ import asyncio
 import time
 import os
 from datetime import datetime, timedelta, timezone
+from abc import ABC, abstractmethod
 from functools import wraps
-import glob
+from typing import TypedDict
 import shlex
+import shutil
+import hashlib
+import threading
+import sqlite3
+from contextlib import AsyncExitStack, asynccontextmanager
+from collections import deque
 
 import requests
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, BotCommand
 from telegram.constants import ParseMode
-from telegram.error import BadRequest
+from telegram.error import BadRequest, RetryAfter
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -28,23 +38,31 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
 from selenium.webdriver.chrome.service import Service as ChromeService
 from webdriver_manager.chrome import ChromeDriverManager
 
 import pytesseract
-from PIL import Image
+from PIL import Image, ImageOps
 import io
 
+import node_agent
+import node_probe
+import node_rpc
+
 # --- Constants ---
 BOT_VERSION = "1.3.7" # Incremented version
 STATE_FILE = "/root/bot_state.json"
+STATE_FLUSH_DELAY_SECONDS = 2
 LOG_FILE = "humanode_bot.log"
 FULL_CHECK_INTERVAL_HOURS = 168
-JOB_QUEUE_INTERVAL_MINUTES = 5
 LOCALES_DIR = "locales"
 GITHUB_SNAPSHOT_URL = "https://api.github.com/repos/stalkerSumy/humanode-telegram-bot/releases/tags/Snap"
 SERVERS_CONFIG_FILE = "/root/servers.json"
+SQLITE_DB_FILE = "/root/humanode_bot.db"
+BACKUP_CATALOG_FILE = "/root/backup_catalog.json"
+# Overridable so the test suite can import the bot with a throwaway config.
+CONFIG_FILE = os.environ.get("HUMANODE_BOT_CONFIG", "/root/config.json")
 
 # --- Logging Setup ---
 logging.basicConfig(
@@ -61,17 +79,17 @@ logger = logging.getLogger(__name__)
 
 # --- Config Loading ---
 def load_config():
-    """Loads config from /root/config.json."""
+    """Loads config from CONFIG_FILE, /root/config.json by default."""
     try:
-        with open('/root/config.json', 'r') as f:
+        with open(CONFIG_FILE, 'r') as f:
             config = json.load(f)
             logger.info("Successfully loaded config.json.")
             return config
     except FileNotFoundError:
-        logger.critical("CRITICAL: /root/config.json not found. Please create it.")
+        logger.critical(f"CRITICAL: {CONFIG_FILE} not found. Please create it.")
         return {}
     except json.JSONDecodeError:
-        logger.critical("CRITICAL: Could not decode /root/config.json. Please check its format.")
+        logger.critical(f"CRITICAL: Could not decode {CONFIG_FILE}. Please check its format.")
         return {}
     except Exception as e:
         logger.critical(f"CRITICAL: An unexpected error occurred while loading config.json: {e}")
@@ -84,11 +102,88 @@ if isinstance(AUTHORIZED_USER_ID, str) and AUTHORIZED_USER_ID.isdigit():
     AUTHORIZED_USER_ID = int(AUTHORIZED_USER_ID)
 
 if not TOKEN or not AUTHORIZED_USER_ID:
-    logger.critical("CRITICAL: telegram_bot_token and authorized_user_id must be set in /root/config.json. Exiting.")
+    logger.critical(f"CRITICAL: telegram_bot_token and authorized_user_id must be set in {CONFIG_FILE}. Exiting.")
     exit(1)
 
-# --- Global Lock ---
-IS_CHECK_RUNNING = False
+# --- Storage Settings ---
+STORAGE_BACKEND = config.get("storage_backend", "json")
+
+# --- SSH Settings ---
+SSH_CONTROL_DIR = "/tmp/humanode_bot_ssh"
+SSH_CONTROL_PERSIST_SECONDS = int(config.get("ssh_control_persist_seconds", 600))
+SSH_KEEPALIVE_INTERVAL_SECONDS = int(config.get("ssh_keepalive_interval_seconds", 30))
+SSH_MASTER_RETRY_SECONDS = 60
+# The remote shell prints this to stderr before running a command, so a connection that failed before the
+# command started can be told apart from one dropped while it ran.
+REMOTE_COMMAND_STARTED_MARKER = "humanode-bot-command-started"
+
+# --- Periodic Check Settings ---
+PERIODIC_CHECK_CONCURRENCY = max(1, int(config.get("periodic_check_concurrency", 3)))
+PERIODIC_CHECK_SERVER_TIMEOUT_SECONDS = int(config.get("periodic_check_server_timeout_seconds", 240))
+
+# --- Fleet Action Settings ---
+FLEET_CONCURRENCY = max(1, int(config.get("fleet_concurrency", 5)))
+FLEET_HOST_TIMEOUT_SECONDS = int(config.get("fleet_host_timeout_seconds", 60))
+
+# --- Node Probe Settings ---
+PROBE_CACHE_TTL_SECONDS = int(config.get("probe_cache_ttl_seconds", 15))
+
+# --- Node Agent Settings ---
+# Servers running bot/node_agent.py push their state to this port; 0 keeps the listener off and everything on SSH.
+AGENT_LISTEN_HOST = config.get("agent_listen_host", "0.0.0.0")
+AGENT_LISTEN_PORT = int(config.get("agent_listen_port", 0))
+AGENT_STALE_SECONDS = int(config.get("agent_stale_seconds", 90))
+
+# --- Browser Pool Settings ---
+BROWSER_POOL_SIZE = max(1, int(config.get("browser_pool_size", 2)))
+BROWSER_MAX_USES = int(config.get("browser_max_uses", 50))
+BROWSER_MAX_RSS_MB = int(config.get("browser_max_rss_mb", 1024))
+
+# --- Progress Reporting Settings ---
+PROGRESS_EDIT_INTERVAL_SECONDS = float(config.get("progress_edit_interval_seconds", 3))
+
+# --- Snapshot Restore Settings ---
+# "stream" pipes the GitHub download straight into tar on the node; "staged" downloads the parts first.
+SNAPSHOT_RESTORE_MODE = config.get("snapshot_restore_mode", "stream")
+SNAPSHOT_STAGING_DIR = config.get("snapshot_staging_dir", "/tmp")
+SNAPSHOT_DOWNLOAD_CONCURRENCY = max(1, int(config.get("snapshot_download_concurrency", 4)))
+SNAPSHOT_DOWNLOAD_RETRIES = max(1, int(config.get("snapshot_download_retries", 5)))
+SNAPSHOT_DOWNLOAD_RETRY_DELAY_SECONDS = 5
+# The snapshot is a gzipped tar and unpacks to about this many times its download size. The chain DB's files are
+# compressed already, so gzip gains little; the default leaves headroom on top of that.
+SNAPSHOT_EXPANSION_FACTOR = max(1.0, float(config.get("snapshot_expansion_factor", 1.5)))
+
+# --- Backup Settings ---
+# "archive" writes a compressed tar per backup; "incremental" keeps rsync snapshots that hardlink unchanged files.
+BACKUP_MODE = config.get("backup_mode", "archive")
+# "auto" prefers multi-threaded zstd, then pigz, then gzip, depending on what the server has installed.
+BACKUP_COMPRESSION = config.get("backup_compression", "auto")
+BACKUP_RETENTION_COUNT = int(config.get("backup_retention_count", 3))
+# "two_phase" copies the DB while the node runs and stops it only for the final delta (or a reflink clone);
+# "stop" keeps the node stopped for the whole backup.
+BACKUP_STRATEGY = config.get("backup_strategy", "two_phase")
+BACKUP_MIN_EPOCH_MINUTES = int(config.get("backup_min_epoch_minutes", 30))
+BACKUP_TWO_PHASE_MIN_EPOCH_MINUTES = int(config.get("backup_two_phase_min_epoch_minutes", 5))
+# Backups of remote servers are streamed over SSH into this folder on the bot host, and back for restores.
+REMOTE_BACKUP_DIR = config.get("remote_backup_dir", "/root/humanode_backups/remote")
+# Caps those SSH transfers in Mbit/s, 0 means unlimited. A server's own "backup_bandwidth_limit_mbit" wins.
+BACKUP_BANDWIDTH_LIMIT_MBIT = float(config.get("backup_bandwidth_limit_mbit", 0))
+# Every catalogued backup is re-hashed in the background this often, 0 turns it off.
+BACKUP_VERIFY_INTERVAL_HOURS = float(config.get("backup_verify_interval_hours", 24))
+
+# --- Asset Cache Settings ---
+# Release binaries and snapshots are downloaded to the bot host once and served to every server from there.
+ASSET_CACHE_DIR = config.get("asset_cache_dir", "/root/humanode_asset_cache")
+ASSET_CACHE_MAX_BYTES = int(float(config.get("asset_cache_max_gb", 20)) * 1024 ** 3)
+
+# --- Timer Source Settings ---
+TIMER_SOURCE_NAMES = config.get("timer_sources", ["agent", "rpc", "selenium"])
+EPOCH_DURATION_MINUTES = int(config.get("epoch_duration_minutes", node_rpc.EPOCH_DURATION_MINUTES))
+BABE_SLOT_DURATION_SECONDS = int(config.get("babe_slot_duration_seconds", node_rpc.BABE_SLOT_DURATION_SECONDS))
+
+# --- Work Executor Settings ---
+# Upper bound on SSH and browser operations running at once; one slot is always left for interactive requests.
+WORKER_POOL_SIZE = max(1, int(config.get("worker_pool_size", 4)))
 
 # --- Internationalization (i18n) ---
 translations = {}
@@ -115,21 +210,284 @@ def get_text(key: str, lang: str, **kwargs) -> str:
         logger.error(f"Missing placeholder in translation for key '{key}' and lang '{lang}': {e}")
         return text
 
+# --- Storage ---
+def write_json_atomically(path: str, data):
+    """Writes to a temp file, fsyncs it and renames it over `path`, so a crash never leaves half a file."""
+    directory = os.path.dirname(path) or "."
+    temp_path = os.path.join(directory, f".{os.path.basename(path)}.tmp")
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+class JsonStorage:
+    """Keeps servers and state in the JSON files the bot has always used. Keeps no history.
+
+    The backup catalog lives in its own JSON file, kept in memory and rewritten atomically on every change.
+    """
+
+    def __init__(self):
+        self._backup_catalog: dict | None = None
+
+    def load_servers(self) -> dict:
+        try:
+            with open(SERVERS_CONFIG_FILE, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            logger.error(f"Could not load or parse {SERVERS_CONFIG_FILE}. Returning empty dict.")
+            return {}
+
+    def save_servers(self, servers_dict: dict):
+        write_json_atomically(SERVERS_CONFIG_FILE, servers_dict)
+
+    def load_state(self) -> dict:
+        try:
+            with open(STATE_FILE, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save_state(self, state: dict):
+        write_json_atomically(STATE_FILE, state)
+
+    def record_observation(self, server_id: str, observed_at: datetime, bioauth_seconds: int, epoch_minutes: int):
+        pass
+
+    def get_observations(self, server_id: str, since: datetime) -> list[tuple[datetime, int, int]]:
+        return []
+
+    def _load_backup_catalog(self) -> dict:
+        if self._backup_catalog is None:
+            try:
+                with open(BACKUP_CATALOG_FILE, 'r') as f:
+                    self._backup_catalog = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._backup_catalog = {"next_id": 1, "backups": []}
+        return self._backup_catalog
+
+    def add_backup(self, entry: dict) -> int:
+        catalog = self._load_backup_catalog()
+        backup_id = catalog["next_id"]
+        catalog["backups"].append(dict(entry, id=backup_id))
+        catalog["next_id"] += 1
+        write_json_atomically(BACKUP_CATALOG_FILE, catalog)
+        return backup_id
+
+    def update_backup(self, backup_id: int, changes: dict):
+        catalog = self._load_backup_catalog()
+        for entry in catalog["backups"]:
+            if entry["id"] == backup_id:
+                entry.update(changes)
+                write_json_atomically(BACKUP_CATALOG_FILE, catalog)
+                return
+
+    def delete_backups(self, backup_ids: list[int]):
+        catalog = self._load_backup_catalog()
+        catalog["backups"] = [entry for entry in catalog["backups"] if entry["id"] not in set(backup_ids)]
+        write_json_atomically(BACKUP_CATALOG_FILE, catalog)
+
+    def get_backup(self, backup_id: int) -> dict | None:
+        return next((dict(entry) for entry in self._load_backup_catalog()["backups"] if entry["id"] == backup_id), None)
+
+    def list_backups(self, server_id: str, offset: int = 0, limit: int | None = None) -> list[dict]:
+        """Returns a server's backups, newest first."""
+        entries = [dict(entry) for entry in self._load_backup_catalog()["backups"] if entry["server_id"] == server_id]
+        entries.sort(key=lambda entry: (entry["created_utc"], entry["id"]), reverse=True)
+        return entries[offset:offset + limit if limit is not None else None]
+
+    def count_backups(self, server_id: str) -> int:
+        return sum(1 for entry in self._load_backup_catalog()["backups"] if entry["server_id"] == server_id)
+
+class SQLiteStorage:
+    """Keeps servers, state and an append-only history of timer readings in one SQLite database.
+
+    The database runs in WAL mode and each save only rewrites the rows that changed. On first
+    use it imports servers.json and bot_state.json.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS servers (server_id TEXT PRIMARY KEY, config TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS server_state (server_id TEXT PRIMARY KEY, state TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS notification_settings (name TEXT PRIMARY KEY, minutes INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS user_settings (user_id TEXT PRIMARY KEY, settings TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS observations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            server_id TEXT NOT NULL,
+            observed_utc TEXT NOT NULL,
+            bioauth_seconds INTEGER NOT NULL,
+            epoch_minutes INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS observations_by_server ON observations (server_id, observed_utc);
+        CREATE TABLE IF NOT EXISTS backups (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            server_id TEXT NOT NULL,
+            created_utc TEXT NOT NULL,
+            path TEXT NOT NULL,
+            location TEXT NOT NULL,
+            format TEXT NOT NULL,
+            size_bytes INTEGER,
+            sha256 TEXT,
+            chain_height INTEGER,
+            status TEXT NOT NULL,
+            verified_utc TEXT
+        );
+        CREATE INDEX IF NOT EXISTS backups_by_server ON backups (server_id, created_utc);
+    """
+    BACKUP_COLUMNS = ("id", "server_id", "created_utc", "path", "location", "format", "size_bytes", "sha256", "chain_height", "status", "verified_utc")
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._written: dict[tuple[str, str], str] = {}
+        self._migrate_from_json()
+
+    def _migrate_from_json(self):
+        if self._conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_from_json'").fetchone():
+            return
+        json_storage = JsonStorage()
+        if os.path.exists(SERVERS_CONFIG_FILE):
+            self.save_servers(json_storage.load_servers())
+        if os.path.exists(STATE_FILE):
+            self.save_state(json_storage.load_state())
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('migrated_from_json', ?)", (datetime.now(timezone.utc).isoformat(),))
+        logger.info("Migrated servers and state from JSON files into SQLite.")
+
+    def _sync_table(self, table: str, key_column: str, value_column: str, rows: dict):
+        """Upserts rows whose serialized value changed and deletes rows that are gone."""
+        with self._lock, self._conn:
+            existing = {row[0] for row in self._conn.execute(f"SELECT {key_column} FROM {table}")}
+            for key in existing - rows.keys():
+                self._conn.execute(f"DELETE FROM {table} WHERE {key_column} = ?", (key,))
+                self._written.pop((table, key), None)
+            for key, value in rows.items():
+                if self._written.get((table, key)) == value and key in existing:
+                    continue
+                self._conn.execute(
+                    f"INSERT INTO {table} ({key_column}, {value_column}) VALUES (?, ?) "
+                    f"ON CONFLICT({key_column}) DO UPDATE SET {value_column} = excluded.{value_column}",
+                    (key, value),
+                )
+                self._written[(table, key)] = value
+
+    def _read_table(self, table: str, key_column: str, value_column: str) -> dict:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {key_column}, {value_column} FROM {table} ORDER BY rowid").fetchall()
+        for key, value in rows:
+            self._written[(table, key)] = value
+        return dict(rows)
+
+    def load_servers(self) -> dict:
+        return {server_id: json.loads(config) for server_id, config in self._read_table("servers", "server_id", "config").items()}
+
+    def save_servers(self, servers_dict: dict):
+        self._sync_table("servers", "server_id", "config", {server_id: json.dumps(config, sort_keys=True) for server_id, config in servers_dict.items()})
+
+    def load_state(self) -> dict:
+        state = {
+            "servers": {server_id: json.loads(value) for server_id, value in self._read_table("server_state", "server_id", "state").items()},
+            "user_settings": {user_id: json.loads(value) for user_id, value in self._read_table("user_settings", "user_id", "settings").items()},
+        }
+        notification_settings = self._read_table("notification_settings", "name", "minutes")
+        if notification_settings:
+            state["notification_settings"] = notification_settings
+        return state
+
+    def save_state(self, state: dict):
+        self._sync_table("server_state", "server_id", "state", {server_id: json.dumps(value, sort_keys=True) for server_id, value in state.get("servers", {}).items()})
+        self._sync_table("user_settings", "user_id", "settings", {user_id: json.dumps(value, sort_keys=True) for user_id, value in state.get("user_settings", {}).items()})
+        self._sync_table("notification_settings", "name", "minutes", dict(state.get("notification_settings", {})))
+
+    def record_observation(self, server_id: str, observed_at: datetime, bioauth_seconds: int, epoch_minutes: int):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO observations (server_id, observed_utc, bioauth_seconds, epoch_minutes) VALUES (?, ?, ?, ?)",
+                (server_id, observed_at.isoformat(), bioauth_seconds, epoch_minutes),
+            )
+
+    def get_observations(self, server_id: str, since: datetime) -> list[tuple[datetime, int, int]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT observed_utc, bioauth_seconds, epoch_minutes FROM observations "
+                "WHERE server_id = ? AND observed_utc >= ? ORDER BY observed_utc",
+                (server_id, since.isoformat()),
+            ).fetchall()
+        return [(datetime.fromisoformat(observed), bioauth, epoch) for observed, bioauth, epoch in rows]
+
+    def add_backup(self, entry: dict) -> int:
+        columns = [column for column in self.BACKUP_COLUMNS if column != "id"]
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"INSERT INTO backups ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                [entry.get(column) for column in columns],
+            )
+        return cursor.lastrowid
+
+    def update_backup(self, backup_id: int, changes: dict):
+        columns = [column for column in changes if column in self.BACKUP_COLUMNS and column != "id"]
+        if not columns:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE backups SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?",
+                [changes[column] for column in columns] + [backup_id],
+            )
+
+    def delete_backups(self, backup_ids: list[int]):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM backups WHERE id = ?", [(backup_id,) for backup_id in backup_ids])
+
+    def get_backup(self, backup_id: int) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(self.BACKUP_COLUMNS)} FROM backups WHERE id = ?", (backup_id,)).fetchone()
+        return dict(zip(self.BACKUP_COLUMNS, row)) if row else None
+
+    def list_backups(self, server_id: str, offset: int = 0, limit: int | None = None) -> list[dict]:
+        """Returns a server's backups, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(self.BACKUP_COLUMNS)} FROM backups WHERE server_id = ? "
+                "ORDER BY created_utc DESC, id DESC LIMIT ? OFFSET ?",
+                (server_id, -1 if limit is None else limit, offset),
+            ).fetchall()
+        return [dict(zip(self.BACKUP_COLUMNS, row)) for row in rows]
+
+    def count_backups(self, server_id: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM backups WHERE server_id = ?", (server_id,)).fetchone()[0]
+
+def create_storage():
+    if STORAGE_BACKEND == "sqlite":
+        try:
+            storage = SQLiteStorage(SQLITE_DB_FILE)
+            logger.info(f"Using SQLite storage at {SQLITE_DB_FILE}.")
+            return storage
+        except sqlite3.Error as e:
+            logger.critical(f"CRITICAL: Could not open SQLite database {SQLITE_DB_FILE}: {e}. Falling back to JSON files.")
+    return JsonStorage()
+
+STORAGE = create_storage()
+
 # --- Server Configuration ---
 def load_servers():
-    try:
-        with open(SERVERS_CONFIG_FILE, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        logger.error(f"Could not load or parse {SERVERS_CONFIG_FILE}. Returning empty dict.")
-        return {}
+    return STORAGE.load_servers()
 
 def save_servers(servers_dict):
     try:
-        with open(SERVERS_CONFIG_FILE, 'w') as f:
-            json.dump(servers_dict, f, indent=4)
+        STORAGE.save_servers(servers_dict)
         global SERVERS
         SERVERS = servers_dict
+        STATE_STORE.sync_servers()
         return True
     except Exception as e:
         logger.error(f"Failed to save servers file: {e}")
@@ -138,49 +496,111 @@ def save_servers(servers_dict):
 SERVERS = load_servers()
 
 # --- State Management ---
-def load_state():
-    try:
-        with open(STATE_FILE, 'r') as f:
-            state = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        state = {}
-
-    state.setdefault("user_settings", {})
-    state["user_settings"].setdefault(str(AUTHORIZED_USER_ID), {})
-    state["user_settings"][str(AUTHORIZED_USER_ID)].setdefault("language", "uk")
-
-    state.setdefault("notification_settings", {
-        "first_warning_minutes": 30,
-        "second_warning_minutes": 10,
-        "alert_interval_minutes": 5,
-    })
-    state.setdefault("servers", {})
-
-    active_server_ids = SERVERS.keys()
-    for server_id in list(state["servers"].keys()):
-        if server_id not in active_server_ids:
-            del state["servers"][server_id]
-
-    for server_id in active_server_ids:
-        state["servers"].setdefault(server_id, {})
-        server_state = state["servers"][server_id]
-        server_state.setdefault("last_full_check_utc", None)
-        server_state.setdefault("bioauth_deadline_utc", None)
-        server_state.setdefault("notified_first", False)
-        server_state.setdefault("notified_second", False)
-        server_state.setdefault("is_in_alert_mode", False)
-        server_state.setdefault("last_alert_utc", None)
-        server_state.setdefault("is_in_failure_alert_mode", False)
-        server_state.setdefault("last_failure_alert_utc", None)
-
-    return state
-
-def save_state(state):
-    try:
-        with open(STATE_FILE, 'w') as f:
-            json.dump(state, f, indent=4)
-    except Exception as e:
-        logger.error(f"Failed to save state file: {e}")
+class ServerState(TypedDict):
+    last_full_check_utc: str | None
+    bioauth_deadline_utc: str | None
+    notified_first: bool
+    notified_second: bool
+    is_in_alert_mode: bool
+    last_alert_utc: str | None
+    is_in_failure_alert_mode: bool
+    last_failure_alert_utc: str | None
+    next_check_utc: str | None
+    prediction_confidence: float
+    bioauth_period_seconds: int | None
+    epoch_end_utc: str | None
+
+SERVER_STATE_DEFAULTS: ServerState = {
+    "last_full_check_utc": None,
+    "bioauth_deadline_utc": None,
+    "notified_first": False,
+    "notified_second": False,
+    "is_in_alert_mode": False,
+    "last_alert_utc": None,
+    "is_in_failure_alert_mode": False,
+    "last_failure_alert_utc": None,
+    "next_check_utc": None,
+    "prediction_confidence": 0.0,
+    "bioauth_period_seconds": None,
+    "epoch_end_utc": None,
+}
+
+class StateStore:
+    """The bot state, read from storage once and then kept in memory.
+
+    save() only schedules a write; changes made within STATE_FLUSH_DELAY_SECONDS are
+    written together. Handlers that read, await and then write state hold `lock`.
+    """
+
+    def __init__(self, storage, flush_delay: float):
+        self.storage = storage
+        self.flush_delay = flush_delay
+        self.lock = asyncio.Lock()
+        self._state: dict | None = None
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+    def get(self) -> dict:
+        if self._state is None:
+            self._state = self.storage.load_state()
+            self._normalize(self._state)
+        return self._state
+
+    def sync_servers(self):
+        """Adds state for new servers and drops it for removed ones after SERVERS changed."""
+        if self._state is not None:
+            self._normalize(self._state)
+            self.save()
+
+    @staticmethod
+    def _normalize(state: dict):
+        state.setdefault("user_settings", {})
+        state["user_settings"].setdefault(str(AUTHORIZED_USER_ID), {})
+        state["user_settings"][str(AUTHORIZED_USER_ID)].setdefault("language", "uk")
+
+        state.setdefault("notification_settings", {
+            "first_warning_minutes": 30,
+            "second_warning_minutes": 10,
+            "alert_interval_minutes": 5,
+        })
+        state.setdefault("servers", {})
+
+        active_server_ids = SERVERS.keys()
+        for server_id in list(state["servers"].keys()):
+            if server_id not in active_server_ids:
+                del state["servers"][server_id]
+
+        for server_id in active_server_ids:
+            server_state = state["servers"].setdefault(server_id, {})
+            for key, default in SERVER_STATE_DEFAULTS.items():
+                server_state.setdefault(key, default)
+
+    def save(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_delay, self.flush)
+
+    def flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._state is None:
+            return
+        try:
+            self.storage.save_state(self._state)
+        except Exception as e:
+            logger.error(f"Failed to save state file: {e}")
+
+STATE_STORE = StateStore(STORAGE, STATE_FLUSH_DELAY_SECONDS)
+
+def load_state() -> dict:
+    return STATE_STORE.get()
+
+def save_state(state: dict):
+    STATE_STORE.save()
 
 # --- Decorators ---
 def get_user_language(context: ContextTypes.DEFAULT_TYPE) -> str:
@@ -228,6 +648,7 @@ async def main_menu_keyboard(lang: str):
             [InlineKeyboardButton(server_info["name"], callback_data=f"select_server_{server_id}")]
             for server_id, server_info in SERVERS.items()
         ],
+        [InlineKeyboardButton(get_text("btn_all_servers", lang), callback_data="fleet_menu")],
         [InlineKeyboardButton(get_text("btn_add_server", lang), callback_data="add_server_start")],
     ]
     return InlineKeyboardMarkup(keyboard)
@@ -261,6 +682,7 @@ async def node_management_menu(update: Update, context: ContextTypes.DEFAULT_TYP
         [InlineKeyboardButton(get_text("btn_start_node", lang), callback_data=f"action_start_node_{server_id}"), InlineKeyboardButton(get_text("btn_stop_node", lang), callback_data=f"action_stop_node_{server_id}")],
         [InlineKeyboardButton(get_text("btn_restart_node", lang), callback_data=f"action_restart_node_{server_id}"), InlineKeyboardButton(get_text("btn_status_node", lang), callback_data=f"action_status_node_{server_id}")],
         [InlineKeyboardButton(get_text("btn_version_node", lang), callback_data=f"action_get_node_version_{server_id}"), InlineKeyboardButton(get_text("btn_update_node", lang), callback_data=f"action_update_node_{server_id}")],
+        [InlineKeyboardButton(get_text("btn_rollback_node", lang), callback_data=f"action_rollback_node_{server_id}")],
         [InlineKeyboardButton(get_text("btn_back", lang), callback_data=f"select_server_{server_id}")],
     ]
     await query.edit_message_text(get_text("lbl_node_management_title", lang, server_name=SERVERS[server_id]['name']), reply_markup=InlineKeyboardMarkup(keyboard))
@@ -291,6 +713,7 @@ async def restore_menu(update: Update, context: ContextTypes.DEFAULT_TYPE, lang:
     await query.answer()
     keyboard = [
         [InlineKeyboardButton(get_text("btn_restore_from_local", lang), callback_data=f"action_restore_local_confirm_{server_id}")],
+        [InlineKeyboardButton(get_text("btn_choose_backup", lang), callback_data=f"backup_list:0:{server_id}")],
         [InlineKeyboardButton(get_text("btn_restore_from_github", lang), callback_data=f"action_restore_github_confirm_{server_id}")],
         [InlineKeyboardButton(get_text("btn_back", lang), callback_data=f"action_backup_menu_{server_id}")],
     ]
@@ -327,8 +750,21 @@ async def notification_settings_menu(update: Update, context: ContextTypes.DEFAU
     await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode=ParseMode.HTML)
 
 # --- Utility Functions ---
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+def get_chromedriver_path() -> str:
+    """Resolves the chromedriver binary once; ChromeDriverManager does a network lookup on every call."""
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path is None:
+            _chromedriver_path = ChromeDriverManager().install()
+            logger.info(f"Resolved chromedriver path: {_chromedriver_path}")
+        return _chromedriver_path
+
 def create_selenium_driver():
     """Creates and returns a new Selenium Chrome driver instance."""
+    global _chromedriver_path
     options = webdriver.ChromeOptions()
     options.add_argument("--headless")
     options.add_argument("--no-sandbox")
@@ -337,14 +773,162 @@ def create_selenium_driver():
     options.add_experimental_option('excludeSwitches', ['enable-logging'])
     
     try:
-        service = ChromeService(ChromeDriverManager().install())
+        service = ChromeService(get_chromedriver_path())
         driver = webdriver.Chrome(service=service, options=options)
         logger.info("Successfully created a new Selenium driver instance.")
         return driver
     except Exception as e:
         logger.error(f"Failed to create Selenium driver: {e}", exc_info=True)
+        # The cached driver may no longer match the installed Chrome; look it up again next time.
+        with _chromedriver_lock:
+            _chromedriver_path = None
+        return None
+
+def get_process_tree_rss_mb(root_pid: int) -> float:
+    """Sums the resident memory of a process and all of its descendants, read from /proc."""
+    parents, rss_pages = {}, {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces, so split after its closing parenthesis.
+                parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+            with open(f"/proc/{entry}/statm") as f:
+                rss_pages[int(entry)] = int(f.read().split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+
+    tree, frontier = {root_pid}, [root_pid]
+    while frontier:
+        pid = frontier.pop()
+        for child, parent in parents.items():
+            if parent == pid and child not in tree:
+                tree.add(child)
+                frontier.append(child)
+    return sum(rss_pages.get(pid, 0) for pid in tree) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+class PooledBrowser:
+    def __init__(self, driver):
+        self.driver = driver
+        self.base_handle = driver.current_window_handle
+        self.uses = 0
+
+class BrowserPool:
+    """A small fixed set of long-lived headless Chrome instances.
+
+    Every session gets a fresh tab, which is closed again on release. An instance is
+    replaced after BROWSER_MAX_USES sessions, when its process tree grows past
+    BROWSER_MAX_RSS_MB, or when it fails a health check or a session raises.
+    """
+
+    def __init__(self, size: int, max_uses: int, max_rss_mb: int):
+        self.max_uses = max_uses
+        self.max_rss_mb = max_rss_mb
+        self._semaphore = asyncio.Semaphore(size)
+        self._idle: list[PooledBrowser] = []
+        self._closed = False
+
+    @asynccontextmanager
+    async def session(self):
+        """Yields a driver on a fresh tab, or None if no browser could be started."""
+        async with self._semaphore:
+            browser = await self._checkout()
+            if browser is None:
+                yield None
+                return
+            healthy = False
+            try:
+                yield browser.driver
+                healthy = True
+            finally:
+                # On errors or cancellation the driver may still be busy in a worker thread,
+                # so it is quit rather than handed to the next session.
+                await self._checkin(browser, healthy)
+
+    async def _checkout(self) -> PooledBrowser | None:
+        while self._idle:
+            browser = self._idle.pop()
+            if await asyncio.to_thread(self._open_tab, browser):
+                return browser
+            await asyncio.to_thread(self._quit, browser, "failed health check")
+
+        driver = await asyncio.to_thread(create_selenium_driver)
+        if not driver:
+            return None
+        browser = PooledBrowser(driver)
+        if await asyncio.to_thread(self._open_tab, browser):
+            return browser
+        await asyncio.to_thread(self._quit, browser, "failed health check")
         return None
 
+    async def _checkin(self, browser: PooledBrowser, healthy: bool):
+        browser.uses += 1
+        reason = None
+        if not healthy:
+            reason = "session failed"
+        elif self._closed:
+            reason = "pool closed"
+        elif not await asyncio.to_thread(self._close_tabs, browser):
+            reason = "could not close tab"
+        elif browser.uses >= self.max_uses:
+            reason = f"reached {browser.uses} uses"
+        else:
+            rss_mb = await asyncio.to_thread(self._rss_mb, browser)
+            if rss_mb > self.max_rss_mb:
+                reason = f"RSS {rss_mb:.0f} MB"
+
+        if reason:
+            await asyncio.to_thread(self._quit, browser, reason)
+        else:
+            self._idle.append(browser)
+
+    @staticmethod
+    def _open_tab(browser: PooledBrowser) -> bool:
+        try:
+            browser.driver.switch_to.window(browser.base_handle)
+            browser.driver.execute_script("return 1;")
+            browser.driver.switch_to.new_window('tab')
+            return True
+        except Exception as e:
+            logger.warning(f"Browser health check failed: {e}")
+            return False
+
+    @staticmethod
+    def _close_tabs(browser: PooledBrowser) -> bool:
+        try:
+            for handle in browser.driver.window_handles:
+                if handle != browser.base_handle:
+                    browser.driver.switch_to.window(handle)
+                    browser.driver.close()
+            browser.driver.switch_to.window(browser.base_handle)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to close browser tab: {e}")
+            return False
+
+    @staticmethod
+    def _rss_mb(browser: PooledBrowser) -> float:
+        try:
+            return get_process_tree_rss_mb(browser.driver.service.process.pid)
+        except Exception:
+            return 0.0
+
+    @staticmethod
+    def _quit(browser: PooledBrowser, reason: str):
+        logger.info(f"Recycling browser instance after {browser.uses} uses ({reason}).")
+        try:
+            browser.driver.quit()
+        except Exception as e:
+            logger.warning(f"Failed to quit browser instance: {e}")
+
+    async def close(self):
+        self._closed = True
+        while self._idle:
+            await asyncio.to_thread(self._quit, self._idle.pop(), "pool closed")
+
+BROWSER_POOL = BrowserPool(BROWSER_POOL_SIZE, BROWSER_MAX_USES, BROWSER_MAX_RSS_MB)
+
 def format_seconds_to_hhmmss(seconds: int) -> str:
     if seconds < 0:
         return "N/A"
@@ -364,43 +948,697 @@ def parse_percentage_to_minutes(percentage_str: str, total_epoch_minutes: int =
         return int(total_epoch_minutes * (remaining_percentage / 100))
     return -1
 
+# --- SSH Connection Pool ---
+class SSHConnectionPool:
+    """Keeps one multiplexed OpenSSH ControlMaster connection per remote server.
+
+    Commands reuse the master's socket instead of doing a TCP and key handshake each time.
+    A master exits by itself after SSH_CONTROL_PERSIST_SECONDS without clients, and a
+    master that died is re-established once before a command that never started is
+    reported as failed.
+    """
+
+    def __init__(self, control_dir: str, persist_seconds: int, keepalive_interval: int):
+        self.control_dir = control_dir
+        self.persist_seconds = persist_seconds
+        self.keepalive_interval = keepalive_interval
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._last_used: dict[str, float] = {}
+        self._unavailable: dict[str, float] = {}
+
+    @staticmethod
+    def server_key(server_config: dict) -> str:
+        if server_config.get("is_local"):
+            return "local"
+        return f"{server_config['user']}@{server_config['ip']}"
+
+    def _control_path(self, server_config: dict) -> str:
+        # Unix socket paths are limited to ~100 characters, so use a short digest.
+        digest = hashlib.sha1(self.server_key(server_config).encode()).hexdigest()[:16]
+        return os.path.join(self.control_dir, digest)
+
+    def _base_args(self, server_config: dict, control_path: str) -> list[str]:
+        args = ["ssh"]
+        if server_config.get("key_path"):
+            args += ["-i", server_config["key_path"]]
+        args += [
+            "-o", "StrictHostKeyChecking=no",
+            "-o", "ConnectTimeout=10",
+            "-o", f"ServerAliveInterval={self.keepalive_interval}",
+            "-o", "ServerAliveCountMax=3",
+            "-o", f"ControlPath={control_path}",
+        ]
+        return args
+
+    async def _run_control(self, server_config: dict, *extra_args: str) -> int:
+        args = self._base_args(server_config, self._control_path(server_config))
+        process = await asyncio.create_subprocess_exec(
+            *args, *extra_args, self.server_key(server_config),
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        return await process.wait()
+
+    async def _ensure_master(self, server_config: dict) -> bool:
+        key = self.server_key(server_config)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            last_used = self._last_used.get(key)
+            if last_used and time.monotonic() - last_used < self.persist_seconds / 2:
+                return True
+            failed_at = self._unavailable.get(key)
+            if failed_at and time.monotonic() - failed_at < SSH_MASTER_RETRY_SECONDS:
+                return False
+            if await self._run_control(server_config, "-O", "check") == 0:
+                self._last_used[key] = time.monotonic()
+                return True
+
+            os.makedirs(self.control_dir, mode=0o700, exist_ok=True)
+            # -f backgrounds the master only after authentication, so the return code tells
+            # us whether the connection is usable. Its output goes to DEVNULL: a persisted
+            # master holding our pipes open would make every later read hang.
+            returncode = await self._run_control(
+                server_config, "-M", "-N", "-f",
+                "-o", "ControlMaster=yes",
+                "-o", f"ControlPersist={self.persist_seconds}",
+            )
+            if returncode != 0:
+                if key not in self._unavailable:
+                    logger.warning(f"Could not open SSH master for {key}; falling back to one connection per command.")
+                self._unavailable[key] = time.monotonic()
+                self._last_used.pop(key, None)
+                return False
+
+            logger.info(f"Opened persistent SSH connection to {key}.")
+            self._unavailable.pop(key, None)
+            self._last_used[key] = time.monotonic()
+            return True
+
+    async def command_args(self, server_config: dict, command: str) -> list[str]:
+        """Returns the argv that runs `command` on the server, through the master if possible."""
+        if await self._ensure_master(server_config):
+            self._last_used[self.server_key(server_config)] = time.monotonic()
+            control_path = self._control_path(server_config)
+        else:
+            control_path = "none"
+        return [*self._base_args(server_config, control_path), "-o", "ControlMaster=no", self.server_key(server_config), command]
+
+    async def recover(self, server_config: dict) -> bool:
+        """Drops a dead master after a failed command. Returns True if a retry makes sense."""
+        key = self.server_key(server_config)
+        self._last_used.pop(key, None)
+        if key in self._unavailable or await self._run_control(server_config, "-O", "check") == 0:
+            return False
+        logger.warning(f"SSH master for {key} is gone. Reconnecting.")
+        await self.close(server_config)
+        return await self._ensure_master(server_config)
+
+    async def close(self, server_config: dict):
+        self._last_used.pop(self.server_key(server_config), None)
+        await self._run_control(server_config, "-O", "exit")
+
+    async def close_all(self):
+        for server_config in SERVERS.values():
+            if not server_config.get("is_local", False) and self.server_key(server_config) in self._locks:
+                await self.close(server_config)
+
+SSH_POOL = SSHConnectionPool(SSH_CONTROL_DIR, SSH_CONTROL_PERSIST_SECONDS, SSH_KEEPALIVE_INTERVAL_SECONDS)
+
+# --- Work Executor ---
+class WorkExecutor:
+    """Runs SSH and browser work in a bounded pool of slots, interactive requests first.
+
+    Waiting interactive requests always get the next free slot before background checks, and background
+    checks never take more than background_limit slots, so a user's tap doesn't queue behind a full sweep.
+    Operations that change a server (service actions, backups, restores, updates) also hold that server's
+    lock, so two of them never run against the same node at the same time.
+    """
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+    def __init__(self, size: int, background_limit: int):
+        self.size = size
+        self.background_limit = background_limit
+        self._active = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._server_locks: dict[str, asyncio.Lock] = {}
+
+    @asynccontextmanager
+    async def slot(self, priority: int = INTERACTIVE):
+        await self._acquire(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def exclusive(self, server_id: str, priority: int = INTERACTIVE):
+        """Holds the server's lock and a slot, for operations that change the server."""
+        async with self.server_lock(server_id):
+            async with self.slot(priority):
+                yield
+
+    def server_lock(self, server_id: str) -> asyncio.Lock:
+        return self._server_locks.setdefault(server_id, asyncio.Lock())
+
+    def is_busy(self, server_id: str) -> bool:
+        return self.server_lock(server_id).locked()
+
+    def _limit(self, priority: int) -> int:
+        return self.size if priority == self.INTERACTIVE else self.background_limit
+
+    async def _acquire(self, priority: int):
+        future = asyncio.get_running_loop().create_future()
+        # The sequence number keeps requests of equal priority first-come, first-served.
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._wake()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just as the caller was cancelled.
+                self._release()
+            else:
+                future.cancel()
+            raise
+
+    def _release(self):
+        self._active -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self._active >= self._limit(priority):
+                return
+            heapq.heappop(self._waiters)
+            self._active += 1
+            future.set_result(None)
+
+EXECUTOR = WorkExecutor(WORKER_POOL_SIZE, max(1, min(PERIODIC_CHECK_CONCURRENCY, WORKER_POOL_SIZE - 1)))
+
 # --- Core Bot Logic ---
-async def execute_command(server_config: dict, command: str) -> tuple[int, str, str]:
-    if not server_config.get("is_local", False):
-        shell_command = f"ssh -i {server_config['key_path']} -t -o StrictHostKeyChecking=no -o ConnectTimeout=10 {server_config['user']}@{server_config['ip']} \"{command}\""
-    else:
-        shell_command = command
-    
-    logger.info(f"Executing for '{server_config.get('name', 'N/A')}': {shell_command}")
+COMMAND_OUTPUT_HEAD_LINES = 500
+COMMAND_OUTPUT_TAIL_LINES = 500
+COMMAND_LOG_MAX_CHARS = 4000
+COMMAND_MAX_LINE_BYTES = 64 * 1024
+STREAM_READ_CHUNK_BYTES = 64 * 1024
+STDIN_CHUNK_BYTES = 1024 * 1024
+LINE_BREAK_PATTERN = re.compile(rb"\r\n|\r|\n")
+
+
+class OutputCapture:
+    """Keeps the first and last lines of a command's output and counts what was dropped in between."""
+
+    def __init__(self, head_lines: int = COMMAND_OUTPUT_HEAD_LINES, tail_lines: int = COMMAND_OUTPUT_TAIL_LINES):
+        self.head_lines = head_lines
+        self.head: list[str] = []
+        self.tail: deque[str] = deque(maxlen=tail_lines)
+        self.dropped = 0
+
+    def add(self, line: str):
+        if len(self.head) < self.head_lines:
+            self.head.append(line)
+            return
+        if len(self.tail) == self.tail.maxlen:
+            self.dropped += 1
+        self.tail.append(line)
+
+    def text(self) -> str:
+        lines = list(self.head)
+        if self.dropped:
+            lines.append(f"... [{self.dropped} lines omitted] ...")
+        lines.extend(self.tail)
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def log_excerpt(self, max_chars: int = COMMAND_LOG_MAX_CHARS) -> str:
+        text = self.text()
+        if len(text) <= max_chars:
+            return text
+        half = max_chars // 2
+        return f"{text[:half]}\n... [{len(text) - max_chars} chars omitted] ...\n{text[-half:]}"
+
+
+async def iter_stream_lines(stream: asyncio.StreamReader):
+    """Yields decoded lines from a subprocess pipe as they arrive.
+
+    Carriage returns count as line breaks so that wget/curl/tar progress updates come through one by one,
+    and overlong lines are cut into COMMAND_MAX_LINE_BYTES pieces so a single line can't grow without bound.
+    """
+    buffer = b""
+    while True:
+        chunk = await stream.read(STREAM_READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        data = buffer + chunk
+        # Hold back a trailing \r in case the matching \n arrives with the next chunk.
+        carry = b""
+        if data.endswith(b"\r"):
+            data, carry = data[:-1], b"\r"
+        *lines, buffer = LINE_BREAK_PATTERN.split(data)
+        for line in lines:
+            yield line.decode(errors="replace")
+        while len(buffer) > COMMAND_MAX_LINE_BYTES:
+            yield buffer[:COMMAND_MAX_LINE_BYTES].decode(errors="replace")
+            buffer = buffer[COMMAND_MAX_LINE_BYTES:]
+        buffer += carry
+    buffer = buffer.rstrip(b"\r")
+    if buffer:
+        yield buffer.decode(errors="replace")
+
+
+async def _pump_stream(stream: asyncio.StreamReader, capture: OutputCapture, on_line, marker: str | None = None) -> bool:
+    """Captures a stream line by line. Returns whether `marker` was seen; that line itself is not passed on."""
+    marker_seen = False
+    async for line in iter_stream_lines(stream):
+        if marker is not None and not marker_seen and line == marker:
+            marker_seen = True
+            continue
+        capture.add(line)
+        if on_line is not None:
+            try:
+                result = on_line(line)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"Output subscriber failed on line {line[:200]!r}: {e}")
+    return marker_seen
+
+
+class RateLimiter:
+    """Paces a byte stream to an average rate; None or 0 means unlimited."""
+
+    def __init__(self, bytes_per_second: float | None):
+        self.bytes_per_second = bytes_per_second
+        self.started_at = time.monotonic()
+        self.transferred = 0
+
+    async def consume(self, size: int):
+        self.transferred += size
+        if self.bytes_per_second:
+            await asyncio.sleep(max(0.0, self.transferred / self.bytes_per_second - (time.monotonic() - self.started_at)))
+
+
+async def _report_transfer(on_transfer, transferred: int):
+    if on_transfer is None:
+        return
     try:
-        process = await asyncio.create_subprocess_shell(
-            shell_command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, stderr = await process.communicate()
-        logger.info(f"Command for '{server_config.get('name', 'N/A')}' finished with code {process.returncode}")
-        if stdout:
-            logger.info(f"--> STDOUT: {stdout.decode()}")
-        if stderr:
-            logger.warning(f"--> STDERR: {stderr.decode()}")
-        return process.returncode, stdout.decode(), stderr.decode()
+        result = on_transfer(transferred)
+        if asyncio.iscoroutine(result):
+            await result
+    except Exception as e:
+        logger.warning(f"Transfer subscriber failed: {e}")
+
+
+async def _feed_stdin(stdin: asyncio.StreamWriter, paths: list[str], limiter: RateLimiter, on_transfer=None):
+    """Writes the given files one after another into a process's stdin, then closes it."""
+    try:
+        for path in paths:
+            with open(path, "rb") as f:
+                while chunk := await asyncio.to_thread(f.read, STDIN_CHUNK_BYTES):
+                    stdin.write(chunk)
+                    await stdin.drain()
+                    await limiter.consume(len(chunk))
+                    await _report_transfer(on_transfer, limiter.transferred)
+    except (BrokenPipeError, ConnectionResetError):
+        logger.warning("Command closed its input before all data was sent.")
+    finally:
+        stdin.close()
+
+
+async def _drain_stdout_to_file(stdout: asyncio.StreamReader, path: str, limiter: RateLimiter, on_transfer=None):
+    """Writes a process's raw stdout into a file on the bot host, pacing the reads to the limiter's rate."""
+    with open(path, "wb") as f:
+        while chunk := await stdout.read(STDIN_CHUNK_BYTES):
+            await asyncio.to_thread(f.write, chunk)
+            await limiter.consume(len(chunk))
+            await _report_transfer(on_transfer, limiter.transferred)
+
+
+async def execute_command(server_config: dict, command: str, on_line=None, stdin_paths: list[str] | None = None,
+                          stdout_path: str | None = None, bandwidth_limit: float | None = None,
+                          on_transfer=None) -> tuple[int, str, str]:
+    """Runs a command locally or over SSH and returns (returncode, stdout, stderr).
+
+    Output is read incrementally and only the first and last lines of each stream are kept, so commands that
+    print a lot (tar -v, wget progress) don't grow memory or the log. Pass on_line to receive every stdout and
+    stderr line as it arrives; it may be a plain function or a coroutine function. Files in stdin_paths are
+    streamed into the command's stdin in order, which is how files from the bot host reach remote servers.
+    With stdout_path the command's stdout is written to that file on the bot host instead of being captured.
+    Both directions are paced to bandwidth_limit bytes per second, and on_transfer receives the running byte count.
+    """
+    server_name = server_config.get('name', 'N/A')
+    is_remote = not server_config.get("is_local", False)
+
+    logger.info(f"Executing for '{server_name}': {command}")
+    stdin = asyncio.subprocess.PIPE if stdin_paths else asyncio.subprocess.DEVNULL
+    try:
+        for attempt in range(2):
+            if is_remote:
+                process = await asyncio.create_subprocess_exec(
+                    *await SSH_POOL.command_args(server_config, f"echo {REMOTE_COMMAND_STARTED_MARKER} >&2; {command}"),
+                    stdin=stdin,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+            else:
+                process = await asyncio.create_subprocess_shell(
+                    command,
+                    stdin=stdin,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+            stdout, stderr = OutputCapture(), OutputCapture()
+            limiter = RateLimiter(bandwidth_limit)
+            pumps = [_pump_stream(process.stderr, stderr, on_line, REMOTE_COMMAND_STARTED_MARKER if is_remote else None)]
+            if stdout_path:
+                pumps.append(_drain_stdout_to_file(process.stdout, stdout_path, limiter, on_transfer))
+            else:
+                pumps.append(_pump_stream(process.stdout, stdout, on_line))
+            if stdin_paths:
+                pumps.append(_feed_stdin(process.stdin, stdin_paths, limiter, on_transfer))
+            pump_tasks = [asyncio.ensure_future(pump) for pump in pumps]
+            try:
+                command_started = (await asyncio.gather(*pump_tasks))[0]
+                await process.wait()
+            except BaseException:
+                # Cancellation, or a pump failing (e.g. the bot host's disk filling up while writing stdout_path),
+                # would otherwise leave the process blocked on a pipe nobody reads any more.
+                for task in pump_tasks:
+                    task.cancel()
+                if process.returncode is None:
+                    process.kill()
+                raise
+            # ssh itself exits with 255 when the connection fails. Only a command that never started is retried:
+            # one cut off half-way may already have stopped a service or deleted files.
+            if is_remote and process.returncode == 255 and not command_started and attempt == 0 and await SSH_POOL.recover(server_config):
+                logger.info(f"Retrying command for '{server_name}' over a new SSH connection.")
+                continue
+            break
+
+        logger.info(f"Command for '{server_name}' finished with code {process.returncode}")
+        stdout_text, stderr_text = stdout.text(), stderr.text()
+        if stdout_text:
+            logger.info(f"--> STDOUT: {stdout.log_excerpt()}")
+        if stderr_text:
+            logger.warning(f"--> STDERR: {stderr.log_excerpt()}")
+        return process.returncode, stdout_text, stderr_text
     except Exception as e:
-        logger.error(f"Exception in execute_command for '{server_config.get('name', 'N/A')}': {e}", exc_info=True)
+        logger.error(f"Exception in execute_command for '{server_name}': {e}", exc_info=True)
         return -1, "", str(e)
 
+# --- Progress Reporting ---
+WGET_PROGRESS_ARGS = "--progress=dot:giga"
+WGET_GIGA_DOT_BYTES = 1024 ** 2
+TAR_RECORD_BYTES = 10240
+TAR_CHECKPOINT_RECORDS = 1000
+TAR_CHECKPOINT_ARGS = f"--checkpoint={TAR_CHECKPOINT_RECORDS} --checkpoint-action=echo=progress-checkpoint=%u"
+
+WGET_DOT_PATTERN = re.compile(r"^\s*(\d+)K([\s.,]+?)(\d{1,3})%\s+([\d.,]+[KMGT]?)[\s=]+(\S+)\s*$")
+CURL_METER_PATTERN = re.compile(
+    r"^\s*\d{1,3}\s+\S+\s+(\d{1,3})\s+(\S+)\s+\d{1,3}\s+\S+\s+(\S+)\s+\S+\s+\S+\s+\S+\s+(\S+)\s+(\S+)\s*$"
+)
+TAR_CHECKPOINT_PATTERN = re.compile(r"progress-checkpoint=(\d+)")
+RSYNC_PROGRESS_PATTERN = re.compile(r"^\s*([\d,]+)\s+(\d{1,3})%\s+([\d.,]+[kKMGT]?B)/s\s+(\d+:\d{2}:\d{2})")
+# Printed by resumable downloads before curl starts, since curl's meter only counts the bytes it fetches itself.
+RESUME_OFFSET_PATTERN = re.compile(r"^resume-offset=(\d+)$")
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(text: str) -> int | None:
+    match = re.fullmatch(r"([\d.]+)([KMGT]?)(?:i?B)?", text.strip().replace(",", "."), re.IGNORECASE)
+    if not match:
+        return None
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def parse_duration(text: str) -> int | None:
+    """Parses wget-style (1h2m3s) and curl-style (0:01:06) durations into seconds."""
+    text = text.strip()
+    if re.fullmatch(r"\d+:\d{2}:\d{2}", text):
+        hours, minutes, seconds = map(int, text.split(":"))
+        return hours * 3600 + minutes * 60 + seconds
+    parts = re.findall(r"([\d.]+)([dhms])", text)
+    if not parts or "".join(value + unit for value, unit in parts) != text:
+        return None
+    factors = {"d": 86400, "h": 3600, "m": 60, "s": 1}
+    return int(sum(float(value) * factors[unit] for value, unit in parts))
+
+
+def command_error_excerpt(stderr: str, max_chars: int = 1500) -> str:
+    """Returns the end of a command's stderr, HTML-escaped and short enough for a Telegram message."""
+    lines = [line for line in stderr.splitlines() if parse_progress_line(line) is None and not RESUME_OFFSET_PATTERN.match(line)]
+    text = "\n".join(lines).strip()
+    if len(text) > max_chars:
+        text = "..." + text[-max_chars:]
+    return html.escape(text)
+
+
+class ProgressSample:
+    def __init__(self, percent: float | None = None, bytes_done: int | None = None,
+                 rate_bps: float | None = None, eta_seconds: int | None = None):
+        self.percent = percent
+        self.bytes_done = bytes_done
+        self.rate_bps = rate_bps
+        self.eta_seconds = eta_seconds
+
+
+def parse_progress_line(line: str) -> ProgressSample | None:
+    """Recognises wget --progress=dot, curl's progress meter, rsync --info=progress2 and tar checkpoint lines."""
+    if match := TAR_CHECKPOINT_PATTERN.search(line):
+        return ProgressSample(bytes_done=int(match.group(1)) * TAR_RECORD_BYTES)
+    if match := RSYNC_PROGRESS_PATTERN.match(line):
+        return ProgressSample(
+            percent=float(match.group(2)),
+            bytes_done=int(match.group(1).replace(",", "")),
+            rate_bps=parse_size(match.group(3)),
+            eta_seconds=parse_duration(match.group(4)),
+        )
+    if match := WGET_DOT_PATTERN.match(line):
+        percent = float(match.group(3))
+        bytes_done = int(match.group(1)) * 1024 + match.group(2).count(".") * WGET_GIGA_DOT_BYTES
+        # The last dot line reports the total time ("=7.2s") instead of an ETA.
+        eta = 0 if percent >= 100 else parse_duration(match.group(5))
+        return ProgressSample(percent=percent, bytes_done=bytes_done, rate_bps=parse_size(match.group(4)), eta_seconds=eta)
+    if match := CURL_METER_PATTERN.match(line):
+        return ProgressSample(
+            percent=float(match.group(1)),
+            bytes_done=parse_size(match.group(2)),
+            rate_bps=parse_size(match.group(5)),
+            eta_seconds=parse_duration(match.group(4)),
+        )
+    return None
+
+
+def format_bytes(value: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024:
+            return f"{value:.1f} {unit}" if unit != "B" else f"{int(value)} {unit}"
+        value /= 1024
+    return f"{value:.1f} TiB"
+
+
+class TransferProgress:
+    """Accumulates progress samples for one step and fills in whatever the tool itself didn't report."""
+
+    def __init__(self, total_bytes: int | None = None):
+        self.total_bytes = total_bytes
+        self.percent: float | None = None
+        self.bytes_done: int | None = None
+        self.rate_bps: float | None = None
+        self.eta_seconds: int | None = None
+        self._last_bytes: tuple[float, int] | None = None
+        self._parts: dict[str, int] = {}
+
+    def update(self, sample: ProgressSample):
+        now = time.monotonic()
+        if sample.bytes_done is not None:
+            if sample.rate_bps is None and self._last_bytes and now > self._last_bytes[0]:
+                rate = (sample.bytes_done - self._last_bytes[1]) / (now - self._last_bytes[0])
+                self.rate_bps = rate if self.rate_bps is None else 0.7 * self.rate_bps + 0.3 * rate
+            self._last_bytes = (now, sample.bytes_done)
+            self.bytes_done = sample.bytes_done
+        if sample.rate_bps is not None:
+            self.rate_bps = sample.rate_bps
+        if sample.percent is not None:
+            self.percent = sample.percent
+        elif self.total_bytes and self.bytes_done is not None:
+            self.percent = min(100.0, 100.0 * self.bytes_done / self.total_bytes)
+        if sample.eta_seconds is not None:
+            self.eta_seconds = sample.eta_seconds
+        elif self.total_bytes and self.bytes_done is not None and self.rate_bps:
+            self.eta_seconds = int(max(0, self.total_bytes - self.bytes_done) / self.rate_bps)
+
+    def update_part(self, key: str, bytes_done: int):
+        """Feeds the progress of one of several concurrent transfers that together make up this step."""
+        self._parts[key] = bytes_done
+        self.update(ProgressSample(bytes_done=sum(self._parts.values())))
+
+    def render(self, lang: str) -> str:
+        parts = []
+        if self.percent is not None:
+            parts.append(f"{self.percent:.0f}%")
+        if self.bytes_done is not None:
+            parts.append(format_bytes(self.bytes_done))
+        if self.rate_bps:
+            parts.append(f"{format_bytes(self.rate_bps)}/s")
+        if self.eta_seconds is not None:
+            parts.append(get_text("label_progress_eta", lang, eta=format_seconds_to_hhmmss(self.eta_seconds)))
+        return "⏳ " + " · ".join(parts) if parts else ""
+
+
+class ChatEditThrottle:
+    """Remembers when each chat may next have a message edited, shared by every reporter."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_allowed: dict[int, float] = {}
+
+    def delay(self, chat_id: int) -> float:
+        return max(0.0, self._next_allowed.get(chat_id, 0.0) - time.monotonic())
+
+    def mark(self, chat_id: int, wait: float = 0.0):
+        self._next_allowed[chat_id] = time.monotonic() + max(self.interval, wait)
+
+EDIT_THROTTLE = ChatEditThrottle(PROGRESS_EDIT_INTERVAL_SECONDS)
+
+
+class ProgressReporter:
+    """Shows step messages and live transfer progress in one Telegram message.
+
+    Edits are coalesced: at most one edit per chat every PROGRESS_EDIT_INTERVAL_SECONDS, and when several updates
+    arrive in between only the latest is sent. Use step() for stage changes, pass on_line to execute_command for
+    live progress, and finish() for the final message, which is always delivered.
+    """
+
+    def __init__(self, query, lang: str):
+        self.query = query
+        self.lang = lang
+        self.chat_id = query.message.chat_id if query.message else query.from_user.id
+        self.step_text = ""
+        self.transfer: TransferProgress | None = None
+        self._pending: str | None = None
+        self._shown: str | None = None
+        self._flush_task: asyncio.Task | None = None
+        self._edit_lock = asyncio.Lock()
+        self._finished = False
+
+    async def step(self, text: str, total_bytes: int | None = None):
+        self._finished = False
+        self.step_text = text
+        self.transfer = TransferProgress(total_bytes)
+        await self._submit(text)
+
+    async def on_line(self, line: str):
+        sample = parse_progress_line(line)
+        if sample is None or self.transfer is None:
+            return
+        self.transfer.update(sample)
+        await self._submit(f"{self.step_text}\n\n{self.transfer.render(self.lang)}")
+
+    async def on_transfer(self, bytes_done: int):
+        """Progress callback for data the bot itself moves, see execute_command's on_transfer."""
+        if self.transfer is None:
+            return
+        self.transfer.update(ProgressSample(bytes_done=bytes_done))
+        await self._submit(f"{self.step_text}\n\n{self.transfer.render(self.lang)}")
+
+    def part_line_handler(self, key: str):
+        """Returns an on_line callback for one of several concurrent downloads in the current step."""
+        offset = 0
+
+        async def on_line(line: str):
+            nonlocal offset
+            if match := RESUME_OFFSET_PATTERN.match(line):
+                offset, received = int(match.group(1)), 0
+            else:
+                sample = parse_progress_line(line)
+                if sample is None or sample.bytes_done is None:
+                    return
+                received = sample.bytes_done
+            if self.transfer is None:
+                return
+            self.transfer.update_part(key, offset + received)
+            await self._submit(f"{self.step_text}\n\n{self.transfer.render(self.lang)}")
+
+        return on_line
+
+    async def finish(self, text: str, reply_markup=None):
+        self._finished = True
+        if self._flush_task:
+            # Only stops a flush that is still waiting; an edit already sent holds _edit_lock, so ours lands after it.
+            self._flush_task.cancel()
+            self._flush_task = None
+        self._pending = text
+        for _ in range(3):
+            await asyncio.sleep(EDIT_THROTTLE.delay(self.chat_id))
+            if await self._edit(reply_markup):
+                return
+
+    async def _submit(self, text: str):
+        if self._finished:
+            return
+        self._pending = text
+        if self._flush_task:
+            return
+        delay = EDIT_THROTTLE.delay(self.chat_id)
+        if delay == 0:
+            await self._edit()
+        else:
+            self._flush_task = asyncio.create_task(self._flush_later(delay))
+
+    async def _flush_later(self, delay: float):
+        try:
+            await asyncio.sleep(delay)
+            # Shielded so that finish() cancelling us can't abandon a request Telegram may still apply.
+            await asyncio.shield(self._edit())
+        except asyncio.CancelledError:
+            return
+        # Cleared only now, so updates that arrived during the edit were queued instead of starting another one.
+        self._flush_task = None
+        if self._pending and not self._finished:
+            self._flush_task = asyncio.create_task(self._flush_later(EDIT_THROTTLE.delay(self.chat_id)))
+
+    async def _edit(self, reply_markup=None) -> bool:
+        """Sends the pending text. Returns False only if Telegram asked us to back off."""
+        async with self._edit_lock:
+            text, self._pending = self._pending, None
+            if text is None or (text == self._shown and reply_markup is None):
+                return True
+            # Claim the slot before awaiting so concurrent output lines don't start a second edit.
+            EDIT_THROTTLE.mark(self.chat_id)
+            try:
+                await self.query.edit_message_text(text, parse_mode=ParseMode.HTML, reply_markup=reply_markup)
+                self._shown = text
+            except RetryAfter as e:
+                retry_after = e.retry_after.total_seconds() if isinstance(e.retry_after, timedelta) else e.retry_after
+                logger.warning(f"Telegram asked to retry message edits in chat {self.chat_id} after {retry_after}s.")
+                EDIT_THROTTLE.mark(self.chat_id, retry_after)
+                self._pending = self._pending or text
+                return False
+            except BadRequest as e:
+                if "not modified" not in str(e).lower():
+                    logger.error(f"Failed to edit progress message: {e}")
+            return True
+
 async def check_and_restart_tunnel_service(server_config: dict, query, lang: str) -> bool:
     server_name = server_config["name"]
-    service_name = "humanode-websocket-tunnel.service"
+    service_name = TUNNEL_SERVICE
 
     await query.edit_message_text(get_text("msg_checking_tunnel_status", lang, service_name=service_name, server_name=server_name))
 
-    returncode, stdout, _ = await execute_command(server_config, f"sudo systemctl status {service_name}")
-    if returncode == 0 and "Active: active (running)" in stdout:
+    tunnel_state = await read_tunnel_state(server_config)
+    if tunnel_state and tunnel_state.active:
         return True
     
     await query.edit_message_text(get_text("msg_tunnel_inactive_restarting", lang, service_name=service_name))
     restart_returncode, _, restart_stderr = await execute_command(server_config, f"sudo systemctl restart {service_name}")
+    invalidate_probe(server_config)
     if restart_returncode != 0:
         await query.edit_message_text(get_text("msg_tunnel_restart_failed", lang, error=restart_stderr), parse_mode=ParseMode.HTML)
         return False
@@ -408,64 +1646,402 @@ async def check_and_restart_tunnel_service(server_config: dict, query, lang: str
     await query.edit_message_text(get_text("msg_tunnel_waiting_after_restart", lang))
     await asyncio.sleep(10)
 
-    returncode_after, stdout_after, _ = await execute_command(server_config, f"sudo systemctl status {service_name}")
-    if returncode_after == 0 and "Active: active (running)" in stdout_after:
+    tunnel_state = await read_tunnel_state(server_config)
+    if tunnel_state and tunnel_state.active:
         return True
     
     await query.edit_message_text(get_text("msg_tunnel_not_active", lang, service_name=service_name), parse_mode=ParseMode.HTML)
     return False
 
+# --- Node Probe ---
+# Unit states, the node version, the log tail, new tunnel journal entries and disk usage all come back from
+# a single remote command (see node_probe.py); menus reuse a document younger than PROBE_CACHE_TTL_SECONDS.
+NODE_SERVICE = node_probe.NODE_SERVICE
+PROBE_JOURNAL_LINES = 20
+PROBE_PARTS = ("version", "disk", "journal")
+PROBE_CACHE: dict[str, tuple[float, dict, frozenset[str]]] = {}
+
+async def probe_server(server_config: dict, parts: tuple[str, ...] = (), max_age: float | None = None) -> tuple[dict | None, str]:
+    """Returns (document, error). A cached document is reused if it is at most max_age seconds old.
+
+    The unit states and tunnel journal are always read. parts adds the costlier ones from PROBE_PARTS:
+    "version" execs the binary, "disk" walks the whole data directory with du, "journal" reads the node log.
+    A cached document is only reused if it was probed with at least the requested parts.
+    """
+    cache_key = SSHConnectionPool.server_key(server_config)
+    max_age = PROBE_CACHE_TTL_SECONDS if max_age is None else max_age
+    cached = PROBE_CACHE.get(cache_key)
+    if cached and time.monotonic() - cached[0] <= max_age and set(parts) <= cached[2]:
+        return cached[1], ""
+
+    tunnel_entry = TUNNEL_URL_CACHE.get(cache_key)
+    data_path = server_config.get("humanode_data_path") or DEFAULT_HUMANODE_DATA_PATH
+    cmd = node_probe.build_probe_command(
+        get_binary_path(server_config), data_path, PROBE_JOURNAL_LINES if "journal" in parts else 0,
+        tunnel_entry.cursor if tunnel_entry else None, version="version" in parts, disk="disk" in parts,
+    )
+    returncode, stdout, stderr = await execute_command(server_config, cmd)
+    try:
+        if returncode != 0:
+            raise ValueError(stderr.strip() or f"exit code {returncode}")
+        document = node_probe.parse_probe_output(stdout)
+    except ValueError as e:
+        logger.error(f"Node probe failed on {server_config['name']}: {e}")
+        PROBE_CACHE.pop(cache_key, None)
+        TUNNEL_URL_CACHE.pop(cache_key, None)
+        return None, str(e)
+
+    tunnel_journal = document["tunnel_journal"]
+    invocation_id = document["units"].get("tunnel", {}).get("InvocationID") or None
+    update_tunnel_url_cache(cache_key, invocation_id, tunnel_journal["lines"], tunnel_journal["cursor"])
+    PROBE_CACHE[cache_key] = (time.monotonic(), document, frozenset(parts))
+    return document, ""
+
+def invalidate_probe(server_config: dict):
+    """Called after anything that changes a unit's state, so the next probe is not served from the cache."""
+    PROBE_CACHE.pop(SSHConnectionPool.server_key(server_config), None)
+
+def format_probe_disk(document: dict) -> str:
+    disk = document.get("disk")
+    if not disk:
+        return "disk ?"
+    data_size = format_bytes(disk["data_bytes"]) if disk["data_bytes"] is not None else "?"
+    return f"{format_bytes(disk['free'])} free, DB {data_size}"
+
+# --- Tunnel URL Cache ---
+TUNNEL_SERVICE = node_probe.TUNNEL_SERVICE
+TUNNEL_LOG_PATTERN = re.compile(r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d+Z).*?url=(wss://[^\s]+htunnel\.app)")
+
+class TunnelUrlCacheEntry:
+    def __init__(self, url: str | None, timestamp: datetime | None, cursor: str | None, invocation_id: str | None):
+        self.url = url
+        self.timestamp = timestamp
+        self.cursor = cursor
+        self.invocation_id = invocation_id
+
+TUNNEL_URL_CACHE: dict[str, TunnelUrlCacheEntry] = {}
+
+class TunnelState:
+    def __init__(self, active: bool, tunnel_url: str | None):
+        self.active = active
+        self.tunnel_url = tunnel_url
+
+def update_tunnel_url_cache(cache_key: str, invocation_id: str | None, lines: list[str], cursor: str | None):
+    """Folds tunnel journal lines logged since the saved cursor into the cache.
+
+    The cached URL stays valid while the unit's InvocationID is unchanged and no newer URL is logged.
+    """
+    entry = TUNNEL_URL_CACHE.get(cache_key)
+    if entry and entry.invocation_id == invocation_id:
+        latest_url, latest_timestamp = entry.url, entry.timestamp
+    else:
+        # The unit restarted, so the URL it logged before is gone.
+        latest_url, latest_timestamp = None, None
+
+    for line in lines:
+        match = TUNNEL_LOG_PATTERN.search(line)
+        if match:
+            timestamp_str, url = match.groups()
+            current_timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+            if latest_timestamp is None or current_timestamp > latest_timestamp:
+                latest_timestamp = current_timestamp
+                latest_url = url
+
+    cursor = cursor or (entry.cursor if entry else None)
+    TUNNEL_URL_CACHE[cache_key] = TunnelUrlCacheEntry(latest_url, latest_timestamp, cursor, invocation_id)
+
+async def read_tunnel_state(server_config: dict) -> TunnelState | None:
+    """Reads the tunnel unit state and its newest URL from the server's agent, or else from the node probe."""
+    agent_state = AGENT_HUB.snapshot(server_config)
+    if agent_state:
+        return TunnelState(agent_state["units"].get("tunnel", {}).get("ActiveState") == "active", agent_state["tunnel_url"])
+    document, _ = await probe_server(server_config)
+    if document is None:
+        return None
+    entry = TUNNEL_URL_CACHE.get(SSHConnectionPool.server_key(server_config))
+    return TunnelState(node_probe.unit_is_active(document, "tunnel"), entry.url if entry else None)
+
+# --- Node Agent ---
+class AgentHub:
+    """Receives state pushed by node agents and keeps the latest copy per server.
+
+    A server counts as agent-managed only while its agent has sent something in the last
+    AGENT_STALE_SECONDS; otherwise snapshot() returns None and callers fall back to SSH.
+    """
+
+    def __init__(self):
+        self._states: dict[str, dict] = {}
+        self._seen: dict[str, float] = {}
+        self._sequence: dict[str, int] = {}
+        self._server: asyncio.AbstractServer | None = None
+
+    def snapshot(self, server_config: dict) -> dict | None:
+        key = SSHConnectionPool.server_key(server_config)
+        if time.monotonic() - self._seen.get(key, float("-inf")) > AGENT_STALE_SECONDS:
+            return None
+        return self._states.get(key)
+
+    def apply(self, server_config: dict, message: dict) -> tuple[dict | None, dict]:
+        """Merges a verified message and returns (previous, current) state. Raises ValueError on a replay."""
+        key = SSHConnectionPool.server_key(server_config)
+        if message["seq"] <= self._sequence.get(key, 0):
+            raise ValueError(f"Replayed agent message for {server_config['name']}")
+        if not message["full"] and key not in self._states:
+            raise ValueError(f"Agent delta for {server_config['name']} has no full state to apply to")
+        self._sequence[key] = message["seq"]
+        # Deltas always apply to the last stored state; staleness only decides whether callers may use it.
+        previous = self._states.get(key)
+        current = dict(message["delta"]) if message["full"] else {**previous, **message["delta"]}
+        self._states[key] = current
+        self._seen[key] = time.monotonic()
+        return previous, current
+
+    async def start(self, bot):
+        self._server = await asyncio.start_server(
+            lambda reader, writer: self._handle_connection(reader, writer, bot),
+            AGENT_LISTEN_HOST, AGENT_LISTEN_PORT, limit=node_agent.MAX_MESSAGE_BYTES,
+        )
+        logger.info(f"Listening for node agents on {AGENT_LISTEN_HOST}:{AGENT_LISTEN_PORT}.")
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, bot):
+        peer = writer.get_extra_info("peername")
+        try:
+            while line := await reader.readline():
+                message = node_agent.verify_message(line, agent_secret)
+                server_config = SERVERS[message["server"]]
+                previous, current = self.apply(server_config, message)
+                if message["full"]:
+                    logger.info(f"Node agent for {server_config['name']} connected from {peer}.")
+                if previous and previous.get("units") != current.get("units"):
+                    invalidate_probe(server_config)
+                    await notify_agent_transition(bot, server_config, previous, current)
+        except ValueError as e:
+            logger.warning(f"Dropping node agent connection from {peer}: {e}")
+        except ConnectionError as e:
+            logger.info(f"Node agent connection from {peer} closed: {e}")
+        except Exception as e:
+            logger.error(f"Unexpected error on node agent connection from {peer}: {e}", exc_info=True)
+        finally:
+            writer.close()
+
+AGENT_HUB = AgentHub()
+
+def agent_secret(server_id: str) -> bytes | None:
+    secret = SERVERS.get(server_id, {}).get("agent_secret")
+    return secret.encode() if secret else None
+
+async def notify_agent_transition(bot, server_config: dict, previous: dict, current: dict):
+    """Tells the user as soon as an agent reports the node service starting or stopping."""
+    was_active = previous["units"].get("node", {}).get("ActiveState") == "active"
+    is_active = current["units"].get("node", {}).get("ActiveState") == "active"
+    if was_active == is_active:
+        return
+    lang = load_state().get("user_settings", {}).get(str(AUTHORIZED_USER_ID), {}).get("language", "uk")
+    key = "msg_agent_node_started" if is_active else "msg_agent_node_stopped"
+    state_text = node_probe.format_unit_state(current, "node")
+    await bot.send_message(AUTHORIZED_USER_ID, get_text(key, lang, server_name=server_config['name'], state=html.escape(state_text)), parse_mode=ParseMode.HTML)
+
 async def get_latest_url_from_logs(server_config: dict, query=None, lang: str = "uk"):
     base_url = "https://webapp.mainnet.stages.humanode.io/"
 
-    if query:
-        tunnel_ok = await check_and_restart_tunnel_service(server_config, query, lang)
-        if not tunnel_ok:
-            await query.edit_message_text(get_text("msg_tunnel_failed_to_ensure", lang, server_name=server_config['name']))
-            return None
-    else:
-        service_name = "humanode-websocket-tunnel.service"
-        returncode, stdout, _ = await execute_command(server_config, f"sudo systemctl status {service_name}")
-        if not (returncode == 0 and "Active: active (running)" in stdout):
+    tunnel_state = await read_tunnel_state(server_config)
+    if not tunnel_state or not tunnel_state.active:
+        if query:
+            tunnel_ok = await check_and_restart_tunnel_service(server_config, query, lang)
+            if not tunnel_ok:
+                await query.edit_message_text(get_text("msg_tunnel_failed_to_ensure", lang, server_name=server_config['name']))
+                return None
+        else:
             logger.info(f"Tunnel for {server_config['name']} is inactive during background check. Attempting restart.")
-            await execute_command(server_config, f"sudo systemctl restart {service_name}")
+            await execute_command(server_config, f"sudo systemctl restart {TUNNEL_SERVICE}")
+            invalidate_probe(server_config)
             await asyncio.sleep(10)
+        tunnel_state = await read_tunnel_state(server_config)
 
-    try:
-        log_cmd = "journalctl -u humanode-websocket-tunnel.service -n 200 --no-pager"
-        returncode, stdout, stderr = await execute_command(server_config, log_cmd)
-        
-        if returncode == 0 and stdout:
-            latest_timestamp = None
-            latest_url = None
-            log_pattern = re.compile(r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d+Z).*?url=(wss://[^\s]+htunnel\.app)")
-
-            for line in stdout.splitlines():
-                match = log_pattern.search(line)
-                if match:
-                    timestamp_str, url = match.groups()
-                    current_timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                    if latest_timestamp is None or current_timestamp > latest_timestamp:
-                        latest_timestamp = current_timestamp
-                        latest_url = url
-            
-            if latest_url:
-                encoded_tunnel_url = requests.utils.quote(latest_url, safe='')
-                full_url = f"{base_url}open?url={encoded_tunnel_url}"
-                logger.info(f"Found most recent tunnel URL for {server_config['name']} via timestamp: {full_url}")
-                return full_url
-            else:
-                logger.warning(f"Could not find any tunnel URL in logs for {server_config['name']}.")
-        else:
-            logger.error(f"Failed to get logs for tunnel service. Stderr: {stderr}")
+    if tunnel_state and tunnel_state.tunnel_url:
+        encoded_tunnel_url = requests.utils.quote(tunnel_state.tunnel_url, safe='')
+        full_url = f"{base_url}open?url={encoded_tunnel_url}"
+        logger.info(f"Found most recent tunnel URL for {server_config['name']}: {full_url}")
+        return full_url
 
-    except Exception as e:
-        logger.error(f"Error getting URL for {server_config['name']}: {e}")
-    
     logger.warning(f"Could not find any URL for {server_config['name']}.")
     return None
 
-def get_bioauth_and_epoch_times(driver: webdriver.Chrome, url: str) -> tuple[int, int]:
+# --- Page Readiness ---
+COUNTDOWN_PATTERN = re.compile(r'(\d{1,3})\s*:\s*(\d{2})\s*:\s*(\d{2})')
+PROGRESS_PATTERN = re.compile(r'Progress:\s*(\d+)\s*hr[s]?\s*(\d+)\s*min', re.IGNORECASE)
+PAGE_READY_MIN_TIMEOUT_SECONDS = 30
+PAGE_READY_MAX_TIMEOUT_SECONDS = 90
+COUNTDOWN_GRACE_SECONDS = 3
+
+class PageLoadTimes:
+    """Remembers how long the web app took to show timer data for each server.
+
+    The wait for the next load is a multiple of the smoothed past load time, bounded by
+    PAGE_READY_MIN_TIMEOUT_SECONDS and PAGE_READY_MAX_TIMEOUT_SECONDS.
+    """
+
+    def __init__(self, smoothing: float = 0.3):
+        self.smoothing = smoothing
+        self._average: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def timeout_for(self, key: str) -> float:
+        with self._lock:
+            average = self._average.get(key)
+        if average is None:
+            return PAGE_READY_MAX_TIMEOUT_SECONDS
+        return min(PAGE_READY_MAX_TIMEOUT_SECONDS, max(PAGE_READY_MIN_TIMEOUT_SECONDS, average * 3 + 10))
+
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            average = self._average.get(key)
+            self._average[key] = seconds if average is None else average + self.smoothing * (seconds - average)
+
+    def forget(self, key: str):
+        """Drops the history after a timeout, so the next attempt gets the full wait again."""
+        with self._lock:
+            self._average.pop(key, None)
+
+PAGE_LOAD_TIMES = PageLoadTimes()
+
+def progress_bar_started(container) -> bool:
+    for bar in container.find_elements(By.XPATH, ".//div[contains(@class, 'MuiLinearProgress-bar')]"):
+        match = re.search(r'width:\s*(\d+\.?\d*)%', bar.get_attribute("style") or "")
+        if match and float(match.group(1)) > 0:
+            return True
+    return False
+
+def wait_for_timers_ready(driver: webdriver.Chrome, container, timeout: float) -> bool:
+    """Waits until the dashboard shows live timer data rather than sleeping for a fixed time.
+
+    Ready means the bioauth countdown is rendered, or the epoch progress text or bar has a
+    value. In the latter case the countdown gets a short grace period, since it can render a
+    moment later and is absent on a node that is not bioauthenticated.
+    """
+    def timers_signal(_):
+        text = container.text
+        if COUNTDOWN_PATTERN.search(text):
+            return "countdown"
+        if PROGRESS_PATTERN.search(text) or progress_bar_started(container):
+            return "progress"
+        return False
+
+    ignored = (StaleElementReferenceException,)
+    try:
+        signal = WebDriverWait(driver, timeout, poll_frequency=0.25, ignored_exceptions=ignored).until(timers_signal)
+    except TimeoutException:
+        logger.warning(f"Timer data did not appear within {timeout:.0f}s.")
+        return False
+
+    if signal != "countdown":
+        try:
+            WebDriverWait(driver, COUNTDOWN_GRACE_SECONDS, poll_frequency=0.25, ignored_exceptions=ignored).until(
+                lambda _: COUNTDOWN_PATTERN.search(container.text)
+            )
+        except TimeoutException:
+            pass
+    return True
+
+# --- Timer Extraction ---
+class ExtractionStats:
+    """Counts how often each extraction tier produced a value, and how long it took."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict] = {}
+
+    def record(self, tier: str, hit: bool, elapsed_seconds: float):
+        with self._lock:
+            stats = self._stats.setdefault(tier, {"attempts": 0, "hits": 0, "total_ms": 0.0})
+            stats["attempts"] += 1
+            stats["hits"] += int(hit)
+            stats["total_ms"] += elapsed_seconds * 1000
+
+    def summary(self) -> str:
+        with self._lock:
+            return "; ".join(
+                f"{tier}: {stats['hits']}/{stats['attempts']} hits, avg {stats['total_ms'] / stats['attempts']:.0f} ms"
+                for tier, stats in self._stats.items()
+            )
+
+EXTRACTION_STATS = ExtractionStats()
+
+def parse_bioauth_seconds(text: str) -> int:
+    match = COUNTDOWN_PATTERN.search(text)
+    if not match:
+        return -1
+    h, m, s = map(int, match.groups())
+    return int(timedelta(hours=h, minutes=m, seconds=s).total_seconds())
+
+def parse_epoch_minutes(text: str) -> int:
+    match = PROGRESS_PATTERN.search(text)
+    if not match:
+        return -1
+    progress_minutes = int(match.group(1)) * 60 + int(match.group(2))
+    return EPOCH_DURATION_MINUTES - progress_minutes
+
+def prepare_image_for_ocr(png_bytes: bytes) -> Image.Image:
+    """Crops the screenshot to its content and binarises it, which is faster and more reliable to OCR."""
+    image = Image.open(io.BytesIO(png_bytes)).convert("L")
+    # Dark text on a light background: the bounding box of the inverted image is the text area.
+    content_box = ImageOps.invert(image).point(lambda value: 255 if value > 60 else 0).getbbox()
+    if content_box:
+        left, top, right, bottom = content_box
+        image = image.crop((max(0, left - 8), max(0, top - 8), min(image.width, right + 8), min(image.height, bottom + 8)))
+    image = image.resize((image.width * 2, image.height * 2), Image.LANCZOS)
+    return image.point(lambda value: 255 if value > 150 else 0)
+
+def extract_timer_values(container) -> tuple[int, int]:
+    """Reads (bioauth_seconds, epoch_minutes) from the timers container, cheapest tier first.
+
+    1. The rendered text (innerText) of the container.
+    2. The width of the epoch progress bar, for the epoch time only.
+    3. OCR of a cropped, binarised screenshot, only if the epoch time is still unknown or
+       the DOM had no readable text at all.
+    """
+    started_at = time.monotonic()
+    dom_text = container.get_attribute("innerText") or container.text or ""
+    bioauth_seconds = parse_bioauth_seconds(dom_text)
+    epoch_minutes = parse_epoch_minutes(dom_text)
+    EXTRACTION_STATS.record("dom", bioauth_seconds != -1 or epoch_minutes != -1, time.monotonic() - started_at)
+
+    if epoch_minutes == -1:
+        started_at = time.monotonic()
+        try:
+            epoch_progress_xpath = ".//p[contains(text(), 'Epoch')]/following-sibling::div//div[contains(@class, 'MuiLinearProgress-bar')]"
+            epoch_element = container.find_element(By.XPATH, epoch_progress_xpath)
+            epoch_minutes = parse_percentage_to_minutes(epoch_element.get_attribute("style") or "", EPOCH_DURATION_MINUTES)
+        except Exception as e:
+            logger.warning(f"Could not read the epoch progress bar: {e}")
+        EXTRACTION_STATS.record("progress_bar", epoch_minutes != -1, time.monotonic() - started_at)
+
+    if epoch_minutes == -1 or not dom_text.strip():
+        started_at = time.monotonic()
+        ocr_text = pytesseract.image_to_string(prepare_image_for_ocr(container.screenshot_as_png), config="--psm 6")
+        logger.info(f"OCR Result:\n---\n{ocr_text}\n---")
+        if bioauth_seconds == -1:
+            bioauth_seconds = parse_bioauth_seconds(ocr_text)
+        if epoch_minutes == -1:
+            epoch_minutes = parse_epoch_minutes(ocr_text)
+        EXTRACTION_STATS.record("ocr", bioauth_seconds != -1 or epoch_minutes != -1, time.monotonic() - started_at)
+
+    return bioauth_seconds, epoch_minutes
+
+def save_selenium_error_dump(driver: webdriver.Chrome):
+    try:
+        driver.save_screenshot("/root/selenium_error_ocr.png")
+        with open("/root/selenium_page_source_ocr.html", "w", encoding="utf-8") as f:
+            f.write(driver.page_source)
+    except Exception as dump_e:
+        logger.error(f"Failed to save screenshot or page source. Dump error: {dump_e}")
+
+def get_bioauth_and_epoch_times(driver: webdriver.Chrome, url: str, server_name: str = "default") -> tuple[int, int]:
     if not url:
         logger.warning("Skipping Selenium check for empty URL.")
         return -1, -1
@@ -474,8 +2050,10 @@ def get_bioauth_and_epoch_times(driver: webdriver.Chrome, url: str) -> tuple[int
     epoch_minutes = -1
 
     try:
-        wait = WebDriverWait(driver, 90)  # Total wait time of 90 seconds
-        logger.info(f"Selenium: Navigating to URL: {url}")
+        timeout = PAGE_LOAD_TIMES.timeout_for(server_name)
+        wait = WebDriverWait(driver, timeout)
+        logger.info(f"Selenium: Navigating to URL: {url} (timeout {timeout:.0f}s)")
+        started_at = time.monotonic()
         driver.get(url)
 
         # This is the most reliable way: wait for the dashboard button to be clickable.
@@ -487,175 +2065,474 @@ def get_bioauth_and_epoch_times(driver: webdriver.Chrome, url: str) -> tuple[int
 
         timers_container_xpath = "//div[contains(@class, 'MuiAccordionDetails-root')]//div[contains(@class, 'css-ak0d3g')]"
         timers_container = wait.until(EC.visibility_of_element_located((By.XPATH, timers_container_xpath)))
-        
-        # EXPERIMENT: Instead of waiting for a specific element, we use a fixed
-        # delay, just like in the working take_element_screenshot function.
-        # This will help determine if the problem is with the wait condition itself.
-        logger.info("Using fixed 10-second delay instead of smart wait.")
-        time.sleep(10)
-
-        screenshot_bytes = timers_container.screenshot_as_png
-        image = Image.open(io.BytesIO(screenshot_bytes))
-        ocr_text = pytesseract.image_to_string(image)
-        logger.info(f"OCR Result:\n---\n{ocr_text}\n---")
 
-        # More robust regex for HHH:MM:SS format
-        bioauth_match = re.search(r'(\d{1,3})\s*:\s*(\d{2})\s*:\s*(\d{2})', ocr_text)
-        if bioauth_match:
-            h, m, s = map(int, bioauth_match.groups())
-            bioauth_seconds = timedelta(hours=h, minutes=m, seconds=s).total_seconds()
-            logger.info(f"Parsed Bio-authentication time: {bioauth_seconds} seconds")
-
-        # Regex for epoch time
-        progress_match = re.search(r'Progress:\s*(\d+)\s*hr[s]?\s*(\d+)\s*min', ocr_text, re.IGNORECASE)
-        if progress_match:
-            total_duration = timedelta(hours=4)
-            progress_duration = timedelta(hours=int(progress_match.group(1)), minutes=int(progress_match.group(2)))
-            remaining_duration = total_duration - progress_duration
-            epoch_minutes = int(remaining_duration.total_seconds() / 60)
-            logger.info(f"Parsed Epoch time remaining via OCR: {epoch_minutes} minutes")
+        remaining_timeout = max(1.0, timeout - (time.monotonic() - started_at))
+        if wait_for_timers_ready(driver, timers_container, remaining_timeout):
+            load_seconds = time.monotonic() - started_at
+            PAGE_LOAD_TIMES.record(server_name, load_seconds)
+            logger.info(f"Timer data ready after {load_seconds:.1f}s.")
         else:
-            logger.warning("Could not parse Epoch time from OCR text. Checking for progress bar as a fallback.")
-            try:
-                epoch_progress_xpath = ".//p[contains(text(), 'Epoch')]/following-sibling::div//div[contains(@class, 'MuiLinearProgress-bar')]"
-                epoch_element = timers_container.find_element(By.XPATH, epoch_progress_xpath)
-                if epoch_element:
-                    style_attribute = epoch_element.get_attribute("style")
-                    epoch_minutes = parse_percentage_to_minutes(style_attribute)
-                    logger.info(f"Fallback to percentage succeeded. Minutes remaining: {epoch_minutes}")
-            except Exception as e:
-                logger.warning(f"Fallback to percentage also failed: {e}")
+            PAGE_LOAD_TIMES.forget(server_name)
 
-    except Exception as e:
+        bioauth_seconds, epoch_minutes = extract_timer_values(timers_container)
+        logger.info(f"Parsed timers: bioauth {bioauth_seconds}s, epoch {epoch_minutes} min. {EXTRACTION_STATS.summary()}")
+
+    except TimeoutException:
+        # The learned timeout was too short this time; the next attempt gets the full wait again.
+        PAGE_LOAD_TIMES.forget(server_name)
+        logger.error("Timed out waiting for the dashboard in get_bioauth_and_epoch_times.", exc_info=True)
+        save_selenium_error_dump(driver)
+        return -1, -1
+    except Exception:
         logger.error("An exception occurred in get_bioauth_and_epoch_times.", exc_info=True)
-        try:
-            driver.save_screenshot("/root/selenium_error_ocr.png")
-            with open("/root/selenium_page_source_ocr.html", "w", encoding="utf-8") as f:
-                f.write(driver.page_source)
-        except Exception as dump_e:
-            logger.error(f"Failed to save screenshot or page source. Dump error: {dump_e}")
+        save_selenium_error_dump(driver)
         return -1, -1
     
     return int(bioauth_seconds), int(epoch_minutes)
 
-async def periodic_bioauth_check(context: ContextTypes.DEFAULT_TYPE):
-    global IS_CHECK_RUNNING
-    if IS_CHECK_RUNNING:
-        logger.info("Skipping periodic check: a previous check is still in progress.")
-        return
+# --- Timer Sources ---
+class TimerSource(ABC):
+    """Reads (bioauth_seconds, epoch_minutes) for a server; -1 marks a value that is not available.
 
-    IS_CHECK_RUNNING = True
-    try:
-        logger.info("Running periodic bioauth check...")
-        state = load_state()
-        now_utc = datetime.now(timezone.utc)
-        settings = state["notification_settings"]
-        lang = state.get("user_settings", {}).get(str(AUTHORIZED_USER_ID), {}).get("language", "uk")
+    fetch() returns None when the source cannot be used at all, so the next source gets a try.
+    """
+    name = ""
+
+    @abstractmethod
+    async def fetch(self, server_config: dict, query=None, lang: str = "uk") -> tuple[int, int] | None:
+        ...
+
+class RpcTimerSource(TimerSource):
+    """Asks the node itself over JSON-RPC, through the same execute_command path as everything else."""
+    name = "rpc"
+
+    async def fetch(self, server_config: dict, query=None, lang: str = "uk") -> tuple[int, int] | None:
+        rpc_url = server_config.get("rpc_url", node_rpc.DEFAULT_RPC_URL)
+        payload = json.dumps(node_rpc.build_timer_request(), separators=(",", ":"))
+        cmd = f"curl -s -m 10 -H 'Content-Type: application/json' -d {shlex.quote(payload)} {shlex.quote(rpc_url)}"
+        returncode, stdout, stderr = await execute_command(server_config, cmd)
+        if returncode != 0 or not stdout.strip():
+            logger.warning(f"RPC timer request failed for {server_config['name']}: {stderr.strip() or 'empty response'}")
+            return None
+        try:
+            times = node_rpc.parse_timer_response(json.loads(stdout), time.time(), EPOCH_DURATION_MINUTES, BABE_SLOT_DURATION_SECONDS)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Could not parse RPC timer response for {server_config['name']}: {e}")
+            return None
+        logger.info(f"RPC timers for {server_config['name']}: bioauth {times[0]}s, epoch {times[1]} min")
+        return times
 
-        driver = create_selenium_driver()
-        if not driver:
-            logger.error("Failed to create Selenium driver for periodic check. Skipping this run.")
-            IS_CHECK_RUNNING = False # Make sure to reset the lock
+class AgentTimerSource(TimerSource):
+    """Uses the timers last pushed by the server's node agent, so no SSH session is needed at all."""
+    name = "agent"
+
+    async def fetch(self, server_config: dict, query=None, lang: str = "uk") -> tuple[int, int] | None:
+        agent_state = AGENT_HUB.snapshot(server_config)
+        timers = agent_state.get("timers") if agent_state else None
+        if not timers:
+            return None
+        now = time.time()
+        expires_at = timers["bioauth_expires_at"]
+        bioauth_seconds = int(expires_at - now) if expires_at and expires_at > now else -1
+        epoch_minutes = max(0, int((timers["epoch_end_at"] - now) / 60))
+        logger.info(f"Agent timers for {server_config['name']}: bioauth {bioauth_seconds}s, epoch {epoch_minutes} min")
+        return bioauth_seconds, epoch_minutes
+
+class SeleniumTimerSource(TimerSource):
+    """Scrapes the Humanode web app through the node's tunnel URL."""
+    name = "selenium"
+
+    async def fetch(self, server_config: dict, query=None, lang: str = "uk") -> tuple[int, int] | None:
+        url = await get_latest_url_from_logs(server_config, query, lang)
+        if not url:
+            return -1, -1
+
+        async with BROWSER_POOL.session() as driver:
+            if not driver:
+                logger.error(f"Failed to create Selenium driver for {server_config['name']}.")
+                return None
+            return await asyncio.to_thread(get_bioauth_and_epoch_times, driver, url, server_config['name'])
+
+TIMER_SOURCES = {source.name: source for source in (AgentTimerSource(), RpcTimerSource(), SeleniumTimerSource())}
+
+async def fetch_bioauth_times(server_config: dict, query=None, lang: str = "uk") -> tuple[int, int] | None:
+    """Tries the configured timer sources in order. Returns None only if none of them could run."""
+    result = None
+    for name in TIMER_SOURCE_NAMES:
+        source = TIMER_SOURCES.get(name)
+        if not source:
+            logger.warning(f"Unknown timer source '{name}' in config.")
+            continue
+        times = await source.fetch(server_config, query, lang)
+        if times is not None and times != (-1, -1):
+            return times
+        if times is not None:
+            result = times
+        logger.info(f"Timer source '{name}' returned no data for {server_config['name']}.")
+    return result
+
+# --- Deadline Prediction ---
+PREDICTION_TOLERANCE_SECONDS = 180
+PREDICTION_CHECK_LEAD_MINUTES = 2
+PREDICTION_MIN_CONFIDENCE = 0.5
+PREDICTION_HISTORY_DAYS = 30
+
+class DeadlinePredictor:
+    """Learns each node's bioauth deadline, bioauth period and epoch boundaries from its readings.
+
+    A reading either agrees with the predicted deadline, shows a renewal (the deadline moved
+    forward), or contradicts it (the deadline moved back). Agreement raises the confidence, anything else lowers it.
+    next_check_due() then asks for a confirming scrape only just before each warning and at
+    the predicted expiry, plus extra checks while confidence is low.
+    """
+
+    def learn_from_history(self, server_id: str, server_state: dict):
+        if server_state.get("bioauth_period_seconds"):
             return
+        since = datetime.now(timezone.utc) - timedelta(days=PREDICTION_HISTORY_DAYS)
+        # Each renewal moves the deadline forward by the time since the previous renewal, which is never
+        # shorter than the period, so the smallest jump is the closest estimate. Single readings are not
+        # used: the first one is usually taken part-way through a window.
+        jumps, last_deadline = [], None
+        for observed_at, bioauth, _ in STORAGE.get_observations(server_id, since):
+            if bioauth <= 0:
+                continue
+            deadline = observed_at + timedelta(seconds=bioauth)
+            if last_deadline and (deadline - last_deadline).total_seconds() > PREDICTION_TOLERANCE_SECONDS:
+                jumps.append(int((deadline - last_deadline).total_seconds()))
+            last_deadline = deadline
+        if jumps:
+            server_state["bioauth_period_seconds"] = min(jumps)
+
+    def observe(self, server_state: dict, observed_at: datetime, bioauth_seconds: int, epoch_minutes: int) -> str:
+        """Updates the model with one reading and returns "agree", "renewed", "contradicted" or "new"."""
+        if epoch_minutes >= 0:
+            server_state["epoch_end_utc"] = (observed_at + timedelta(minutes=epoch_minutes)).isoformat()
+        if bioauth_seconds <= 0:
+            server_state["prediction_confidence"] = 0.0
+            return "new"
+
+        confidence = server_state.get("prediction_confidence") or 0.0
+        period = server_state.get("bioauth_period_seconds")
+        implied_deadline = observed_at + timedelta(seconds=bioauth_seconds)
+        predicted_str = server_state.get("bioauth_deadline_utc")
+
+        if not predicted_str:
+            verdict, confidence = "new", 0.5
+        else:
+            drift = (implied_deadline - datetime.fromisoformat(predicted_str)).total_seconds()
+            if abs(drift) <= PREDICTION_TOLERANCE_SECONDS:
+                verdict, confidence = "agree", confidence + (1 - confidence) / 2
+            elif drift > 0:
+                verdict, confidence = "renewed", 0.5
+            else:
+                verdict, confidence = "contradicted", 0.25
 
-        try:
-            for server_id, server_config in SERVERS.items():
-                server_state = state["servers"][server_id]
-                data_retrieved_successfully = False
-
-                last_check_str = server_state.get("last_full_check_utc")
-                deadline_str = server_state.get("bioauth_deadline_utc")
-                
-                # Perform a full check if it's time, or if the last known deadline has already passed.
-                perform_full_check = (
-                    not last_check_str or
-                    (now_utc - datetime.fromisoformat(last_check_str) > timedelta(hours=FULL_CHECK_INTERVAL_HOURS)) or
-                    (deadline_str and datetime.fromisoformat(deadline_str) < now_utc)
-                )
+        if verdict != "contradicted":
+            server_state["bioauth_period_seconds"] = max(period or 0, bioauth_seconds)
+        server_state["prediction_confidence"] = round(confidence, 3)
+        return verdict
 
-                if perform_full_check:
-                    logger.info(f"Performing full bioauth check for {server_config['name']}.")
-                    url = await get_latest_url_from_logs(server_config, lang=lang)
-                    if url:
-                        bioauth_seconds, epoch_minutes = await asyncio.to_thread(get_bioauth_and_epoch_times, driver, url)
-                        
-                        if bioauth_seconds > 0:
-                            deadline = now_utc + timedelta(seconds=bioauth_seconds)
-                            server_state.update({
-                                "bioauth_deadline_utc": deadline.isoformat(), "last_full_check_utc": now_utc.isoformat(),
-                                "notified_first": False, "notified_second": False, "is_in_alert_mode": False,
-                                "is_in_failure_alert_mode": False
-                            })
-                            data_retrieved_successfully = True
-                            logger.info(f"Successfully retrieved bioauth time for {server_config['name']}: {bioauth_seconds}s")
-                        elif bioauth_seconds == -1 and epoch_minutes > -1:
-                            data_retrieved_successfully = True
-                            server_state.update({
-                                "bioauth_deadline_utc": None, "last_full_check_utc": now_utc.isoformat(),
-                                "is_in_failure_alert_mode": False
-                            })
-                            logger.info(f"Successfully checked {server_config['name']}. Bioauth time not present (normal). Epoch minutes: {epoch_minutes}")
-
-                    if data_retrieved_successfully and server_state.get("is_in_failure_alert_mode"):
-                        server_state["is_in_failure_alert_mode"] = False
-                        await context.bot.send_message(AUTHORIZED_USER_ID, get_text("msg_info_data_retrieval_restored", lang, server_name=server_config['name']), parse_mode=ParseMode.HTML)
-
-                    if not data_retrieved_successfully:
-                        # CRITICAL FIX: Clear the stale deadline to prevent false overdue alerts.
-                        server_state["bioauth_deadline_utc"] = None
-                        
-                        if not server_state.get("is_in_failure_alert_mode"):
-                            server_state["is_in_failure_alert_mode"] = True
-                            server_state["last_failure_alert_utc"] = now_utc.isoformat()
-                            await context.bot.send_message(AUTHORIZED_USER_ID, get_text("msg_critical_data_failure", lang, server_name=server_config['name']), parse_mode=ParseMode.HTML)
-                        else:
-                            last_alert_str = server_state.get("last_failure_alert_utc")
-                            if not last_alert_str or (now_utc - datetime.fromisoformat(last_alert_str) > timedelta(minutes=settings.get("alert_interval_minutes", 5) * 2)):
-                                server_state["last_failure_alert_utc"] = now_utc.isoformat()
-                                await context.bot.send_message(AUTHORIZED_USER_ID, get_text("msg_critical_data_failure_repeat", lang, server_name=server_config['name']), parse_mode=ParseMode.HTML)
-
-                deadline_str = server_state.get("bioauth_deadline_utc")
-                if not deadline_str: continue
-
-                deadline = datetime.fromisoformat(deadline_str)
-                time_left = deadline - now_utc
-
-                if time_left.total_seconds() < 0:
-                    if not server_state.get("is_in_alert_mode"):
-                        server_state["is_in_alert_mode"] = True
-                        server_state["last_alert_utc"] = now_utc.isoformat()
-                        await context.bot.send_message(AUTHORIZED_USER_ID, get_text("msg_alert_bioauth_overdue", lang, server_name=server_config['name']), parse_mode=ParseMode.HTML)
-                    else:
-                        last_alert_str = server_state.get("last_alert_utc")
-                        if not last_alert_str or (now_utc - datetime.fromisoformat(last_alert_str) > timedelta(minutes=settings.get("alert_interval_minutes", 5))):
-                            server_state["last_alert_utc"] = now_utc.isoformat()
-                            await context.bot.send_message(AUTHORIZED_USER_ID, get_text("msg_alert_bioauth_overdue_repeat", lang, server_name=server_config['name']), parse_mode=ParseMode.HTML)
-
-                elif time_left < timedelta(minutes=settings["second_warning_minutes"]) and not server_state.get("notified_second"):
-                    await context.bot.send_message(AUTHORIZED_USER_ID, get_text("msg_warning_bioauth_soon_second", lang, server_name=server_config['name'], minutes=settings['second_warning_minutes']), parse_mode=ParseMode.HTML)
-                    server_state["notified_second"] = True
-                elif time_left < timedelta(minutes=settings["first_warning_minutes"]) and not server_state.get("notified_first"):
-                    await context.bot.send_message(AUTHORIZED_USER_ID, get_text("msg_warning_bioauth_soon_first", lang, server_name=server_config['name'], minutes=settings['first_warning_minutes']), parse_mode=ParseMode.HTML)
-                    server_state["notified_first"] = True
-        finally:
-            if driver:
-                driver.quit()
-            
-        save_state(state)
-    finally:
-        IS_CHECK_RUNNING = False
-        logger.info("Periodic check finished.")
+    def predicted_epoch_minutes_left(self, server_state: dict, now_utc: datetime) -> int | None:
+        epoch_end_str = server_state.get("epoch_end_utc")
+        if not epoch_end_str:
+            return None
+        epoch_end = datetime.fromisoformat(epoch_end_str)
+        epoch_length = timedelta(minutes=EPOCH_DURATION_MINUTES)
+        while epoch_end < now_utc:
+            epoch_end += epoch_length
+        return int((epoch_end - now_utc).total_seconds() // 60)
+
+    def next_check_due(self, server_state: dict, settings: dict, now_utc: datetime, succeeded: bool) -> datetime:
+        latest = now_utc + timedelta(hours=FULL_CHECK_INTERVAL_HOURS)
+        if not succeeded:
+            return now_utc + timedelta(minutes=settings.get("alert_interval_minutes", 5) * 2)
+
+        deadline_str = server_state.get("bioauth_deadline_utc")
+        if not deadline_str:
+            return latest
+        deadline = datetime.fromisoformat(deadline_str)
+        if deadline <= now_utc:
+            return now_utc + timedelta(minutes=settings.get("alert_interval_minutes", 5))
+
+        lead = timedelta(minutes=PREDICTION_CHECK_LEAD_MINUTES)
+        confirm_points = [
+            deadline - timedelta(minutes=settings["first_warning_minutes"]) - lead,
+            deadline - timedelta(minutes=settings["second_warning_minutes"]) - lead,
+            deadline,
+        ]
+        # A point within `lead` of now counts as confirmed by the check that just ran.
+        due = min([point for point in confirm_points if point > now_utc + lead] + [latest])
+        if (server_state.get("prediction_confidence") or 0.0) < PREDICTION_MIN_CONFIDENCE:
+            due = min(due, now_utc + max(timedelta(hours=1), (deadline - now_utc) / 2))
+        return due
+
+PREDICTOR = DeadlinePredictor()
+
+async def check_server_bioauth(context: ContextTypes.DEFAULT_TYPE, server_id: str, server_config: dict, server_state: dict, settings: dict, lang: str,
+                               allow_full_check: bool = True):
+    """Runs the full check for one server if it is due, then sends its deadline notifications.
+
+    With allow_full_check=False only the notifications for the stored deadline are sent.
+    """
+    now_utc = datetime.now(timezone.utc)
+    next_check_str = server_state.get("next_check_utc")
 
-@translated_action
+    # The predictor decides when the next scrape is worth doing; see DeadlinePredictor.
+    perform_full_check = allow_full_check and (not next_check_str or datetime.fromisoformat(next_check_str) <= now_utc)
+
+    if perform_full_check:
+        logger.info(f"Performing full bioauth check for {server_config['name']}.")
+        PREDICTOR.learn_from_history(server_id, server_state)
+        try:
+            async with EXECUTOR.slot(WorkExecutor.BACKGROUND):
+                times = await asyncio.wait_for(fetch_bioauth_times(server_config, lang=lang), timeout=PERIODIC_CHECK_SERVER_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.error(f"Full bioauth check for {server_config['name']} timed out after {PERIODIC_CHECK_SERVER_TIMEOUT_SECONDS}s.")
+            times = (-1, -1)
+
+        if times is not None:
+            bioauth_seconds, epoch_minutes = times
+            data_retrieved_successfully = False
+            now_utc = datetime.now(timezone.utc)
+            verdict = None
+            if times != (-1, -1):
+                STORAGE.record_observation(server_id, now_utc, bioauth_seconds, epoch_minutes)
+                verdict = PREDICTOR.observe(server_state, now_utc, bioauth_seconds, epoch_minutes)
+
+            if bioauth_seconds > 0:
+                deadline = now_utc + timedelta(seconds=bioauth_seconds)
+                server_state.update({
+                    "bioauth_deadline_utc": deadline.isoformat(), "last_full_check_utc": now_utc.isoformat(),
+                    "is_in_alert_mode": False, "is_in_failure_alert_mode": False
+                })
+                # A confirming scrape must not re-arm warnings that were already sent for the same deadline.
+                if verdict != "agree":
+                    server_state.update({"notified_first": False, "notified_second": False})
+                data_retrieved_successfully = True
+                logger.info(f"Successfully retrieved bioauth time for {server_config['name']}: {bioauth_seconds}s ({verdict}, confidence {server_state['prediction_confidence']:.2f})")
+            elif bioauth_seconds == -1 and epoch_minutes > -1:
+                data_retrieved_successfully = True
+                server_state.update({
+                    "bioauth_deadline_utc": None, "last_full_check_utc": now_utc.isoformat(),
+                    "is_in_failure_alert_mode": False
+                })
+                logger.info(f"Successfully checked {server_config['name']}. Bioauth time not present (normal). Epoch minutes: {epoch_minutes}")
+
+            if data_retrieved_successfully and server_state.get("is_in_failure_alert_mode"):
+                server_state["is_in_failure_alert_mode"] = False
+                await context.bot.send_message(AUTHORIZED_USER_ID, get_text("msg_info_data_retrieval_restored", lang, server_name=server_config['name']), parse_mode=ParseMode.HTML)
+
+            if not data_retrieved_successfully:
+                # CRITICAL FIX: Clear the stale deadline to prevent false overdue alerts.
+                server_state["bioauth_deadline_utc"] = None
+
+                if not server_state.get("is_in_failure_alert_mode"):
+                    server_state["is_in_failure_alert_mode"] = True
+                    server_state["last_failure_alert_utc"] = now_utc.isoformat()
+                    await context.bot.send_message(AUTHORIZED_USER_ID, get_text("msg_critical_data_failure", lang, server_name=server_config['name']), parse_mode=ParseMode.HTML)
+                else:
+                    last_alert_str = server_state.get("last_failure_alert_utc")
+                    if not last_alert_str or (now_utc - datetime.fromisoformat(last_alert_str) > timedelta(minutes=settings.get("alert_interval_minutes", 5) * 2)):
+                        server_state["last_failure_alert_utc"] = now_utc.isoformat()
+                        await context.bot.send_message(AUTHORIZED_USER_ID, get_text("msg_critical_data_failure_repeat", lang, server_name=server_config['name']), parse_mode=ParseMode.HTML)
+
+            next_check = PREDICTOR.next_check_due(server_state, settings, now_utc, data_retrieved_successfully)
+            server_state["next_check_utc"] = next_check.isoformat()
+            logger.info(f"Next full check for {server_config['name']} at {next_check.isoformat()}.")
+
+    deadline_str = server_state.get("bioauth_deadline_utc")
+    if not deadline_str:
+        return
+
+    deadline = datetime.fromisoformat(deadline_str)
+    time_left = deadline - now_utc
+
+    if time_left.total_seconds() < 0:
+        if not server_state.get("is_in_alert_mode"):
+            server_state["is_in_alert_mode"] = True
+            server_state["last_alert_utc"] = now_utc.isoformat()
+            await context.bot.send_message(AUTHORIZED_USER_ID, get_text("msg_alert_bioauth_overdue", lang, server_name=server_config['name']), parse_mode=ParseMode.HTML)
+        else:
+            last_alert_str = server_state.get("last_alert_utc")
+            if not last_alert_str or (now_utc - datetime.fromisoformat(last_alert_str) > timedelta(minutes=settings.get("alert_interval_minutes", 5))):
+                server_state["last_alert_utc"] = now_utc.isoformat()
+                await context.bot.send_message(AUTHORIZED_USER_ID, get_text("msg_alert_bioauth_overdue_repeat", lang, server_name=server_config['name']), parse_mode=ParseMode.HTML)
+
+    elif time_left < timedelta(minutes=settings["second_warning_minutes"]) and not server_state.get("notified_second"):
+        await context.bot.send_message(AUTHORIZED_USER_ID, get_text("msg_warning_bioauth_soon_second", lang, server_name=server_config['name'], minutes=settings['second_warning_minutes']), parse_mode=ParseMode.HTML)
+        server_state["notified_second"] = True
+    elif time_left < timedelta(minutes=settings["first_warning_minutes"]) and not server_state.get("notified_first"):
+        await context.bot.send_message(AUTHORIZED_USER_ID, get_text("msg_warning_bioauth_soon_first", lang, server_name=server_config['name'], minutes=settings['first_warning_minutes']), parse_mode=ParseMode.HTML)
+        server_state["notified_first"] = True
+
+async def periodic_bioauth_check(context: ContextTypes.DEFAULT_TYPE):
+    """Runs the checks that are due now; armed by CHECK_SCHEDULER for the earliest due time.
+
+    Other servers' due times don't wait for this run: pop_due has already armed the next one.
+    """
+    CHECK_SCHEDULER.job_started(context.job)
+    due_server_ids = []
+    try:
+        due_server_ids = CHECK_SCHEDULER.pop_due(datetime.now(timezone.utc))
+        logger.info(f"Running periodic bioauth check for {len(due_server_ids)} due server(s)...")
+        state = load_state()
+        settings = state["notification_settings"]
+        lang = state.get("user_settings", {}).get(str(AUTHORIZED_USER_ID), {}).get("language", "uk")
+
+        async def run_for_server(server_id: str, server_config: dict):
+            # Each task works on its own copy, which is merged back even if the task fails
+            # half-way, so one server's error never touches another server's state.
+            server_state = dict(state["servers"][server_id])
+            try:
+                server_lock = EXECUTOR.server_lock(server_id)
+                if server_lock.locked():
+                    # A restore, update or restart is running. The scrape waits for a retry, but warnings and
+                    # overdue alerts for the stored deadline still go out on time.
+                    logger.info(f"Not scraping {server_config['name']}: another operation is running on it.")
+                    await check_server_bioauth(context, server_id, server_config, server_state, settings, lang, allow_full_check=False)
+                else:
+                    async with server_lock:
+                        await check_server_bioauth(context, server_id, server_config, server_state, settings, lang)
+            except Exception as e:
+                logger.error(f"Periodic check failed for {server_config['name']}: {e}", exc_info=True)
+            finally:
+                async with STATE_STORE.lock:
+                    state["servers"][server_id] = server_state
+                CHECK_SCHEDULER.check_finished(server_id)
+
+        await asyncio.gather(*(run_for_server(server_id, SERVERS[server_id]) for server_id in due_server_ids))
+        save_state(state)
+    finally:
+        # Servers whose task never ran are handed back too; check_finished ignores the ones already done.
+        for server_id in due_server_ids:
+            CHECK_SCHEDULER.check_finished(server_id)
+        logger.info("Periodic check finished.")
+
+# --- Check Scheduler ---
+CHECK_RETRY_MINUTES = 5
+
+def next_check_instant(server_state: dict, settings: dict, now_utc: datetime) -> datetime:
+    """Returns when check_server_bioauth next has something to do for a server.
+
+    That is the earliest of its next full check, the warnings not yet sent for its deadline, the deadline
+    itself and, once overdue, the next repeat of the overdue alert.
+    """
+    next_check_str = server_state.get("next_check_utc")
+    candidates = [datetime.fromisoformat(next_check_str) if next_check_str else now_utc]
+    deadline_str = server_state.get("bioauth_deadline_utc")
+    if deadline_str:
+        deadline = datetime.fromisoformat(deadline_str)
+        if deadline > now_utc:
+            candidates.append(deadline)
+            if not server_state.get("notified_first"):
+                candidates.append(deadline - timedelta(minutes=settings["first_warning_minutes"]))
+            if not server_state.get("notified_second"):
+                candidates.append(deadline - timedelta(minutes=settings["second_warning_minutes"]))
+        elif not server_state.get("is_in_alert_mode"):
+            candidates.append(now_utc)
+        else:
+            last_alert_str = server_state.get("last_alert_utc")
+            interval = timedelta(minutes=settings.get("alert_interval_minutes", 5))
+            candidates.append(datetime.fromisoformat(last_alert_str) + interval if last_alert_str else now_utc)
+    return min(candidates)
+
+class CheckScheduler:
+    """Wakes the periodic check exactly when a server is due instead of polling every few minutes.
+
+    Due times sit in a heap of (instant, server_id). A single run_once job is armed for the earliest one,
+    so nothing runs between due times. Entries are replaced rather than removed: an entry whose instant no
+    longer matches self._due is stale and skipped. A server being checked has no entry until its check
+    finishes, which is what schedules it again, so two runs never check the same server at once.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[datetime, str]] = []
+        self._due: dict[str, datetime] = {}
+        self._running: set[str] = set()
+        self._job_queue = None
+        self._job = None
+
+    def start(self, job_queue):
+        self._job_queue = job_queue
+        self.reschedule_all()
+
+    def reschedule_all(self):
+        """Recomputes every server's due time from the saved state, e.g. after settings or servers change."""
+        if self._job_queue is None:
+            return
+        state = load_state()
+        now_utc = datetime.now(timezone.utc)
+        self._heap, self._due = [], {}
+        for server_id in SERVERS:
+            if server_id not in self._running:
+                self._due[server_id] = self._next_instant(state, server_id, now_utc, retry=False)
+                self._heap.append((self._due[server_id], server_id))
+        heapq.heapify(self._heap)
+        self._arm()
+
+    def check_finished(self, server_id: str):
+        """Schedules a server again once its check is done, retrying later if it is still due."""
+        if server_id not in self._running:
+            return
+        self._running.discard(server_id)
+        if self._job_queue is None or server_id not in SERVERS:
+            return
+        instant = self._next_instant(load_state(), server_id, datetime.now(timezone.utc), retry=True)
+        self._due[server_id] = instant
+        heapq.heappush(self._heap, (instant, server_id))
+        self._arm()
+
+    @staticmethod
+    def _next_instant(state: dict, server_id: str, now_utc: datetime, retry: bool) -> datetime:
+        instant = next_check_instant(state["servers"].get(server_id, {}), state["notification_settings"], now_utc)
+        if retry and instant <= now_utc:
+            # The check could not run or move the due time forward.
+            instant = now_utc + timedelta(minutes=CHECK_RETRY_MINUTES)
+        return instant
+
+    def job_started(self, job):
+        # A run_once job is gone once it fires, so it must not be removed again when re-arming.
+        if job is self._job:
+            self._job = None
+
+    def pop_due(self, now_utc: datetime) -> list[str]:
+        """Returns the servers due by now_utc, marks them running and arms the job for the next due time."""
+        due = []
+        while self._heap and self._heap[0][0] <= now_utc:
+            instant, server_id = heapq.heappop(self._heap)
+            if self._due.get(server_id) == instant and server_id in SERVERS:
+                del self._due[server_id]
+                due.append(server_id)
+        self._running.update(due)
+        self._arm()
+        return due
+
+    def _arm(self):
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        if self._job:
+            self._job.schedule_removal()
+            self._job = None
+        if not self._heap:
+            return
+        instant, server_id = self._heap[0]
+        logger.info(f"Next periodic check at {instant.isoformat()} ({SERVERS[server_id]['name']}).")
+        self._job = self._job_queue.run_once(periodic_bioauth_check, when=max(instant, datetime.now(timezone.utc)), name="periodic_bioauth_check")
+
+CHECK_SCHEDULER = CheckScheduler()
+
+@translated_action
 async def set_language(update: Update, context: ContextTypes.DEFAULT_TYPE, lang: str):
     query = update.callback_query
     await query.answer()
     new_lang = query.data.replace("set_lang_", "")
     
-    state = load_state()
-    user_id = str(update.effective_user.id)
-    state["user_settings"][user_id]["language"] = new_lang
-    save_state(state)
+    async with STATE_STORE.lock:
+        state = load_state()
+        user_id = str(update.effective_user.id)
+        state["user_settings"].setdefault(user_id, {})["language"] = new_lang
+        save_state(state)
     context.user_data['lang'] = new_lang
     
     await menu(update, context)
@@ -684,9 +2561,11 @@ async def update_setting_value(update: Update, context: ContextTypes.DEFAULT_TYP
         if new_value <= 0:
             await update.message.reply_text(get_text("msg_error_value_must_be_positive", lang))
             return EDIT_SETTING_STATE
-        state = load_state()
-        state["notification_settings"][setting_key] = new_value
-        save_state(state)
+        async with STATE_STORE.lock:
+            state = load_state()
+            state["notification_settings"][setting_key] = new_value
+            save_state(state)
+        CHECK_SCHEDULER.reschedule_all()
         await update.message.reply_text(get_text("msg_success_settings_updated", lang))
         del context.user_data['setting_to_edit']
         await menu(update, context)
@@ -720,6 +2599,7 @@ async def handle_generic_action(update: Update, context: ContextTypes.DEFAULT_TY
         "action_status_tunnel": lambda u, c, l, s: tunnel_service_action(u, c, l, s, 'status'),
         "action_get_node_version": get_node_version_action,
         "action_update_node": update_node_action,
+        "action_rollback_node": rollback_node_action,
         "action_create_backup_local": create_local_backup_action,
         "action_element_screenshot": get_element_screenshot_action,
         "action_restore_local_confirm": lambda u, c, l, s: confirm_restore_action(u, c, l, s, 'local'),
@@ -735,7 +2615,7 @@ async def handle_generic_action(update: Update, context: ContextTypes.DEFAULT_TY
             try:
                 server_id = data[len(prefix) + 1:]
                 if server_id in SERVERS:
-                    await handler(update, context, lang, server_id)
+                    await run_server_action(update, context, lang, prefix, handler, server_id)
                     return
             except Exception as e:
                 logger.error(f"Error handling action '{data}': {e}", exc_info=True)
@@ -745,6 +2625,32 @@ async def handle_generic_action(update: Update, context: ContextTypes.DEFAULT_TY
 
     logger.warning(f"Unhandled generic action: {data}")
 
+# Actions that change a server hold its lock; other actions that talk to the server only need a worker slot.
+# Reading the link, the timers or a screenshot restarts an inactive tunnel, so they hold the server's lock too.
+EXCLUSIVE_ACTIONS = {
+    "action_start_node", "action_stop_node", "action_restart_node",
+    "action_start_tunnel", "action_stop_tunnel", "action_restart_tunnel",
+    "action_update_node", "action_rollback_node", "action_create_backup_local",
+    "action_restore_local_execute", "action_restore_github_execute",
+    "action_get_link", "action_get_bioauth_timer", "action_element_screenshot",
+}
+SERVER_ACTIONS = {
+    "action_view_log", "action_status_node", "action_status_tunnel", "action_get_node_version",
+}
+
+async def run_server_action(update, context, lang: str, action: str, handler, server_id: str):
+    """Runs a per-server action through EXECUTOR; menus and confirmations run directly."""
+    if action in EXCLUSIVE_ACTIONS:
+        if EXECUTOR.is_busy(server_id):
+            await update.callback_query.edit_message_text(get_text("msg_server_busy_queued", lang, server_name=SERVERS[server_id]['name']))
+        async with EXECUTOR.exclusive(server_id):
+            await handler(update, context, lang, server_id)
+    elif action in SERVER_ACTIONS:
+        async with EXECUTOR.slot():
+            await handler(update, context, lang, server_id)
+    else:
+        await handler(update, context, lang, server_id)
+
 async def get_link_action(update, context, lang, server_id):
     server_name = SERVERS[server_id]['name']
     await update.callback_query.edit_message_text(get_text("msg_getting_url", lang, server_name=server_name))
@@ -756,66 +2662,360 @@ async def get_bioauth_timer_action(update, context, lang, server_id):
     query = update.callback_query
     server_name = SERVERS[server_id]['name']
     
-    await query.edit_message_text(get_text("msg_getting_url", lang, server_name=server_name))
-    url = await get_latest_url_from_logs(SERVERS[server_id], query, lang)
-    if not url:
-        await query.edit_message_text(get_text("msg_failed_to_get_url", lang))
-        return
-
-    driver = create_selenium_driver()
-    if not driver:
+    await query.edit_message_text(get_text("msg_checking_timer", lang, server_name=server_name))
+    times = await fetch_bioauth_times(SERVERS[server_id], query, lang)
+    if times is None:
         await query.edit_message_text(get_text("msg_error_selenium_not_initialized", lang))
         return
+    bioauth_seconds, epoch_minutes = times
+    if times != (-1, -1):
+        STORAGE.record_observation(server_id, datetime.now(timezone.utc), bioauth_seconds, epoch_minutes)
+
+    server_state = load_state()["servers"].get(server_id, {})
+    # Epochs have a fixed length, so a boundary learned from an earlier reading still answers when this one failed.
+    predicted_epoch_minutes = PREDICTOR.predicted_epoch_minutes_left(server_state, datetime.now(timezone.utc)) if epoch_minutes == -1 else None
+
+    bioauth_text = get_text("msg_bioauth_time_left", lang, time=format_seconds_to_hhmmss(bioauth_seconds)) if bioauth_seconds != -1 else get_text("msg_failed_to_get_bioauth_time", lang)
+    if epoch_minutes != -1:
+        epoch_text = get_text("msg_epoch_time_left", lang, minutes=epoch_minutes)
+    elif predicted_epoch_minutes is not None:
+        epoch_text = get_text("msg_epoch_time_left_predicted", lang, minutes=predicted_epoch_minutes)
+    else:
+        epoch_text = get_text("msg_failed_to_get_epoch_time", lang)
+    text = f"{bioauth_text}\n{epoch_text}"
 
-    try:
-        bioauth_seconds, epoch_minutes = await asyncio.to_thread(get_bioauth_and_epoch_times, driver, url)
-
-        bioauth_text = get_text("msg_bioauth_time_left", lang, time=format_seconds_to_hhmmss(bioauth_seconds)) if bioauth_seconds != -1 else get_text("msg_failed_to_get_bioauth_time", lang)
-        epoch_text = get_text("msg_epoch_time_left", lang, minutes=epoch_minutes) if epoch_minutes != -1 else get_text("msg_failed_to_get_epoch_time", lang)
+    if server_state.get("next_check_utc"):
+        next_check = datetime.fromisoformat(server_state["next_check_utc"]).strftime("%Y-%m-%d %H:%M")
+        text += "\n" + get_text("msg_prediction_info", lang, time=next_check, confidence=int((server_state.get("prediction_confidence") or 0) * 100))
 
-        await query.edit_message_text(f"{bioauth_text}\n{epoch_text}")
-    finally:
-        if driver:
-            driver.quit()
+    await query.edit_message_text(text)
 
 async def view_log_action(update, context, lang, server_id):
     server_name = SERVERS[server_id]['name']
     await update.callback_query.edit_message_text(get_text("msg_getting_log", lang, server_name=server_name))
-    log_cmd = "sudo journalctl -u humanode-peer.service -n 20 --no-pager"
-    returncode, stdout, stderr = await execute_command(SERVERS[server_id], log_cmd)
-    text = get_text("msg_log_contents", lang, log=remove_emoji(stdout.strip())) if returncode == 0 and stdout.strip() else get_text("msg_failed_to_read_log", lang, error=stderr)
+    document, error = await probe_server(SERVERS[server_id], ("journal",))
+    log = "\n".join(document["journal"]).strip() if document else ""
+    text = get_text("msg_log_contents", lang, log=html.escape(remove_emoji(log))) if log else get_text("msg_failed_to_read_log", lang, error=error)
     await update.callback_query.edit_message_text(text, parse_mode=ParseMode.HTML)
 
+def format_node_status(document: dict) -> str:
+    lines = [node_probe.format_unit_state(document, "node")]
+    if document.get("version"):
+        lines.append(document["version"])
+    lines.append(format_probe_disk(document))
+    return "\n".join(lines)
+
 async def node_service_action(update, context, lang, server_id, action):
     server_name = SERVERS[server_id]['name']
     await update.callback_query.edit_message_text(get_text("msg_executing_command", lang, action=action, server_name=server_name))
-    cmd = f"sudo systemctl {action} humanode-peer.service"
-    returncode, stdout, stderr = await execute_command(SERVERS[server_id], cmd)
     if action == 'status':
-        text = get_text("msg_status_info", lang, service="Node", status=stdout.strip()) if returncode == 0 else get_text("msg_command_failed", lang, error=stderr)
+        document, error = await probe_server(SERVERS[server_id], ("version", "disk"))
+        text = get_text("msg_status_info", lang, service="Node", status=html.escape(format_node_status(document))) if document else get_text("msg_command_failed", lang, error=command_error_excerpt(error))
     else:
-        text = get_text("msg_command_success", lang, action=action) if returncode == 0 else get_text("msg_command_failed", lang, error=stderr)
+        returncode, stdout, stderr = await execute_command(SERVERS[server_id], f"sudo systemctl {action} {NODE_SERVICE}")
+        invalidate_probe(SERVERS[server_id])
+        text = get_text("msg_command_success", lang, action=action) if returncode == 0 else get_text("msg_command_failed", lang, error=command_error_excerpt(stderr))
     await update.callback_query.edit_message_text(text, parse_mode=ParseMode.HTML)
 
 async def tunnel_service_action(update, context, lang, server_id, action):
     server_name = SERVERS[server_id]['name']
     await update.callback_query.edit_message_text(get_text("msg_executing_command", lang, action=action, server_name=server_name))
-    cmd = f"sudo systemctl {action} humanode-websocket-tunnel.service"
-    returncode, stdout, stderr = await execute_command(SERVERS[server_id], cmd)
     if action == 'status':
-        text = get_text("msg_status_info", lang, service="Tunnel", status=stdout.strip()) if returncode == 0 else get_text("msg_command_failed", lang, error=stderr)
+        document, error = await probe_server(SERVERS[server_id])
+        text = get_text("msg_status_info", lang, service="Tunnel", status=html.escape(node_probe.format_unit_state(document, "tunnel"))) if document else get_text("msg_command_failed", lang, error=command_error_excerpt(error))
     else:
-        text = get_text("msg_command_success", lang, action=action) if returncode == 0 else get_text("msg_command_failed", lang, error=stderr)
+        returncode, stdout, stderr = await execute_command(SERVERS[server_id], f"sudo systemctl {action} {TUNNEL_SERVICE}")
+        invalidate_probe(SERVERS[server_id])
+        text = get_text("msg_command_success", lang, action=action) if returncode == 0 else get_text("msg_command_failed", lang, error=command_error_excerpt(stderr))
     await update.callback_query.edit_message_text(text, parse_mode=ParseMode.HTML)
 
 async def get_node_version_action(update, context, lang, server_id):
     server_name = SERVERS[server_id]['name']
     await update.callback_query.edit_message_text(get_text("msg_getting_node_version", lang, server_name=server_name))
-    version_cmd = "/root/.humanode/workspaces/default/humanode-peer -V"
-    returncode, stdout, stderr = await execute_command(SERVERS[server_id], version_cmd)
-    text = get_text("msg_node_version", lang, version=stdout.strip()) if returncode == 0 and stdout.strip() else get_text("msg_failed_to_get_version", lang, error=stderr)
+    document, error = await probe_server(SERVERS[server_id], ("version",))
+    if document and document.get("version"):
+        text = get_text("msg_node_version", lang, version=html.escape(document["version"]))
+    else:
+        text = get_text("msg_failed_to_get_version", lang, error=command_error_excerpt(error or "-V failed"))
     await update.callback_query.edit_message_text(text, parse_mode=ParseMode.HTML)
 
+# --- Fleet Actions ---
+class FleetOperation:
+    """One action that can be run on every server at once, summarised as a single line per server.
+
+    Read-only operations set `probe` instead of `command`: a function that turns the server's probe
+    document into (icon, text), so they share the cached probe rather than each running their own command.
+    """
+
+    def __init__(self, command=None, probe=None, parts: tuple[str, ...] = (), confirm: bool = False):
+        self.command = command
+        self.probe = probe
+        # The optional probe parts (see probe_server) that `probe` reads.
+        self.parts = parts
+        self.confirm = confirm
+
+def unit_result(document: dict, unit: str) -> tuple[str, str]:
+    return ("✅" if node_probe.unit_is_active(document, unit) else "⚪"), node_probe.format_unit_state(document, unit)
+
+def overview_result(document: dict) -> tuple[str, str]:
+    node_active, tunnel_active = node_probe.unit_is_active(document, "node"), node_probe.unit_is_active(document, "tunnel")
+    units = document["units"]
+    text = " · ".join([
+        f"node {units['node'].get('ActiveState', '?')}",
+        f"tunnel {units['tunnel'].get('ActiveState', '?')}",
+        document.get("version") or "version ?",
+        format_probe_disk(document),
+    ])
+    return ("✅" if node_active and tunnel_active else "⚠️"), text
+
+FLEET_OPERATIONS = {
+    "overview": FleetOperation(probe=overview_result, parts=("version", "disk")),
+    "node_status": FleetOperation(probe=lambda document: unit_result(document, "node")),
+    "node_version": FleetOperation(probe=lambda document: ("✅", document["version"]) if document.get("version") else ("❌", "-V failed"), parts=("version",)),
+    "node_log": FleetOperation(probe=lambda document: ("✅", document["journal"][-1] if document["journal"] else ""), parts=("journal",)),
+    "node_start": FleetOperation(lambda server: f"sudo systemctl start {NODE_SERVICE}", confirm=True),
+    "node_stop": FleetOperation(lambda server: f"sudo systemctl stop {NODE_SERVICE}", confirm=True),
+    "node_restart": FleetOperation(lambda server: f"sudo systemctl restart {NODE_SERVICE}", confirm=True),
+    "tunnel_status": FleetOperation(probe=lambda document: unit_result(document, "tunnel")),
+    "tunnel_restart": FleetOperation(lambda server: f"sudo systemctl restart {TUNNEL_SERVICE}", confirm=True),
+}
+FLEET_RESULT_MAX_CHARS = 150
+
+async def fleet_menu(query, lang: str):
+    keyboard = [[InlineKeyboardButton(get_text(f"btn_fleet_{name}", lang), callback_data=f"fleet_{'confirm' if operation.confirm else 'run'}:{name}")]
+                for name, operation in FLEET_OPERATIONS.items()]
+    keyboard.append([InlineKeyboardButton(get_text("btn_back", lang), callback_data="main_menu")])
+    await query.edit_message_text(get_text("lbl_fleet_title", lang, count=len(SERVERS)), reply_markup=InlineKeyboardMarkup(keyboard))
+
+def format_fleet_result(icon: str, server_config: dict, output: str) -> str:
+    """One summary line per server: the last line of the output, shortened and HTML-escaped."""
+    lines = output.strip().splitlines()
+    text = lines[-1].strip() if lines else ""
+    if len(text) > FLEET_RESULT_MAX_CHARS:
+        text = text[:FLEET_RESULT_MAX_CHARS] + "..."
+    return f"{icon} <b>{html.escape(server_config['name'])}</b>: {html.escape(text)}"
+
+async def run_fleet_operation(query, lang: str, name: str):
+    """Runs an operation on every server, FLEET_CONCURRENCY at a time, and keeps one summary message up to date.
+
+    Each server gets FLEET_HOST_TIMEOUT_SECONDS; a slow or unreachable host only delays its own line.
+    """
+    operation = FLEET_OPERATIONS[name]
+    servers = list(SERVERS.items())
+    progress = ProgressReporter(query, lang)
+    results: dict[str, str] = {}
+    failed: set[str] = set()
+    semaphore = asyncio.Semaphore(FLEET_CONCURRENCY)
+    started_at = time.monotonic()
+    title = get_text("lbl_fleet_results_title", lang, operation=get_text(f"btn_fleet_{name}", lang))
+
+    def render() -> str:
+        lines = [results.get(server_id, f"⏳ <b>{html.escape(server_config['name'])}</b>") for server_id, server_config in servers]
+        return "\n".join([title, ""] + lines)
+
+    async def probe_on(server_config: dict):
+        async with EXECUTOR.slot():
+            return await probe_server(server_config, operation.parts)
+
+    async def command_on(server_id: str, server_config: dict):
+        async with EXECUTOR.exclusive(server_id):
+            result = await execute_command(server_config, operation.command(server_config))
+            invalidate_probe(server_config)
+            return result
+
+    async def run_on(server_id: str, server_config: dict):
+        async with semaphore:
+            try:
+                if operation.probe:
+                    document, error = await asyncio.wait_for(probe_on(server_config), FLEET_HOST_TIMEOUT_SECONDS)
+                else:
+                    # The timeout includes waiting for the server's lock, e.g. behind a restore on that server.
+                    returncode, stdout, stderr = await asyncio.wait_for(command_on(server_id, server_config), FLEET_HOST_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                failed.add(server_id)
+                results[server_id] = format_fleet_result("⏱", server_config, get_text("lbl_fleet_timeout", lang, seconds=FLEET_HOST_TIMEOUT_SECONDS))
+            else:
+                if operation.probe and document is None:
+                    failed.add(server_id)
+                    results[server_id] = format_fleet_result("❌", server_config, error)
+                elif operation.probe:
+                    icon, text = operation.probe(document)
+                    if icon == "❌":
+                        failed.add(server_id)
+                    results[server_id] = format_fleet_result(icon, server_config, text or get_text("lbl_fleet_done", lang))
+                elif returncode == 0:
+                    results[server_id] = format_fleet_result("✅", server_config, stdout.strip() or get_text("lbl_fleet_done", lang))
+                else:
+                    failed.add(server_id)
+                    error = "\n".join(line for line in stderr.splitlines() if parse_progress_line(line) is None)
+                    results[server_id] = format_fleet_result("❌", server_config, error.strip() or f"exit code {returncode}")
+        await progress.step(render())
+
+    await progress.step(render())
+    await asyncio.gather(*(run_on(server_id, server_config) for server_id, server_config in servers))
+    summary = get_text("lbl_fleet_summary", lang, ok=len(servers) - len(failed), failed=len(failed), seconds=f"{time.monotonic() - started_at:.1f}")
+    keyboard = InlineKeyboardMarkup([[InlineKeyboardButton(get_text("btn_back", lang), callback_data="fleet_menu")]])
+    await progress.finish(f"{render()}\n\n{summary}", reply_markup=keyboard)
+
+@translated_action
+async def handle_fleet_action(update: Update, context: ContextTypes.DEFAULT_TYPE, lang: str):
+    """Handles fleet_menu, fleet_confirm:<operation> and fleet_run:<operation>."""
+    query = update.callback_query
+    await query.answer()
+    action, _, name = query.data.partition(":")
+    if action == "fleet_menu" or name not in FLEET_OPERATIONS:
+        await fleet_menu(query, lang)
+    elif action == "fleet_confirm":
+        keyboard = [
+            [InlineKeyboardButton(get_text("btn_confirm_fleet_operation", lang), callback_data=f"fleet_run:{name}")],
+            [InlineKeyboardButton(get_text("btn_cancel", lang), callback_data="fleet_menu")],
+        ]
+        text = get_text("msg_confirm_fleet_operation", lang, operation=get_text(f"btn_fleet_{name}", lang), count=len(SERVERS))
+        await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode=ParseMode.HTML)
+    else:
+        await run_fleet_operation(query, lang, name)
+
+# --- Asset Cache ---
+BOT_HOST = {"name": "bot host", "is_local": True}
+
+class GitHubApiCache:
+    """Remembers GitHub API responses with their ETags so repeated lookups are conditional requests.
+
+    A 304 answer doesn't count against GitHub's rate limit, so polling for new releases and snapshots from
+    every server costs one real request per change.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: dict | None = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            try:
+                with open(self.path, 'r') as f:
+                    self._entries = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._entries = {}
+        return self._entries
+
+    def get_json(self, url: str, headers: dict | None = None, timeout: int = 15):
+        with self._lock:
+            entry = self._load().get(url)
+        request_headers = dict(headers or {})
+        if entry:
+            request_headers["If-None-Match"] = entry["etag"]
+        response = requests.get(url, timeout=timeout, headers=request_headers)
+        if response.status_code == 304 and entry:
+            logger.info(f"GitHub API response for {url} not modified, using the cached copy.")
+            return entry["body"]
+        response.raise_for_status()
+        body = response.json()
+        etag = response.headers.get("ETag")
+        if etag:
+            with self._lock:
+                entries = self._load()
+                entries[url] = {"etag": etag, "body": body}
+                try:
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    write_json_atomically(self.path, entries)
+                except OSError as e:
+                    logger.warning(f"Could not save the GitHub API cache: {e}")
+        return body
+
+GITHUB_API = GitHubApiCache(os.path.join(ASSET_CACHE_DIR, "github_api.json"))
+
+class AssetCache:
+    """Content-addressed store of GitHub release assets on the bot host, shared by every server.
+
+    Files are keyed by asset id and SHA-256 (or upload time when the release has no digest), so a re-uploaded
+    asset never serves stale bytes. Assets are downloaded once with the same resumable, verified downloader the
+    servers use, then streamed to each server over its SSH connection. The least recently used files are
+    evicted once max_bytes is exceeded; files checked out by a running operation are never evicted.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._partial_dir = os.path.join(directory, ".partial")
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._in_use: dict[str, int] = {}
+
+    @staticmethod
+    def file_name(asset: dict) -> str:
+        version = asset.get("sha256") or asset.get("updated_at") or str(asset.get("size"))
+        key = hashlib.sha1(f"{asset.get('id')}:{version}".encode()).hexdigest()[:16]
+        return f"{key}-{asset['name']}"
+
+    def fits(self, assets: list[dict]) -> bool:
+        return self.max_bytes > 0 and sum(asset.get("size", 0) for asset in assets) <= self.max_bytes
+
+    def _cached_files(self) -> list[tuple[str, os.stat_result]]:
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name != os.path.basename(GITHUB_API.path):
+                files.append((entry.name, entry.stat()))
+        return files
+
+    def _evict(self, reserve_bytes: int):
+        files = sorted(self._cached_files(), key=lambda item: item[1].st_mtime)
+        total = sum(stat.st_size for _, stat in files)
+        for name, stat in files:
+            if total + reserve_bytes <= self.max_bytes:
+                break
+            if self._in_use.get(name):
+                continue
+            os.remove(os.path.join(self.directory, name))
+            total -= stat.st_size
+            logger.info(f"Evicted {name} ({format_bytes(stat.st_size)}) from the asset cache.")
+
+    @asynccontextmanager
+    async def checkout(self, assets: list[dict], progress: ProgressReporter):
+        """Makes sure every asset is in the cache and yields (paths, error).
+
+        paths is None if a download failed. The files can't be evicted until the block exits.
+        """
+        names = [self.file_name(asset) for asset in assets]
+        for name in names:
+            self._in_use[name] = self._in_use.get(name, 0) + 1
+        try:
+            yield await self._fetch(assets, names, progress)
+        finally:
+            for name in names:
+                self._in_use[name] -= 1
+                if not self._in_use[name]:
+                    del self._in_use[name]
+
+    async def _fetch(self, assets: list[dict], names: list[str], progress: ProgressReporter) -> tuple[list[str] | None, str]:
+        paths = [os.path.join(self.directory, name) for name in names]
+        os.makedirs(self._partial_dir, exist_ok=True)
+        # Servers asking for the same asset at once wait for the first download instead of starting their own.
+        locks = [self._locks.setdefault(name, asyncio.Lock()) for name in sorted(set(names))]
+        for lock in locks:
+            await lock.acquire()
+        try:
+            missing = [(asset, name) for asset, name in zip(assets, names) if not os.path.exists(os.path.join(self.directory, name))]
+            if missing:
+                self._evict(sum(asset.get("size", 0) for asset, _ in missing))
+                logger.info(f"Downloading {len(missing)} asset(s) into the cache: {', '.join(name for _, name in missing)}")
+                _, error = await download_release_assets(
+                    BOT_HOST, [asset for asset, _ in missing], self._partial_dir, progress, [name for _, name in missing]
+                )
+                if error:
+                    return None, error
+                for _, name in missing:
+                    os.replace(os.path.join(self._partial_dir, name), os.path.join(self.directory, name))
+            else:
+                logger.info(f"Serving {', '.join(names)} from the asset cache.")
+            for path in paths:
+                os.utime(path)
+            return paths, ""
+        finally:
+            for lock in locks:
+                lock.release()
+
+ASSET_CACHE = AssetCache(ASSET_CACHE_DIR, ASSET_CACHE_MAX_BYTES)
+
 def get_config():
     try:
         with open('/root/config.json', 'r') as f:
@@ -824,148 +3024,698 @@ def get_config():
         logger.warning("config.json not found or invalid. Proceeding without auth token.")
         return {}
 
+# --- Node Binary Updates ---
+DEFAULT_HUMANODE_BINARY_PATH = "/root/.humanode/workspaces/default/humanode-peer"
+PREVIOUS_BINARY_SUFFIX = ".prev"
+STAGED_BINARY_SUFFIX = ".new"
+NODE_RESTART_SETTLE_SECONDS = 10
+
+def get_binary_path(server_config: dict) -> str:
+    return server_config.get("humanode_binary_path") or DEFAULT_HUMANODE_BINARY_PATH
+
+def get_update_staging_dir(server_config: dict) -> str:
+    """Kept next to the binary so the staged file is on the same filesystem and can be renamed into place."""
+    return os.path.join(os.path.dirname(get_binary_path(server_config)), ".humanode-peer-update")
+
+async def get_binary_version(server_config: dict, binary_path: str) -> tuple[str | None, str]:
+    """Runs `binary -V`, which doubles as a smoke test of a freshly staged binary. Returns (version, error)."""
+    returncode, stdout, stderr = await execute_command(server_config, f"{shlex.quote(binary_path)} -V")
+    if returncode != 0 or not stdout.strip():
+        return None, stderr or f"exit code {returncode}"
+    return stdout.strip(), ""
+
+async def stage_node_binary(server_config: dict, release_asset: dict, progress: ProgressReporter, lang: str) -> tuple[str | None, str, str]:
+    """Downloads, verifies and unpacks a release next to the node binary while the node keeps running.
+
+    The archive's SHA-256 is checked on the server itself, and the binary is copied to `<binary>.new`.
+    Returns (staged binary path, error message key, error details); the path is None on failure.
+    """
+    staging_dir = get_update_staging_dir(server_config)
+    archive_path = os.path.join(staging_dir, AssetCache.file_name(release_asset))
+    extract_path = os.path.join(staging_dir, "extracted")
+    expected_sha256 = release_asset.get("sha256")
+
+    if ASSET_CACHE.fits([release_asset]):
+        async with ASSET_CACHE.checkout([release_asset], progress) as (cached_paths, stderr):
+            if not cached_paths:
+                return None, "msg_download_error", stderr
+            pipeline = f"tee {shlex.quote(archive_path)} | sha256sum"
+            command = f"mkdir -p {shlex.quote(staging_dir)} && bash -o pipefail -c {shlex.quote(pipeline)}"
+            returncode, stdout, stderr = await execute_command(server_config, command, stdin_paths=cached_paths)
+        if returncode != 0:
+            return None, "msg_download_error", stderr
+        digest = stdout.split()[0] if stdout.split() else ""
+        if expected_sha256 and digest != expected_sha256:
+            return None, "msg_download_error", f"SHA-256 mismatch for {release_asset['name']}: expected {expected_sha256}, got {digest}"
+    else:
+        ok, error = await download_release_asset(server_config, release_asset, staging_dir, progress.on_line)
+        if not ok:
+            return None, "msg_download_error", error
+
+    await progress.step(get_text("msg_unpacking_release", lang))
+    unpack_cmd = (
+        f"rm -rf {shlex.quote(extract_path)} && mkdir -p {shlex.quote(extract_path)} && "
+        f"tar -xzf {shlex.quote(archive_path)} -C {shlex.quote(extract_path)} {TAR_CHECKPOINT_ARGS}"
+    )
+    returncode, _, stderr = await execute_command(server_config, unpack_cmd, on_line=progress.on_line)
+    if returncode != 0:
+        return None, "msg_unpack_error", stderr
+
+    find_cmd = f"find {shlex.quote(extract_path)} -name 'humanode-peer' -type f"
+    find_returncode, find_stdout, find_stderr = await execute_command(server_config, find_cmd)
+    if find_returncode != 0 or not find_stdout.strip():
+        return None, "msg_find_binary_error", find_stderr or "Binary not found"
+
+    staged_binary_path = get_binary_path(server_config) + STAGED_BINARY_SUFFIX
+    unpacked_binary_path = find_stdout.strip().split('\n')[0]
+    copy_cmd = f"sudo cp {shlex.quote(unpacked_binary_path)} {shlex.quote(staged_binary_path)} && sudo chmod +x {shlex.quote(staged_binary_path)}"
+    returncode, _, stderr = await execute_command(server_config, copy_cmd)
+    if returncode != 0:
+        return None, "msg_replace_error", stderr
+    return staged_binary_path, "", ""
+
+async def restart_node_and_check(server_config: dict) -> bool:
+    """Restarts the node service and reports whether it is still running a few seconds later."""
+    await execute_command(server_config, f"sudo systemctl restart {NODE_SERVICE}")
+    invalidate_probe(server_config)
+    await asyncio.sleep(NODE_RESTART_SETTLE_SECONDS)
+    returncode, _, _ = await execute_command(server_config, "systemctl is-active --quiet humanode-peer.service")
+    return returncode == 0
+
+def rollback_keyboard(lang: str, server_id: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([[InlineKeyboardButton(get_text("btn_rollback_node", lang), callback_data=f"action_rollback_node_{server_id}")]])
+
 async def update_node_action(update, context, lang, server_id):
+    """Updates humanode-peer with the node stopped only for the restart.
+
+    The new binary is downloaded, checksummed, unpacked and smoke-tested with -V while the old one keeps running.
+    The old binary is then hardlinked to `<binary>.prev` for rollback, the new one is renamed over it, and the
+    service is restarted.
+    """
     server_config = SERVERS[server_id]
     query = update.callback_query
+    progress = ProgressReporter(query, lang)
+    binary_path = get_binary_path(server_config)
+    staging_dir = get_update_staging_dir(server_config)
     
-    await query.edit_message_text(get_text("msg_checking_latest_release", lang))
+    await progress.step(get_text("msg_checking_latest_release", lang))
     
-    latest_tag, download_url = await asyncio.to_thread(get_latest_release_version)
-    if not download_url:
-        await query.edit_message_text(get_text("msg_failed_to_find_release", lang))
+    latest_tag, release_asset = await asyncio.to_thread(get_latest_release_version)
+    if not release_asset:
+        await progress.finish(get_text("msg_failed_to_find_release", lang))
         return
 
-    await query.edit_message_text(get_text("msg_downloading_release", lang, tag=latest_tag or "latest"))
-    
-    archive_filename = download_url.split('/')[-1]
-    temp_archive_path = f"/tmp/{archive_filename}"
-    temp_extract_path = "/tmp/humanode-peer-extracted"
+    await progress.step(get_text("msg_downloading_release", lang, tag=latest_tag or "latest"), total_bytes=release_asset.get("size"))
+    staged_binary_path, error_key, error = await stage_node_binary(server_config, release_asset, progress, lang)
+    await execute_command(server_config, f"rm -rf {shlex.quote(staging_dir)}")
+    if not staged_binary_path:
+        await progress.finish(get_text(error_key, lang, error=command_error_excerpt(error) or "Unknown error"))
+        return
 
-    wget_cmd = f"wget -q -O {temp_archive_path} {download_url}"
+    await progress.step(get_text("msg_verifying_new_binary", lang))
+    new_version, error = await get_binary_version(server_config, staged_binary_path)
+    if not new_version:
+        await execute_command(server_config, f"rm -f {shlex.quote(staged_binary_path)}")
+        await progress.finish(get_text("msg_binary_smoke_test_failed", lang, error=command_error_excerpt(error)))
+        return
+    current_version, _ = await get_binary_version(server_config, binary_path)
+    if current_version == new_version:
+        await execute_command(server_config, f"rm -f {shlex.quote(staged_binary_path)}")
+        await progress.finish(get_text("msg_node_already_up_to_date", lang, version=html.escape(new_version)))
+        return
 
-    returncode, _, stderr = await execute_command(server_config, wget_cmd)
+    await progress.step(get_text("msg_replacing_binary", lang))
+    previous_path = binary_path + PREVIOUS_BINARY_SUFFIX
+    # ln keeps the running binary's inode as .prev; mv is a rename within one directory, so it is atomic.
+    swap_cmd = (
+        f"{{ [ ! -e {shlex.quote(binary_path)} ] || sudo ln -f {shlex.quote(binary_path)} {shlex.quote(previous_path)}; }} && "
+        f"sudo mv -f {shlex.quote(staged_binary_path)} {shlex.quote(binary_path)}"
+    )
+    returncode, _, stderr = await execute_command(server_config, swap_cmd)
     if returncode != 0:
-        await query.edit_message_text(get_text("msg_download_error", lang, error=stderr or "Unknown wget error"), parse_mode=ParseMode.HTML)
+        await execute_command(server_config, f"rm -f {shlex.quote(staged_binary_path)}")
+        await progress.finish(get_text("msg_replace_error", lang, error=command_error_excerpt(stderr)))
         return
 
-    await query.edit_message_text(get_text("msg_unpacking_release", lang))
-    unpack_cmd = f"rm -rf {temp_extract_path} && mkdir -p {temp_extract_path} && tar -xzvf {temp_archive_path} -C {temp_extract_path}"
-    returncode, _, stderr = await execute_command(server_config, unpack_cmd)
+    await progress.step(get_text("msg_restarting_node_with_new_binary", lang, version=html.escape(new_version)))
+    if await restart_node_and_check(server_config):
+        await progress.finish(get_text("msg_node_updated_success", lang, tag=latest_tag or "latest"), reply_markup=rollback_keyboard(lang, server_id))
+    else:
+        await progress.finish(get_text("msg_node_not_active_after_update", lang), reply_markup=rollback_keyboard(lang, server_id))
+
+async def rollback_node_action(update, context, lang, server_id):
+    """Swaps the node binary with the one kept at `<binary>.prev` and restarts the node. Running it again rolls forward."""
+    server_config = SERVERS[server_id]
+    query = update.callback_query
+    progress = ProgressReporter(query, lang)
+    binary_path = get_binary_path(server_config)
+    previous_path = binary_path + PREVIOUS_BINARY_SUFFIX
+    swap_path = binary_path + STAGED_BINARY_SUFFIX
+
+    await progress.step(get_text("msg_rolling_back_node", lang))
+    returncode, _, _ = await execute_command(server_config, f"test -f {shlex.quote(previous_path)}")
     if returncode != 0:
-        await query.edit_message_text(get_text("msg_unpack_error", lang, error=stderr), parse_mode=ParseMode.HTML)
-        await execute_command(server_config, f"rm -f {temp_archive_path}")
+        await progress.finish(get_text("msg_no_previous_binary", lang, path=html.escape(previous_path)))
         return
 
-    find_cmd = f"find {temp_extract_path} -name 'humanode-peer' -type f"
-    find_returncode, find_stdout, find_stderr = await execute_command(server_config, find_cmd)
-    if find_returncode != 0 or not find_stdout.strip():
-        await query.edit_message_text(get_text("msg_find_binary_error", lang, error=find_stderr or "Binary not found"), parse_mode=ParseMode.HTML)
-        await execute_command(server_config, f"rm -f {temp_archive_path} && rm -rf {temp_extract_path}")
+    swap_cmd = (
+        f"sudo ln -f {shlex.quote(binary_path)} {shlex.quote(swap_path)} && "
+        f"sudo mv -f {shlex.quote(previous_path)} {shlex.quote(binary_path)} && "
+        f"sudo mv -f {shlex.quote(swap_path)} {shlex.quote(previous_path)}"
+    )
+    returncode, _, stderr = await execute_command(server_config, swap_cmd)
+    if returncode != 0:
+        await progress.finish(get_text("msg_replace_error", lang, error=command_error_excerpt(stderr)))
         return
-    
-    unpacked_binary_path = find_stdout.strip().split('\n')[0]
 
-    await query.edit_message_text(get_text("msg_stopping_service", lang))
-    await execute_command(server_config, "sudo systemctl stop humanode-peer.service")
-    
-    await query.edit_message_text(get_text("msg_replacing_binary", lang))
-    node_binary_path = "/root/.humanode/workspaces/default/humanode-peer"
-    replace_cmd = f"sudo mv {unpacked_binary_path} {node_binary_path} && sudo chmod +x {node_binary_path}"
-    returncode, _, stderr = await execute_command(server_config, replace_cmd)
-    if returncode != 0:
-        await query.edit_message_text(get_text("msg_replace_error", lang, error=stderr), parse_mode=ParseMode.HTML)
+    version, _ = await get_binary_version(server_config, binary_path)
+    await progress.step(get_text("msg_restarting_node_with_new_binary", lang, version=html.escape(version or "?")))
+    if await restart_node_and_check(server_config):
+        await progress.finish(get_text("msg_node_rolled_back", lang, version=html.escape(version or "?")), reply_markup=rollback_keyboard(lang, server_id))
     else:
-        await query.edit_message_text(get_text("msg_node_updated_success", lang, tag=latest_tag or "latest"))
-
-    await query.edit_message_text(get_text("msg_starting_service", lang))
-    await execute_command(server_config, "sudo systemctl start humanode-peer.service")
+        await progress.finish(get_text("msg_node_not_active_after_update", lang), reply_markup=rollback_keyboard(lang, server_id))
 
-    await execute_command(server_config, f"rm -f {temp_archive_path} && rm -rf {temp_extract_path}")
 
-
-def get_latest_release_version() -> tuple[str | None, str | None]:
+def get_latest_release_version() -> tuple[str | None, dict | None]:
+    """Returns the latest release tag and its humanode-peer archive asset."""
     url = "https://api.github.com/repos/stalkerSumy/humanode-telegram-bot/releases/latest"
     
     try:
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
-        data = response.json()
+        data = GITHUB_API.get_json(url)
         latest_version = data.get("tag_name")
         
-        download_url = next((asset.get("browser_download_url") for asset in data.get("assets", []) if "humanode-peer" in asset.get("name", "") and asset.get("name", "").endswith(".tar.gz")), None)
+        release_asset = next((asset for asset in data.get("assets", []) if "humanode-peer" in asset.get("name", "") and asset.get("name", "").endswith(".tar.gz")), None)
+        if release_asset:
+            digest = release_asset.get("digest") or ""
+            release_asset["sha256"] = digest.split(":", 1)[1].lower() if digest.startswith("sha256:") else None
         
-        return latest_version, download_url
+        return latest_version, release_asset
     except Exception as e:
         logger.error(f"Error getting latest release from GitHub: {e}")
         return None, None
 
-async def create_local_backup_action(update, context, lang, server_id):
-    query = update.callback_query
-    server_config = SERVERS[server_id]
-    
+# --- Backup Engine ---
+DEFAULT_HUMANODE_DATA_PATH = "/root/.humanode/workspaces/default/substrate-data"
+DEFAULT_BACKUP_DIR = "/root/humanode_backups"
+CHAIN_DB_SUBPATH = "chains/humanode_mainnet/db/full"
+BACKUP_NAME_PREFIX = "humanode_db_backup_"
+PARTIAL_SUFFIX = ".partial"
+# name: (compress command, archive extension); archives are told apart by extension when restoring.
+BACKUP_COMPRESSORS = {
+    "zstd": ("zstd -T0 -3 -q", ".tar.zst"),
+    "pigz": ("pigz", ".tar.gz"),
+    "gzip": ("gzip", ".tar.gz"),
+    "none": (None, ".tar"),
+}
+BACKUP_DECOMPRESSORS = {".tar.zst": "zstd -dc -T0", ".tar.gz": "gzip -dc", ".tar": "cat"}
+# Verification outcomes that rule a catalogued backup out of restores.
+UNRESTORABLE_BACKUP_STATUSES = ("corrupt", "missing")
+
+def get_db_path(server_config: dict) -> str:
+    data_path = server_config.get("humanode_data_path") or DEFAULT_HUMANODE_DATA_PATH
+    return os.path.join(data_path.rstrip("/"), CHAIN_DB_SUBPATH)
+
+def get_backup_dir(server_config: dict) -> str:
+    return (server_config.get("local_backup_dir") or DEFAULT_BACKUP_DIR).rstrip("/")
+
+def get_backup_prefix(server_config: dict) -> str:
+    return f"{BACKUP_NAME_PREFIX}{re.sub(r'[^A-Za-z0-9_.-]', '_', server_config['name'])}_"
+
+def get_backup_store(server_config: dict) -> dict:
+    """Returns the server config backups of this server are written to and read from.
+
+    Local servers keep backups themselves. Remote servers stream them to the bot host, so the returned config runs
+    commands locally but keeps the server's name for the backup file names.
+    """
+    if server_config.get("is_local"):
+        return server_config
+    return {"name": server_config["name"], "is_local": True, "local_backup_dir": REMOTE_BACKUP_DIR}
+
+def get_backup_bandwidth_limit(server_config: dict) -> float | None:
+    """Returns the bandwidth limit for streaming backups of a server in bytes per second, or None."""
+    limit_mbit = float(server_config.get("backup_bandwidth_limit_mbit", BACKUP_BANDWIDTH_LIMIT_MBIT))
+    return limit_mbit * 1_000_000 / 8 if limit_mbit > 0 else None
+
+def get_backup_format(path: str) -> str | None:
+    """Returns the archive extension of a backup, "" for an incremental snapshot directory, or None if unknown."""
+    for extension in BACKUP_DECOMPRESSORS:
+        if path.endswith(extension):
+            return extension
+    return "" if os.path.basename(path).startswith(BACKUP_NAME_PREFIX) else None
+
+async def list_server_backups(server_config: dict) -> list[str]:
+    """Returns the finished backups of a server, oldest first. Names end in a timestamp, so they sort by age."""
+    pattern = shlex.quote(get_backup_prefix(server_config)) + "*"
+    cmd = f"cd {shlex.quote(get_backup_dir(server_config))} 2>/dev/null && ls -1d {pattern} 2>/dev/null"
+    _, stdout, _ = await execute_command(server_config, cmd)
+    names = [name for name in stdout.splitlines() if name and not name.endswith(PARTIAL_SUFFIX)]
+    return [os.path.join(get_backup_dir(server_config), name) for name in sorted(names)]
+
+async def choose_backup_compressor(server_config: dict) -> str:
+    """Picks BACKUP_COMPRESSION, or with "auto" the fastest compressor installed on the server."""
+    if BACKUP_COMPRESSION != "auto":
+        return BACKUP_COMPRESSION if BACKUP_COMPRESSION in BACKUP_COMPRESSORS else "gzip"
+    _, stdout, _ = await execute_command(server_config, "command -v zstd pigz")
+    installed = {os.path.basename(path) for path in stdout.split()}
+    return next((name for name in ("zstd", "pigz") if name in installed), "gzip")
+
+def new_backup_path(server_config: dict, extension: str = "") -> str:
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(get_backup_dir(server_config), f"{get_backup_prefix(server_config)}{timestamp}{extension}")
+
+def get_backup_staging_dir(server_config: dict) -> str:
+    """A copy of the DB kept next to the backups, so each two-phase backup only has to sync what changed."""
+    return os.path.join(get_backup_dir(server_config), f".{get_backup_prefix(server_config)}staging")
+
+def get_previous_snapshot(server_id: str) -> str | None:
+    """Returns the newest incremental snapshot the server keeps itself, to hardlink unchanged files against."""
+    return next((entry["path"] for entry in STORAGE.list_backups(server_id) if entry["format"] == "" and entry["location"] == "server"), None)
+
+async def sync_db_copy(server_config: dict, source_path: str, target_dir: str, progress: ProgressReporter, link_dest: str | None = None) -> tuple[int, str]:
+    """rsyncs a DB directory into target_dir/full, hardlinking files that are unchanged in link_dest."""
+    link = f"--link-dest={shlex.quote(link_dest)} " if link_dest else ""
+    command = (
+        f"mkdir -p {shlex.quote(target_dir)} && "
+        f"rsync -a --delete --info=progress2 --no-inc-recursive {link}"
+        f"{shlex.quote(source_path)}/ {shlex.quote(os.path.join(target_dir, 'full'))}/"
+    )
+    returncode, _, stderr = await execute_command(server_config, command, on_line=progress.on_line)
+    return returncode, stderr
+
+async def finish_backup_file(server_config: dict, backup_path: str, returncode: int, stderr: str) -> tuple[str | None, str]:
+    """Renames a finished .partial backup into place, or removes it if writing failed."""
+    if returncode == 0:
+        returncode, _, stderr = await execute_command(server_config, f"mv {shlex.quote(backup_path + PARTIAL_SUFFIX)} {shlex.quote(backup_path)}")
+    if returncode != 0:
+        await execute_command(server_config, f"rm -rf {shlex.quote(backup_path + PARTIAL_SUFFIX)}")
+        return None, stderr
+    return backup_path, ""
+
+async def write_db_backup(server_config: dict, progress: ProgressReporter, source_path: str | None = None,
+                          previous_snapshot: str | None = None) -> tuple[str | None, str]:
+    """Writes a backup of the chain DB (or of a copy of it at source_path) into the server's backup dir.
+
+    "archive" mode writes a tar compressed with zstd -T0 or pigz. "incremental" mode rsyncs the DB into a new
+    directory with --link-dest pointing at the previous snapshot, so the mostly immutable DB files that haven't
+    changed are hardlinked instead of copied. The backup is written under a .partial name and renamed at the end.
+    Returns (path, error).
+    """
+    source_path = source_path or get_db_path(server_config)
+
+    if BACKUP_MODE == "incremental":
+        backup_path = new_backup_path(server_config)
+        returncode, stderr = await sync_db_copy(
+            server_config, source_path, backup_path + PARTIAL_SUFFIX, progress,
+            os.path.join(previous_snapshot, "full") if previous_snapshot else None,
+        )
+    else:
+        compress, extension = BACKUP_COMPRESSORS[await choose_backup_compressor(server_config)]
+        backup_path = new_backup_path(server_config, extension)
+        pipeline = f"{db_archive_pipeline(source_path, compress)} > {shlex.quote(backup_path + PARTIAL_SUFFIX)}"
+        command = f"mkdir -p {shlex.quote(get_backup_dir(server_config))} && bash -o pipefail -c {shlex.quote(pipeline)}"
+        returncode, _, stderr = await execute_command(server_config, command, on_line=progress.on_line)
+
+    return await finish_backup_file(server_config, backup_path, returncode, stderr)
+
+def db_archive_pipeline(source_path: str, compress: str | None) -> str:
+    """Returns a shell pipeline that writes a (compressed) tar of the DB directory to stdout."""
+    tar_cmd = f"tar -cf - {TAR_CHECKPOINT_ARGS} -C {shlex.quote(os.path.dirname(source_path))} {shlex.quote(os.path.basename(source_path))}"
+    return f"{tar_cmd} | {compress}" if compress else tar_cmd
+
+async def stream_db_backup(server_config: dict, progress: ProgressReporter) -> tuple[str | None, str]:
+    """Backs up a remote server's chain DB by streaming tar over SSH into the backup folder on the bot host.
+
+    The archive is compressed on the server, so only compressed bytes cross the network, and nothing is staged
+    on either side. Returns (path, error).
+    """
+    store = get_backup_store(server_config)
+    compress, extension = BACKUP_COMPRESSORS[await choose_backup_compressor(server_config)]
+    backup_path = new_backup_path(store, extension)
+    os.makedirs(get_backup_dir(store), exist_ok=True)
+    command = f"bash -o pipefail -c {shlex.quote(db_archive_pipeline(get_db_path(server_config), compress))}"
+    returncode, _, stderr = await execute_command(
+        server_config, command, on_line=progress.on_line,
+        stdout_path=backup_path + PARTIAL_SUFFIX, bandwidth_limit=get_backup_bandwidth_limit(server_config),
+    )
+    return await finish_backup_file(store, backup_path, returncode, stderr)
+
+async def supports_reflink(server_config: dict) -> bool:
+    """Checks whether files can be cloned from the DB's filesystem into the backup dir (btrfs, XFS)."""
+    probe = os.path.join(get_backup_dir(server_config), ".reflink_probe")
+    command = (
+        f"mkdir -p {shlex.quote(get_backup_dir(server_config))} && p=$(mktemp -p {shlex.quote(os.path.dirname(get_db_path(server_config)))}) && "
+        f"cp --reflink=always \"$p\" {shlex.quote(probe)}; rc=$?; rm -f \"$p\" {shlex.quote(probe)}; exit $rc"
+    )
+    returncode, _, _ = await execute_command(server_config, command)
+    return returncode == 0
+
+async def has_command(server_config: dict, name: str) -> bool:
+    returncode, _, _ = await execute_command(server_config, f"command -v {shlex.quote(name)}")
+    return returncode == 0
+
+async def restore_db_backup(server_config: dict, backup_path: str, progress: ProgressReporter) -> tuple[int, str]:
+    """Replaces the (already stopped and deleted) chain DB with the contents of a backup.
+
+    Backups of remote servers live on the bot host and are streamed into tar on the server over SSH.
+    """
+    db_path = get_db_path(server_config)
+    backup_format = get_backup_format(backup_path)
+    if backup_format is None:
+        return 1, f"Unknown backup format: {backup_path}"
     if not server_config.get("is_local"):
-        await query.edit_message_text(get_text("msg_local_backup_not_for_remote", lang))
-        return
+        if backup_format == "":
+            return 1, f"Snapshot directories can't be streamed to a remote server: {backup_path}"
+        pipeline = f"{BACKUP_DECOMPRESSORS[backup_format]} | tar -xf - -C {shlex.quote(os.path.dirname(db_path))}"
+        command = f"mkdir -p {shlex.quote(os.path.dirname(db_path))} && bash -o pipefail -c {shlex.quote(pipeline)}"
+        returncode, _, stderr = await execute_command(
+            server_config, command, stdin_paths=[backup_path],
+            bandwidth_limit=get_backup_bandwidth_limit(server_config), on_transfer=progress.on_transfer,
+        )
+        return returncode, stderr
+    if backup_format == "":
+        # Copy rather than hardlink, the node appends to some DB files and would change the snapshot.
+        command = f"mkdir -p {shlex.quote(db_path)} && rsync -a --info=progress2 --no-inc-recursive {shlex.quote(os.path.join(backup_path, 'full'))}/ {shlex.quote(db_path)}/"
+    else:
+        pipeline = f"{BACKUP_DECOMPRESSORS[backup_format]} {shlex.quote(backup_path)} | tar -xf - -C {shlex.quote(os.path.dirname(db_path))} {TAR_CHECKPOINT_ARGS}"
+        command = f"mkdir -p {shlex.quote(os.path.dirname(db_path))} && bash -o pipefail -c {shlex.quote(pipeline)}"
+    returncode, _, stderr = await execute_command(server_config, command, on_line=progress.on_line)
+    return returncode, stderr
+
+def get_backup_host(server_config: dict, entry: dict) -> dict:
+    """Returns the config to run commands with on the machine that holds a catalogued backup."""
+    return get_backup_store(server_config) if entry["location"] == "bot" else server_config
+
+async def check_backup_restorable(server_config: dict, entry: dict) -> str | None:
+    """Returns why a catalogued backup can't be restored onto its server, or None if it can.
 
-    backup_path = await create_node_db_backup(context, lang, server_id, query)
+    Runs before the node is stopped, so a restore that can't work never deletes the chain DB.
+    """
+    backup_path = entry["path"]
+    backup_format = get_backup_format(backup_path)
+    if backup_format is None:
+        return f"Unknown backup format: {backup_path}"
+    # restore_db_backup reads local servers' backups on the server and remote servers' ones on the bot host.
+    expected_location = "server" if server_config.get("is_local") else "bot"
+    if entry["location"] != expected_location:
+        return f"The backup is kept on the {entry['location']} host, but this server restores from the {expected_location} host: {backup_path}"
+    if backup_format == "" and not server_config.get("is_local"):
+        return f"Snapshot directories can't be streamed to a remote server: {backup_path}"
+    returncode, _, _ = await execute_command(get_backup_host(server_config, entry), f"test -e {shlex.quote(backup_path)}")
+    if returncode != 0:
+        return f"Backup not found: {backup_path}"
+    return None
+
+def backup_checksum_command(path: str, backup_format: str) -> str:
+    """Prints a SHA-256 of an archive, or of the sorted per-file SHA-256 list of a snapshot directory."""
+    if backup_format == "":
+        return f"cd {shlex.quote(path)} && find . -type f -print0 | LC_ALL=C sort -z | xargs -0 -r sha256sum | sha256sum"
+    return f"sha256sum {shlex.quote(path)}"
+
+async def compute_backup_checksum(host_config: dict, path: str, backup_format: str) -> str | None:
+    returncode, stdout, _ = await execute_command(host_config, backup_checksum_command(path, backup_format))
+    digest = stdout.split()[0] if returncode == 0 and stdout.split() else ""
+    return digest if re.fullmatch(r"[0-9a-f]{64}", digest) else None
+
+async def fetch_chain_height(server_config: dict) -> int | None:
+    """Asks the node for its best block number over JSON-RPC, or returns None if it doesn't answer."""
+    rpc_url = server_config.get("rpc_url", node_rpc.DEFAULT_RPC_URL)
+    payload = json.dumps(node_rpc.build_header_request(), separators=(",", ":"))
+    cmd = f"curl -s -m 10 -H 'Content-Type: application/json' -d {shlex.quote(payload)} {shlex.quote(rpc_url)}"
+    returncode, stdout, _ = await execute_command(server_config, cmd)
+    try:
+        return node_rpc.parse_block_number(json.loads(stdout)) if returncode == 0 else None
+    except (ValueError, AttributeError) as e:
+        logger.warning(f"Could not read the chain height of {server_config['name']}: {e}")
+        return None
+
+async def record_backup(server_id: str, server_config: dict, backup_path: str, chain_height: int | None,
+                        created_utc: datetime | None = None, with_checksum: bool = True) -> int:
+    """Adds a finished backup to the catalog with its size and, for archives, its SHA-256.
+
+    Snapshot directories are hashed by the first background verification instead, hashing them here would
+    read every hardlinked file and undo the point of incremental backups.
+    """
+    store = get_backup_store(server_config)
+    backup_format = get_backup_format(backup_path)
+    returncode, stdout, _ = await execute_command(store, f"du -sb {shlex.quote(backup_path)}")
+    size = int(stdout.split()[0]) if returncode == 0 and stdout.split() and stdout.split()[0].isdigit() else None
+    sha256 = await compute_backup_checksum(store, backup_path, backup_format) if with_checksum and backup_format else None
+    entry = {
+        "server_id": server_id,
+        "created_utc": (created_utc or datetime.now(timezone.utc)).isoformat(),
+        "path": backup_path,
+        "location": "server" if server_config.get("is_local") else "bot",
+        "format": backup_format,
+        "size_bytes": size,
+        "sha256": sha256,
+        "chain_height": chain_height,
+        "status": "unverified",
+        "verified_utc": None,
+    }
+    return STORAGE.add_backup(entry)
+
+async def import_backups_into_catalog():
+    """Catalogs backups already on disk for servers that have none catalogued yet, e.g. after upgrading the bot.
+
+    This is the only directory scan; checksums are left to the background verification.
+    """
+    for server_id, server_config in SERVERS.items():
+        if STORAGE.count_backups(server_id):
+            continue
+        store = get_backup_store(server_config)
+        prefix = get_backup_prefix(server_config)
+        for path in await list_server_backups(store):
+            if get_backup_format(path) is None:
+                continue
+            try:
+                created = datetime.strptime(os.path.basename(path)[len(prefix):len(prefix) + 15], "%Y%m%d_%H%M%S").astimezone(timezone.utc)
+            except ValueError:
+                created = None
+            await record_backup(server_id, server_config, path, None, created, with_checksum=False)
+            logger.info(f"Added existing backup {path} of '{server_config['name']}' to the catalog.")
+
+async def verify_backup(server_config: dict, entry: dict) -> str:
+    """Re-hashes a catalogued backup and stores the outcome: "ok", "corrupt" or "missing".
+
+    The first verification of a backup without a checksum records it. If the host can't be reached the entry is
+    left as it was.
+    """
+    host = get_backup_host(server_config, entry)
+    returncode, stdout, _ = await execute_command(host, f"test -e {shlex.quote(entry['path'])} && echo present || echo absent")
+    if returncode != 0:
+        return entry["status"]
+    changes = {"verified_utc": datetime.now(timezone.utc).isoformat()}
+    if stdout.strip() == "absent":
+        changes["status"] = "missing"
+    else:
+        digest = await compute_backup_checksum(host, entry["path"], entry["format"])
+        if digest is None:
+            return entry["status"]
+        if entry["sha256"] is None:
+            changes["sha256"] = digest
+        changes["status"] = "ok" if entry["sha256"] in (None, digest) else "corrupt"
+    STORAGE.update_backup(entry["id"], changes)
+    if changes["status"] != "ok":
+        logger.warning(f"Backup {entry['path']} of '{server_config['name']}' failed verification: {changes['status']}")
+    return changes["status"]
+
+async def verify_backup_catalog(context: ContextTypes.DEFAULT_TYPE):
+    """Background job: re-verifies every catalogued backup one at a time and reports the ones that went bad."""
+    state = load_state()
+    lang = state.get("user_settings", {}).get(str(AUTHORIZED_USER_ID), {}).get("language", "uk")
+    for server_id, server_config in list(SERVERS.items()):
+        for entry in STORAGE.list_backups(server_id):
+            try:
+                async with EXECUTOR.slot(WorkExecutor.BACKGROUND):
+                    status = await verify_backup(server_config, entry)
+            except Exception as e:
+                logger.error(f"Verifying backup {entry['path']} failed: {e}", exc_info=True)
+                continue
+            if status in UNRESTORABLE_BACKUP_STATUSES and status != entry["status"]:
+                await context.bot.send_message(
+                    AUTHORIZED_USER_ID,
+                    get_text("msg_backup_verification_failed", lang, server_name=server_config['name'],
+                             file=html.escape(os.path.basename(entry["path"])), status=get_text(f"lbl_backup_status_{status}", lang)),
+                    parse_mode=ParseMode.HTML,
+                )
+
+async def prune_backups(server_id: str, server_config: dict) -> list[str]:
+    """Deletes all but the newest BACKUP_RETENTION_COUNT catalogued backups of a server. Returns the deleted paths.
+
+    Incremental snapshots share unchanged files through hardlinks, so any of them can be deleted on its own.
+    Entries leave the catalog before their files are removed, so a verification running meanwhile skips them.
+    """
+    if BACKUP_RETENTION_COUNT <= 0:
+        return []
+    expired = STORAGE.list_backups(server_id, offset=BACKUP_RETENTION_COUNT)
+    if not expired:
+        return []
+    STORAGE.delete_backups([entry["id"] for entry in expired])
+    for entry in expired:
+        await execute_command(get_backup_host(server_config, entry), f"rm -rf {shlex.quote(entry['path'])}")
+    logger.info(f"Pruned {len(expired)} old backup(s) of '{server_config['name']}': {', '.join(os.path.basename(entry['path']) for entry in expired)}")
+    return [entry["path"] for entry in expired]
+
+async def create_local_backup_action(update, context, lang, server_id):
+    query = update.callback_query
+    progress = ProgressReporter(query, lang)
+    backup_path = await create_node_db_backup(context, lang, server_id, query, progress)
     if backup_path:
-        await query.edit_message_text(get_text("msg_local_backup_created", lang, path=backup_path), parse_mode=ParseMode.HTML)
+        await progress.finish(get_text("msg_local_backup_created", lang, path=backup_path))
+
+async def check_backup_epoch_window(server_config: dict, query, lang: str, progress: ProgressReporter, min_minutes: int) -> bool:
+    """Makes sure the node can be stopped without missing the end of the epoch. Reports why not otherwise."""
+    await progress.step(get_text("msg_checking_epoch_time", lang, server_name=server_config['name']))
+    times = await fetch_bioauth_times(server_config, query, lang)
+    if times is None:
+        await progress.finish(get_text("msg_error_selenium_not_initialized", lang))
+        return False
+    _, epoch_minutes = times
 
-async def create_node_db_backup(context, lang, server_id, query) -> str | None:
-    server_config = SERVERS[server_id]
-    
-    await query.edit_message_text(get_text("msg_checking_epoch_time", lang, server_name=server_config['name']))
-    url = await get_latest_url_from_logs(server_config, query, lang)
-    if not url:
-        await query.edit_message_text(get_text("msg_failed_to_get_url_for_epoch", lang))
+    if epoch_minutes == -1:
+        await progress.finish(get_text("msg_failed_to_get_epoch_time_backup", lang))
+        return False
+    if epoch_minutes < min_minutes:
+        await progress.finish(get_text("msg_epoch_ending_soon_backup_cancelled", lang, minutes=epoch_minutes, min_minutes=min_minutes))
+        return False
+    return True
+
+async def create_two_phase_backup(server_config: dict, query, lang: str, progress: ProgressReporter, db_size: int | None, reflink: bool,
+                                  previous_snapshot: str | None = None) -> str | None:
+    """Backs up the DB while stopping the node only for a moment.
+
+    With reflinks the node is stopped just long enough to clone the DB. Otherwise the DB is first rsynced while
+    the node runs, and the node is stopped only for a second rsync that picks up the files changed meanwhile.
+    Archives are then written from the consistent copy with the node already running again.
+    """
+    db_path = get_db_path(server_config)
+    incremental = BACKUP_MODE == "incremental"
+    if incremental:
+        backup_path = new_backup_path(server_config)
+        copy_dir = backup_path + PARTIAL_SUFFIX
+        link_dest = os.path.join(previous_snapshot, "full") if previous_snapshot else None
+    else:
+        copy_dir = get_backup_staging_dir(server_config)
+        link_dest = None
+
+    async def discard_copy():
+        if incremental:
+            await execute_command(server_config, f"rm -rf {shlex.quote(copy_dir)}")
+
+    if not reflink:
+        await progress.step(get_text("msg_backup_copying_live_db", lang), total_bytes=db_size)
+        returncode, stderr = await sync_db_copy(server_config, db_path, copy_dir, progress, link_dest)
+        if returncode != 0:
+            await discard_copy()
+            await progress.finish(get_text("msg_failed_to_create_archive", lang, error=command_error_excerpt(stderr)))
+            return None
+
+    # Checked right before stopping, the live copy above can take a long time.
+    if not await check_backup_epoch_window(server_config, query, lang, progress, BACKUP_TWO_PHASE_MIN_EPOCH_MINUTES):
+        await discard_copy()
         return None
 
-    driver = create_selenium_driver()
-    if not driver:
-        await query.edit_message_text(get_text("msg_error_selenium_not_initialized", lang))
+    await progress.step(get_text("msg_stopping_node_for_backup", lang, server_name=server_config['name']))
+    returncode, _, stderr = await execute_command(server_config, "sudo systemctl stop humanode-peer.service")
+    if returncode != 0:
+        await discard_copy()
+        await progress.finish(get_text("msg_failed_to_stop_node", lang, error=command_error_excerpt(stderr)))
         return None
+    stopped_at = time.monotonic()
 
-    epoch_minutes = -1
-    try:
-        _, epoch_minutes = await asyncio.to_thread(get_bioauth_and_epoch_times, driver, url)
-    finally:
-        if driver:
-            driver.quit()
+    if reflink:
+        await progress.step(get_text("msg_backup_cloning_db", lang))
+        target = os.path.join(copy_dir, "full")
+        clone_cmd = f"rm -rf {shlex.quote(target)} && mkdir -p {shlex.quote(copy_dir)} && cp -a --reflink=always {shlex.quote(db_path)} {shlex.quote(target)}"
+        returncode, _, stderr = await execute_command(server_config, clone_cmd)
+    else:
+        await progress.step(get_text("msg_backup_syncing_delta", lang))
+        returncode, stderr = await sync_db_copy(server_config, db_path, copy_dir, progress, link_dest)
 
-    if epoch_minutes == -1:
-        await query.edit_message_text(get_text("msg_failed_to_get_epoch_time_backup", lang))
+    await progress.step(get_text("msg_starting_node_after_backup", lang, server_name=server_config['name']))
+    start_returncode, _, start_stderr = await execute_command(server_config, "sudo systemctl start humanode-peer.service")
+    logger.info(f"Node '{server_config['name']}' was stopped for {time.monotonic() - stopped_at:.1f}s for the backup.")
+    if start_returncode != 0:
+        await progress.step(get_text("msg_failed_to_start_node_after_backup", lang, error=command_error_excerpt(start_stderr)))
+
+    if incremental:
+        backup_path, stderr = await finish_backup_file(server_config, backup_path, returncode, stderr)
+    elif returncode == 0:
+        await progress.step(get_text("msg_creating_db_archive", lang), total_bytes=db_size)
+        backup_path, stderr = await write_db_backup(server_config, progress, source_path=os.path.join(copy_dir, "full"))
+    else:
+        backup_path = None
+
+    if not backup_path:
+        await progress.finish(get_text("msg_failed_to_create_archive", lang, error=command_error_excerpt(stderr)))
         return None
-    if epoch_minutes < 30:
-        await query.edit_message_text(get_text("msg_epoch_ending_soon_backup_cancelled", lang, minutes=epoch_minutes))
+    return backup_path
+
+async def create_stopped_backup(server_config: dict, query, lang: str, progress: ProgressReporter, db_size: int | None,
+                                previous_snapshot: str | None = None) -> str | None:
+    """Backs up the DB with the node stopped for the whole copy, streaming it to the bot host for remote servers."""
+    if not await check_backup_epoch_window(server_config, query, lang, progress, BACKUP_MIN_EPOCH_MINUTES):
         return None
 
-    backup_dir = "/root/humanode_backups"
-    os.makedirs(backup_dir, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_filename = f"humanode_db_backup_{server_config['name'].replace(' ', '_')}_{timestamp}.tar"
-    backup_path = os.path.join(backup_dir, backup_filename)
-    db_path = "/root/.humanode/workspaces/default/substrate-data/chains/humanode_mainnet/db/full/"
+    if not server_config.get("is_local") and db_size:
+        # The archive lands on the bot host; check before the node is stopped rather than failing half-way.
+        os.makedirs(REMOTE_BACKUP_DIR, exist_ok=True)
+        free_bytes = shutil.disk_usage(REMOTE_BACKUP_DIR).free
+        if free_bytes < db_size:
+            await progress.finish(get_text("msg_not_enough_disk_space", lang, path=REMOTE_BACKUP_DIR, required=format_bytes(db_size), available=format_bytes(free_bytes)))
+            return None
 
-    await query.edit_message_text(get_text("msg_stopping_node_for_backup", lang, server_name=server_config['name']))
+    await progress.step(get_text("msg_stopping_node_for_backup", lang, server_name=server_config['name']))
     returncode, _, stderr = await execute_command(server_config, "sudo systemctl stop humanode-peer.service")
     if returncode != 0:
-        await query.edit_message_text(get_text("msg_failed_to_stop_node", lang, error=stderr), parse_mode=ParseMode.HTML)
+        await progress.finish(get_text("msg_failed_to_stop_node", lang, error=command_error_excerpt(stderr)))
         return None
 
-    await query.edit_message_text(get_text("msg_creating_db_archive", lang))
-    tar_command = f"tar -cf {shlex.quote(backup_path)} -C {os.path.dirname(db_path)} {os.path.basename(db_path)}"
-    returncode, _, stderr = await execute_command(server_config, tar_command)
-    
-    await query.edit_message_text(get_text("msg_starting_node_after_backup", lang, server_name=server_config['name']))
+    if server_config.get("is_local"):
+        await progress.step(get_text("msg_creating_db_archive", lang), total_bytes=db_size)
+        backup_path, stderr = await write_db_backup(server_config, progress, previous_snapshot=previous_snapshot)
+    else:
+        await progress.step(get_text("msg_streaming_backup_to_bot", lang), total_bytes=db_size)
+        backup_path, stderr = await stream_db_backup(server_config, progress)
+
+    await progress.step(get_text("msg_starting_node_after_backup", lang, server_name=server_config['name']))
     start_returncode, _, start_stderr = await execute_command(server_config, "sudo systemctl start humanode-peer.service")
     if start_returncode != 0:
-        await query.edit_message_text(get_text("msg_failed_to_start_node_after_backup", lang, error=start_stderr), parse_mode=ParseMode.HTML)
+        await progress.step(get_text("msg_failed_to_start_node_after_backup", lang, error=command_error_excerpt(start_stderr)))
 
-    if returncode != 0:
-        await query.edit_message_text(get_text("msg_failed_to_create_archive", lang, error=stderr), parse_mode=ParseMode.HTML)
+    if not backup_path:
+        await progress.finish(get_text("msg_failed_to_create_archive", lang, error=command_error_excerpt(stderr)))
         return None
+    return backup_path
 
-    logger.info(f"Successfully created DB backup: {backup_path}")
+async def create_node_db_backup(context, lang, server_id, query, progress: ProgressReporter | None = None) -> str | None:
+    server_config = SERVERS[server_id]
+    progress = progress or ProgressReporter(query, lang)
+    db_path = get_db_path(server_config)
+
+    # Measured while the node is still running so the percentage is known once the copy starts.
+    du_returncode, du_stdout, _ = await execute_command(server_config, f"du -sb {shlex.quote(db_path)}")
+    db_size = int(du_stdout.split()[0]) if du_returncode == 0 and du_stdout.split() and du_stdout.split()[0].isdigit() else None
+    chain_height = await fetch_chain_height(server_config)
+    previous_snapshot = get_previous_snapshot(server_id)
+
+    two_phase = reflink = False
+    # Remote servers stream straight to the bot host, a two-phase copy would need staging space on the server.
+    if BACKUP_STRATEGY == "two_phase" and server_config.get("is_local"):
+        reflink = await supports_reflink(server_config)
+        two_phase = reflink or await has_command(server_config, "rsync")
+        if not two_phase:
+            logger.warning(f"Neither reflinks nor rsync are available on '{server_config['name']}', backing up with the node stopped.")
+
+    if two_phase:
+        backup_path = await create_two_phase_backup(server_config, query, lang, progress, db_size, reflink, previous_snapshot)
+    else:
+        backup_path = await create_stopped_backup(server_config, query, lang, progress, db_size, previous_snapshot)
+
+    if backup_path:
+        logger.info(f"Successfully created DB backup: {backup_path}")
+        await record_backup(server_id, server_config, backup_path, chain_height)
+        await prune_backups(server_id, server_config)
     return backup_path
 
 async def confirm_restore_action(update: Update, context: ContextTypes.DEFAULT_TYPE, lang: str, server_id: str, restore_type: str):
@@ -977,166 +3727,436 @@ async def confirm_restore_action(update: Update, context: ContextTypes.DEFAULT_T
     ]
     await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode=ParseMode.HTML)
 
+def is_backup_restorable(server_config: dict, entry: dict) -> bool:
+    """Remote servers can't restore from snapshot directories, and nobody restores what verification rejected."""
+    if entry["status"] in UNRESTORABLE_BACKUP_STATUSES:
+        return False
+    return server_config.get("is_local") or entry["format"] != ""
+
+def get_restorable_backups(server_id: str, server_config: dict, offset: int = 0, limit: int | None = None) -> list[dict]:
+    """Returns catalogued backups of a server that can be restored, newest first."""
+    return [entry for entry in STORAGE.list_backups(server_id, offset, limit) if is_backup_restorable(server_config, entry)]
+
 async def restore_local_db_action(update, context, lang, server_id):
     query = update.callback_query
     server_config = SERVERS[server_id]
-    
-    if not server_config.get("is_local"):
-        await query.edit_message_text(get_text("msg_local_restore_not_for_remote", lang))
-        return
 
-    await query.edit_message_text(get_text("msg_finding_latest_local_backup", lang), parse_mode=ParseMode.HTML)
-    
-    backup_dir = "/root/humanode_backups"
-    list_of_files = glob.glob(f'{backup_dir}/*.tar')
-    if not list_of_files:
-        await query.edit_message_text(get_text("msg_no_local_backups_found", lang, path=backup_dir), parse_mode=ParseMode.HTML)
+    progress = ProgressReporter(query, lang)
+    await progress.step(get_text("msg_finding_latest_local_backup", lang))
+
+    backups = get_restorable_backups(server_id, server_config)
+    if not backups:
+        await progress.finish(get_text("msg_no_local_backups_found", lang, path=get_backup_dir(get_backup_store(server_config))))
         return
-    
-    latest_file = max(list_of_files, key=os.path.getctime)
-    await query.edit_message_text(get_text("msg_found_backup_stopping_node", lang, file=os.path.basename(latest_file)), parse_mode=ParseMode.HTML)
+    await restore_catalog_backup(server_config, backups[0], progress, lang)
+
+async def restore_catalog_backup(server_config: dict, entry: dict, progress: ProgressReporter, lang: str):
+    """Stops the node, replaces its chain DB with a catalogued backup and starts it again."""
+    backup_path = entry["path"]
+    error = await check_backup_restorable(server_config, entry)
+    if error:
+        await progress.finish(get_text("msg_backup_not_restorable", lang, error=html.escape(error)))
+        return
+    await progress.step(get_text("msg_found_backup_stopping_node", lang, file=os.path.basename(backup_path)))
 
     returncode, _, stderr = await execute_command(server_config, "sudo systemctl stop humanode-peer.service")
     if returncode != 0:
-        await query.edit_message_text(get_text("msg_failed_to_stop_node", lang, error=stderr), parse_mode=ParseMode.HTML)
+        await progress.finish(get_text("msg_failed_to_stop_node", lang, error=command_error_excerpt(stderr)))
         return
 
-    db_path = "/root/.humanode/workspaces/default/substrate-data/chains/humanode_mainnet/db/full"
-    await query.edit_message_text(get_text("msg_deleting_old_db", lang), parse_mode=ParseMode.HTML)
-    rm_returncode, _, rm_stderr = await execute_command(server_config, f"rm -rf {db_path}")
+    db_path = get_db_path(server_config)
+    await progress.step(get_text("msg_deleting_old_db", lang))
+    rm_returncode, _, rm_stderr = await execute_command(server_config, f"rm -rf {shlex.quote(db_path)}")
     if rm_returncode != 0:
-        await query.edit_message_text(get_text("msg_failed_to_delete_db", lang, error=rm_stderr), parse_mode=ParseMode.HTML)
+        await progress.finish(get_text("msg_failed_to_delete_db", lang, error=command_error_excerpt(rm_stderr)))
         await execute_command(server_config, "sudo systemctl start humanode-peer.service")
         return
 
-    await query.edit_message_text(get_text("msg_unpacking_backup", lang), parse_mode=ParseMode.HTML)
-    restore_cmd = f"tar -xf {latest_file} -C /"
-    restore_returncode, _, restore_stderr = await execute_command(server_config, restore_cmd)
+    # Streamed restores count the archive bytes sent, local ones count what tar has unpacked.
+    streamed = not server_config.get("is_local")
+    backup_size = entry["size_bytes"] if streamed or entry["format"] == ".tar" else None
+    await progress.step(get_text("msg_unpacking_backup", lang), total_bytes=backup_size)
+    restore_returncode, restore_stderr = await restore_db_backup(server_config, backup_path, progress)
+
+    await progress.step(get_text("msg_starting_node_after_restore", lang))
+    start_returncode, _, start_stderr = await execute_command(server_config, "sudo systemctl start humanode-peer.service")
+
     if restore_returncode != 0:
-        await query.edit_message_text(get_text("msg_failed_to_unpack_backup", lang, error=restore_stderr), parse_mode=ParseMode.HTML)
+        await progress.finish(get_text("msg_failed_to_unpack_backup", lang, error=command_error_excerpt(restore_stderr)))
+    elif start_returncode != 0:
+        await progress.finish(get_text("msg_failed_to_start_node_after_restore", lang, error=command_error_excerpt(start_stderr)))
     else:
-        await query.edit_message_text(get_text("msg_restore_successful", lang), parse_mode=ParseMode.HTML)
+        await progress.finish(get_text("msg_restore_successful", lang))
 
-    await query.edit_message_text(get_text("msg_starting_node_after_restore", lang), parse_mode=ParseMode.HTML)
-    start_returncode, _, start_stderr = await execute_command(server_config, "sudo systemctl start humanode-peer.service")
-    if start_returncode != 0:
-        await query.edit_message_text(get_text("msg_failed_to_start_node_after_restore", lang, error=start_stderr), parse_mode=ParseMode.HTML)
+# --- Backup Catalog Menu ---
+BACKUP_LIST_PAGE_SIZE = 5
+BACKUP_STATUS_ICONS = {"unverified": "⏳", "ok": "✅", "corrupt": "❌", "missing": "❓"}
+
+def format_backup_time(value: str | None) -> str:
+    return datetime.fromisoformat(value).astimezone().strftime("%Y-%m-%d %H:%M") if value else "—"
+
+def format_backup_label(entry: dict) -> str:
+    parts = [format_backup_time(entry["created_utc"])]
+    if entry["size_bytes"] is not None:
+        parts.append(format_bytes(entry["size_bytes"]))
+    if entry["chain_height"] is not None:
+        parts.append(f"#{entry['chain_height']}")
+    return f"{BACKUP_STATUS_ICONS.get(entry['status'], '')} {' · '.join(parts)}"
+
+async def backup_list_menu(query, lang: str, server_id: str, page: int):
+    """Shows one page of a server's catalogued backups, newest first. Callback data: backup_list:<page>:<server_id>."""
+    server_config = SERVERS[server_id]
+    total = STORAGE.count_backups(server_id)
+    if not total:
+        keyboard = [[InlineKeyboardButton(get_text("btn_back", lang), callback_data=f"action_restore_menu_{server_id}")]]
+        await query.edit_message_text(get_text("msg_no_catalogued_backups", lang, server_name=server_config['name']), reply_markup=InlineKeyboardMarkup(keyboard))
+        return
+
+    pages = (total + BACKUP_LIST_PAGE_SIZE - 1) // BACKUP_LIST_PAGE_SIZE
+    page = min(max(page, 0), pages - 1)
+    entries = STORAGE.list_backups(server_id, offset=page * BACKUP_LIST_PAGE_SIZE, limit=BACKUP_LIST_PAGE_SIZE)
+    keyboard = [[InlineKeyboardButton(format_backup_label(entry), callback_data=f"backup_pick:{entry['id']}")] for entry in entries]
+    navigation = []
+    if page > 0:
+        navigation.append(InlineKeyboardButton("◀️", callback_data=f"backup_list:{page - 1}:{server_id}"))
+    if page < pages - 1:
+        navigation.append(InlineKeyboardButton("▶️", callback_data=f"backup_list:{page + 1}:{server_id}"))
+    if navigation:
+        keyboard.append(navigation)
+    keyboard.append([InlineKeyboardButton(get_text("btn_back", lang), callback_data=f"action_restore_menu_{server_id}")])
+    text = get_text("lbl_backup_list_title", lang, server_name=server_config['name'], count=total, page=page + 1, pages=pages)
+    await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard))
+
+async def backup_details_menu(query, lang: str, entry: dict):
+    server_id = entry["server_id"]
+    server_config = SERVERS[server_id]
+    text = get_text(
+        "msg_backup_details", lang,
+        server_name=server_config['name'],
+        created=format_backup_time(entry["created_utc"]),
+        size=format_bytes(entry["size_bytes"]) if entry["size_bytes"] is not None else "—",
+        height=entry["chain_height"] if entry["chain_height"] is not None else "—",
+        sha256=entry["sha256"] or "—",
+        status=get_text(f"lbl_backup_status_{entry['status']}", lang),
+        verified=format_backup_time(entry["verified_utc"]),
+        path=html.escape(entry["path"]),
+    )
+    keyboard = []
+    if is_backup_restorable(server_config, entry):
+        keyboard.append([InlineKeyboardButton(get_text("btn_restore_this_backup", lang), callback_data=f"backup_restore_confirm:{entry['id']}")])
+    keyboard.append([InlineKeyboardButton(get_text("btn_verify_backup", lang), callback_data=f"backup_verify:{entry['id']}")])
+    keyboard.append([InlineKeyboardButton(get_text("btn_back", lang), callback_data=f"backup_list:0:{server_id}")])
+    await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode=ParseMode.HTML)
+
+@translated_action
+async def handle_backup_catalog_action(update: Update, context: ContextTypes.DEFAULT_TYPE, lang: str):
+    """Handles backup_list:<page>:<server_id>, backup_pick:<id>, backup_verify:<id>, backup_restore_confirm:<id>
+    and backup_restore:<id>.
+
+    Backups are addressed by catalog id so the callback data stays well under Telegram's 64 bytes.
+    """
+    query = update.callback_query
+    await query.answer()
+    action, _, argument = query.data.partition(":")
+
+    if action == "backup_list":
+        page, _, server_id = argument.partition(":")
+        if server_id not in SERVERS or not page.isdigit():
+            await query.edit_message_text(get_text("msg_error_unknown_server", lang), reply_markup=await main_menu_keyboard(lang))
+            return
+        await backup_list_menu(query, lang, server_id, int(page))
+        return
+
+    entry = STORAGE.get_backup(int(argument)) if argument.isdigit() else None
+    if entry is None or entry["server_id"] not in SERVERS:
+        await query.edit_message_text(get_text("msg_backup_not_in_catalog", lang), reply_markup=await main_menu_keyboard(lang))
+        return
+    server_config = SERVERS[entry["server_id"]]
+
+    if action == "backup_verify":
+        await query.edit_message_text(get_text("msg_verifying_backup", lang))
+        async with EXECUTOR.slot():
+            await verify_backup(server_config, entry)
+        entry = STORAGE.get_backup(entry["id"]) or entry
+    if action in ("backup_restore_confirm", "backup_restore") and not is_backup_restorable(server_config, entry):
+        # The button is hidden for these, but a verification may have finished since it was shown.
+        await backup_details_menu(query, lang, entry)
+        return
+    if action == "backup_restore_confirm":
+        keyboard = [
+            [InlineKeyboardButton(get_text("btn_confirm_restore", lang), callback_data=f"backup_restore:{entry['id']}")],
+            [InlineKeyboardButton(get_text("btn_cancel", lang), callback_data=f"backup_pick:{entry['id']}")],
+        ]
+        text = get_text("msg_confirm_restore_catalog", lang, file=html.escape(os.path.basename(entry["path"])))
+        await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode=ParseMode.HTML)
+        return
+    if action == "backup_restore":
+        if EXECUTOR.is_busy(entry["server_id"]):
+            await query.edit_message_text(get_text("msg_server_busy_queued", lang, server_name=server_config['name']))
+        async with EXECUTOR.exclusive(entry["server_id"]):
+            await restore_catalog_backup(server_config, entry, ProgressReporter(query, lang), lang)
+        return
+    await backup_details_menu(query, lang, entry)
+
+SNAPSHOT_MANIFEST_PATTERN = re.compile(r"(sha256sums?|checksums?)(\.txt)?$|\.sha256$", re.IGNORECASE)
+SHA256_LINE_PATTERN = re.compile(r"^([0-9a-fA-F]{64})(?:\s+\*?(\S+))?\s*$")
+
+def fetch_snapshot_checksums(assets: list[dict], headers: dict) -> dict[str, str]:
+    """Collects expected SHA-256 digests by asset name from checksum assets and GitHub's own asset digests."""
+    checksums = {}
+    for asset in assets:
+        digest = asset.get("digest") or ""
+        if digest.startswith("sha256:"):
+            checksums[asset["name"]] = digest.split(":", 1)[1].lower()
+
+    for manifest in (asset for asset in assets if SNAPSHOT_MANIFEST_PATTERN.search(asset.get("name", ""))):
+        try:
+            response = requests.get(manifest["browser_download_url"], timeout=15, headers=headers)
+            response.raise_for_status()
+        except Exception as e:
+            logger.warning(f"Could not download checksum manifest {manifest['name']}: {e}")
+            continue
+        for line in response.text.splitlines():
+            match = SHA256_LINE_PATTERN.match(line.strip())
+            if not match:
+                continue
+            # A per-file "<name>.sha256" may hold just the digest.
+            name = match.group(2) or re.sub(r"\.sha256$", "", manifest["name"], flags=re.IGNORECASE)
+            checksums[os.path.basename(name)] = match.group(1).lower()
+    return checksums
 
 def get_latest_snapshot_from_github() -> list[dict] | None:
     """
     Fetches snapshot asset information from GitHub.
     Handles both single .tar.gz files and multi-part archives (.part-aa, .part-ab, etc.).
+    Each returned asset gets a "sha256" key when the release publishes a checksum for it.
     """
     try:
         config = get_config()
         github_token = config.get("github_token")
         headers = {"Authorization": f"token {github_token}"} if github_token else {}
         
-        response = requests.get(GITHUB_SNAPSHOT_URL, timeout=15, headers=headers)
-        response.raise_for_status()
-        data = response.json()
+        data = GITHUB_API.get_json(GITHUB_SNAPSHOT_URL, headers)
         assets = data.get("assets", [])
+        archives = [asset for asset in assets if not SNAPSHOT_MANIFEST_PATTERN.search(asset.get("name", ""))]
 
-        snapshot_parts = [asset for asset in assets if ".part-" in asset.get("name", "")]
+        snapshot_parts = [asset for asset in archives if ".part-" in asset.get("name", "")]
         
         if snapshot_parts:
             snapshot_parts.sort(key=lambda x: x['name'])
             logger.info(f"Found {len(snapshot_parts)} snapshot parts.")
-            return snapshot_parts
-            
-        single_file = next((asset for asset in assets if asset.get("name", "").endswith(".tar.gz")), None)
-        if single_file:
+        else:
+            single_file = next((asset for asset in archives if asset.get("name", "").endswith(".tar.gz")), None)
+            if not single_file:
+                return None
             logger.info("Found a single .tar.gz snapshot file.")
-            return [single_file]
+            snapshot_parts = [single_file]
+
+        checksums = fetch_snapshot_checksums(assets, headers)
+        for asset in snapshot_parts:
+            asset["sha256"] = checksums.get(asset["name"])
+        logger.info(f"Checksums available for {sum(1 for asset in snapshot_parts if asset['sha256'])} of {len(snapshot_parts)} snapshot assets.")
+        return snapshot_parts
 
     except Exception as e:
         logger.error(f"Error getting snapshot from GitHub: {e}", exc_info=True)
     
     return None
 
+async def check_snapshot_disk_space(server_config: dict, db_path: str) -> tuple[int, int, int] | None:
+    """Returns (free bytes next to the DB, free bytes in the staging dir, current DB size), or None if unknown."""
+    paths = " ".join(shlex.quote(path) for path in (os.path.dirname(db_path), SNAPSHOT_STAGING_DIR))
+    df_cmd = (
+        f"for p in {paths}; do while [ ! -e \"$p\" ]; do p=$(dirname \"$p\"); done; "
+        f"df -PB1 \"$p\" | awk 'NR==2 {{print $4}}'; done; "
+        f"du -sb {shlex.quote(db_path)} 2>/dev/null | cut -f1"
+    )
+    returncode, stdout, _ = await execute_command(server_config, df_cmd)
+    values = [int(value) for value in stdout.split() if value.isdigit()]
+    if returncode != 0 or len(values) < 2:
+        return None
+    return values[0], values[1], values[2] if len(values) > 2 else 0
+
+async def download_release_asset(server_config: dict, asset: dict, directory: str, on_line, file_name: str | None = None) -> tuple[bool, str]:
+    """Downloads one GitHub release asset into directory on a server and checks its SHA-256.
+
+    Whatever is already on disk is kept and only the rest is requested with an HTTP range (curl -C). The digest
+    is computed in the same pass by feeding the existing prefix and the newly downloaded bytes to sha256sum,
+    so the file is not read twice. Returns (ok, error).
+
+    Files are named by AssetCache.file_name, which changes whenever the asset is re-uploaded (e.g. under the
+    fixed "Snap" tag), so a leftover of an older upload is deleted instead of being resumed into a corrupt file.
+    """
+    file_name = file_name or AssetCache.file_name(asset)
+    path = os.path.join(directory, file_name)
+    size = asset.get("size") or 0
+    expected_sha256 = asset.get("sha256")
+    # Without a known size always ask for the rest; the server answers 416 if there is nothing left.
+    want_more = f'[ "$n" -lt {size} ]' if size else "true"
+    script = (
+        f"mkdir -p {shlex.quote(directory)}; f={shlex.quote(path)}; "
+        f"find {shlex.quote(directory)} -maxdepth 1 -type f -name {shlex.quote('?' * 16 + '-' + asset['name'])} ! -name {shlex.quote(file_name)} -delete; "
+        f"n=$(stat -c %s \"$f\" 2>/dev/null || echo 0); "
+        + (f"if [ \"$n\" -gt {size} ]; then rm -f \"$f\"; n=0; fi; " if size else "")
+        + "echo \"resume-offset=$n\" >&2; "
+        f"{{ cat \"$f\" 2>/dev/null; if {want_more}; then "
+        f"curl -fL --connect-timeout 30 --speed-limit 1024 --speed-time 60 -C \"$n\" {shlex.quote(asset['browser_download_url'])} | tee -a \"$f\"; "
+        f"fi; }} | sha256sum"
+    )
+
+    error = ""
+    for attempt in range(1, SNAPSHOT_DOWNLOAD_RETRIES + 1):
+        returncode, stdout, stderr = await execute_command(server_config, f"bash -o pipefail -c {shlex.quote(script)}", on_line=on_line)
+        digest = stdout.split()[0] if stdout.split() else ""
+        if returncode == 0 and (not expected_sha256 or digest == expected_sha256):
+            logger.info(f"Downloaded {asset['name']} to '{server_config['name']}' (sha256 {digest}{', verified' if expected_sha256 else ''}).")
+            return True, ""
+        if returncode == 0:
+            error = f"SHA-256 mismatch for {asset['name']}: expected {expected_sha256}, got {digest}"
+            await execute_command(server_config, f"rm -f {shlex.quote(path)}")
+        else:
+            error = stderr
+        logger.warning(f"Download of {asset['name']} failed (attempt {attempt}/{SNAPSHOT_DOWNLOAD_RETRIES}): {error.strip()[-300:]}")
+        if attempt < SNAPSHOT_DOWNLOAD_RETRIES:
+            await asyncio.sleep(SNAPSHOT_DOWNLOAD_RETRY_DELAY_SECONDS * attempt)
+    return False, error
+
+async def download_release_assets(server_config: dict, assets: list[dict], directory: str, progress: ProgressReporter, file_names: list[str] | None = None) -> tuple[list[str] | None, str]:
+    """Downloads release assets into directory on a server, up to SNAPSHOT_DOWNLOAD_CONCURRENCY at a time.
+
+    Returns the downloaded paths in order and an empty error, or None and the first error. Files left behind
+    by a failed run are resumed by the next one, as long as the asset was not re-uploaded in between.
+    """
+    file_names = file_names or [AssetCache.file_name(asset) for asset in assets]
+    semaphore = asyncio.Semaphore(SNAPSHOT_DOWNLOAD_CONCURRENCY)
+
+    async def download(asset: dict, file_name: str) -> tuple[bool, str]:
+        async with semaphore:
+            return await download_release_asset(server_config, asset, directory, progress.part_line_handler(file_name), file_name)
+
+    results = await asyncio.gather(*(download(asset, file_name) for asset, file_name in zip(assets, file_names)))
+    errors = [error for ok, error in results if not ok]
+    if errors:
+        return None, errors[0]
+    return [os.path.join(directory, file_name) for file_name in file_names], ""
+
+async def download_snapshot_parts(server_config: dict, snapshot_assets: list[dict], progress: ProgressReporter, lang: str) -> tuple[list[str] | None, str]:
+    """Downloads the snapshot parts into SNAPSHOT_STAGING_DIR on the server."""
+    total_size = sum(asset.get("size", 0) for asset in snapshot_assets) or None
+    await progress.step(get_text("msg_downloading_snapshot_parts", lang, count=len(snapshot_assets), concurrency=SNAPSHOT_DOWNLOAD_CONCURRENCY), total_bytes=total_size)
+    return await download_release_assets(server_config, snapshot_assets, SNAPSHOT_STAGING_DIR, progress)
+
+async def extract_snapshot(server_config: dict, source_cmd: str | None, progress: ProgressReporter, stdin_paths: list[str] | None = None) -> tuple[int, str]:
+    """Pipes the archive produced by source_cmd, or the bot-host files in stdin_paths, straight into tar on the target host."""
+    pipeline = f"tar -xzf - -C / {TAR_CHECKPOINT_ARGS}"
+    if source_cmd:
+        pipeline = f"{source_cmd} | {pipeline}"
+    returncode, _, stderr = await execute_command(
+        server_config, f"bash -o pipefail -c {shlex.quote(pipeline)}", on_line=progress.on_line, stdin_paths=stdin_paths
+    )
+    return returncode, stderr
+
 async def restore_github_db_action(update, context, lang, server_id):
     query = update.callback_query
     server_config = SERVERS[server_id]
+    progress = ProgressReporter(query, lang)
+    db_path = get_db_path(server_config)
 
-    await query.edit_message_text(get_text("msg_fetching_github_snapshot_url", lang), parse_mode=ParseMode.HTML)
+    await progress.step(get_text("msg_fetching_github_snapshot_url", lang))
     
     snapshot_assets = await asyncio.to_thread(get_latest_snapshot_from_github)
 
     if not snapshot_assets:
-        await query.edit_message_text(get_text("msg_failed_to_fetch_github_snapshot_url", lang), parse_mode=ParseMode.HTML)
+        await progress.finish(get_text("msg_failed_to_fetch_github_snapshot_url", lang))
         return
 
-    downloaded_files = []
-    temp_dir = "/tmp"
-    
-    for asset in snapshot_assets:
-        asset_name = asset['name']
-        asset_url = asset['browser_download_url']
-        asset_path = os.path.join(temp_dir, asset_name)
-        downloaded_files.append(asset_path)
-        
-        await query.edit_message_text(get_text("msg_downloading_snapshot", lang, filename=asset_name), parse_mode=ParseMode.HTML)
-        
-        wget_cmd = f"wget -q -O {shlex.quote(asset_path)} {shlex.quote(asset_url)}"
-        wget_returncode, _, wget_stderr = await execute_command(server_config, wget_cmd)
-        
-        if wget_returncode != 0:
-            await query.edit_message_text(get_text("msg_failed_to_download_snapshot", lang, error=wget_stderr), parse_mode=ParseMode.HTML)
+    # The DB directory has to hold the unpacked snapshot, and the old DB is deleted first.
+    snapshot_size = sum(asset.get("size", 0) for asset in snapshot_assets)
+    unpacked_size = int(snapshot_size * SNAPSHOT_EXPANSION_FACTOR)
+    disk_space = await check_snapshot_disk_space(server_config, db_path)
+    if disk_space:
+        data_free, staging_free, db_size = disk_space
+        if data_free + db_size < unpacked_size:
+            await progress.finish(get_text("msg_not_enough_disk_space", lang, path=os.path.dirname(db_path), required=format_bytes(unpacked_size), available=format_bytes(data_free + db_size)))
+            return
+        staging_fits = staging_free >= snapshot_size
+    else:
+        logger.warning(f"Could not check free disk space on '{server_config['name']}', skipping the preflight.")
+        staging_fits = True
+
+    use_stream = SNAPSHOT_RESTORE_MODE == "stream"
+    async with AsyncExitStack() as stack:
+        downloaded_files = []
+        cached_paths = None
+        if use_stream and ASSET_CACHE.fits(snapshot_assets):
+            # Downloaded once to the bot host and shared by every server restored from the same snapshot.
+            await progress.step(get_text("msg_caching_snapshot", lang, size=format_bytes(snapshot_size)), total_bytes=snapshot_size)
+            cached_paths, cache_error = await stack.enter_async_context(ASSET_CACHE.checkout(snapshot_assets, progress))
+            if cached_paths is None:
+                logger.warning(f"Could not cache the snapshot on the bot host, '{server_config['name']}' will download it itself: {cache_error.strip()[-500:]}")
+        if not use_stream:
+            if not staging_fits:
+                await progress.finish(get_text("msg_not_enough_disk_space", lang, path=SNAPSHOT_STAGING_DIR, required=format_bytes(snapshot_size), available=format_bytes(staging_free)))
+                return
+            downloaded_files, download_error = await download_snapshot_parts(server_config, snapshot_assets, progress, lang)
+            if downloaded_files is None:
+                await progress.finish(get_text("msg_failed_to_download_snapshot", lang, error=command_error_excerpt(download_error)))
+                return
+
+        await progress.step(get_text("msg_stopping_node_for_restore", lang))
+        stop_returncode, _, stop_stderr = await execute_command(server_config, "sudo systemctl stop humanode-peer.service")
+        if stop_returncode != 0:
+            await progress.finish(get_text("msg_failed_to_stop_node", lang, error=command_error_excerpt(stop_stderr)))
             if downloaded_files:
                 await execute_command(server_config, f"rm -f {' '.join(map(shlex.quote, downloaded_files))}")
             return
 
-    is_multi_part = len(downloaded_files) > 1 and ".part-" in downloaded_files[0]
-    
-    if is_multi_part:
-        first_part_name = os.path.basename(downloaded_files[0])
-        combined_filename = re.sub(r'\\.part-aa$', '', first_part_name, flags=re.IGNORECASE)
-        final_archive_path = os.path.join(temp_dir, combined_filename)
-        
-        await query.edit_message_text(get_text("msg_combining_snapshot_parts", lang, filename=combined_filename), parse_mode=ParseMode.HTML)
-        
-        downloaded_files.sort() 
-        cat_cmd = f"cat {' '.join(map(shlex.quote, downloaded_files))} > {shlex.quote(final_archive_path)}"
-        combine_returncode, _, combine_stderr = await execute_command(server_config, cat_cmd)
-
-        if combine_returncode != 0:
-            await query.edit_message_text(get_text("msg_failed_to_combine_snapshot", lang, error=combine_stderr), parse_mode=ParseMode.HTML)
-            await execute_command(server_config, f"rm -f {' '.join(map(shlex.quote, downloaded_files))}")
+        await progress.step(get_text("msg_deleting_old_db", lang))
+        rm_returncode, _, rm_stderr = await execute_command(server_config, f"rm -rf {shlex.quote(db_path)}")
+        if rm_returncode != 0:
+            await progress.finish(get_text("msg_failed_to_delete_db", lang, error=command_error_excerpt(rm_stderr)))
+            await execute_command(server_config, "sudo systemctl start humanode-peer.service")
+            if downloaded_files:
+                await execute_command(server_config, f"rm -f {' '.join(map(shlex.quote, downloaded_files))}")
             return
-    else:
-        final_archive_path = downloaded_files[0]
 
-    await query.edit_message_text(get_text("msg_stopping_node_for_restore", lang), parse_mode=ParseMode.HTML)
-    stop_returncode, _, stop_stderr = await execute_command(server_config, "sudo systemctl stop humanode-peer.service")
-    if stop_returncode != 0:
-        await query.edit_message_text(get_text("msg_failed_to_stop_node", lang, error=stop_stderr), parse_mode=ParseMode.HTML)
-        await execute_command(server_config, f"rm -f {shlex.quote(final_archive_path)} {' '.join(map(shlex.quote, downloaded_files))}")
-        return
-
-    db_path = "/root/.humanode/workspaces/default/substrate-data/chains/humanode_mainnet/db/full"
-    await query.edit_message_text(get_text("msg_deleting_old_db", lang), parse_mode=ParseMode.HTML)
-    rm_returncode, _, rm_stderr = await execute_command(server_config, f"rm -rf {db_path}")
-    if rm_returncode != 0:
-        await query.edit_message_text(get_text("msg_failed_to_delete_db", lang, error=rm_stderr), parse_mode=ParseMode.HTML)
-        await execute_command(server_config, "sudo systemctl start humanode-peer.service")
-        await execute_command(server_config, f"rm -f {shlex.quote(final_archive_path)} {' '.join(map(shlex.quote, downloaded_files))}")
-        return
-
-    await query.edit_message_text(get_text("msg_unpacking_snapshot", lang), parse_mode=ParseMode.HTML)
-    restore_cmd = f"tar -xzvf {shlex.quote(final_archive_path)} -C /"
-    restore_returncode, _, restore_stderr = await execute_command(server_config, restore_cmd)
-    if restore_returncode != 0:
-        await query.edit_message_text(get_text("msg_failed_to_unpack_snapshot", lang, error=restore_stderr), parse_mode=ParseMode.HTML)
-    else:
-        await query.edit_message_text(get_text("msg_restore_successful", lang), parse_mode=ParseMode.HTML)
-
-    await query.edit_message_text(get_text("msg_starting_node_after_restore", lang), parse_mode=ParseMode.HTML)
-    start_returncode, _, start_stderr = await execute_command(server_config, "sudo systemctl start humanode-peer.service")
-    if start_returncode != 0:
-        await query.edit_message_text(get_text("msg_failed_to_start_node_after_restore", lang, error=start_stderr), parse_mode=ParseMode.HTML)
+        restore_returncode, restore_stderr = 1, ""
+        if use_stream:
+            await progress.step(get_text("msg_streaming_snapshot", lang, size=format_bytes(snapshot_size)))
+            if cached_paths:
+                restore_returncode, restore_stderr = await extract_snapshot(server_config, None, progress, stdin_paths=cached_paths)
+            else:
+                urls = " ".join(shlex.quote(asset['browser_download_url']) for asset in snapshot_assets)
+                curl_cmd = f"curl -fsSL --fail-early --connect-timeout 30 --speed-limit 1024 --speed-time 120 {urls}"
+                restore_returncode, restore_stderr = await extract_snapshot(server_config, curl_cmd, progress)
+            if restore_returncode != 0:
+                logger.warning(f"Streaming snapshot restore failed on '{server_config['name']}', falling back to a staged download: {restore_stderr.strip()[-500:]}")
+                await execute_command(server_config, f"rm -rf {shlex.quote(db_path)}")
+                if staging_fits:
+                    await progress.step(get_text("msg_stream_restore_failed_fallback", lang))
+                    downloaded_files, download_error = await download_snapshot_parts(server_config, snapshot_assets, progress, lang)
+                    if downloaded_files is None:
+                        downloaded_files, restore_stderr = [], download_error
+                else:
+                    restore_stderr = get_text("msg_not_enough_disk_space", lang, path=SNAPSHOT_STAGING_DIR, required=format_bytes(snapshot_size), available=format_bytes(staging_free))
+
+        if downloaded_files:
+            await progress.step(get_text("msg_unpacking_snapshot", lang))
+            cat_cmd = f"cat {' '.join(map(shlex.quote, downloaded_files))}"
+            restore_returncode, restore_stderr = await extract_snapshot(server_config, cat_cmd, progress)
+
+        await progress.step(get_text("msg_starting_node_after_restore", lang))
+        start_returncode, _, start_stderr = await execute_command(server_config, "sudo systemctl start humanode-peer.service")
+
+        if downloaded_files:
+            await execute_command(server_config, f"rm -f {' '.join(map(shlex.quote, downloaded_files))}")
 
-    cleanup_files = downloaded_files + ([final_archive_path] if is_multi_part else [])
-    await execute_command(server_config, f"rm -f {' '.join(map(shlex.quote, cleanup_files))}")
+        if restore_returncode != 0:
+            await progress.finish(get_text("msg_failed_to_unpack_snapshot", lang, error=command_error_excerpt(restore_stderr)))
+        elif start_returncode != 0:
+            await progress.finish(get_text("msg_failed_to_start_node_after_restore", lang, error=command_error_excerpt(start_stderr)))
+        else:
+            await progress.finish(get_text("msg_restore_successful", lang))
 
 
 async def get_element_screenshot_action(update, context, lang, server_id):
@@ -1151,19 +4171,13 @@ async def get_element_screenshot_action(update, context, lang, server_id):
 
     await query.edit_message_text(get_text("msg_taking_element_screenshot", lang, server_name=server_name))
     
-    driver = create_selenium_driver()
-    if not driver:
-        await query.edit_message_text(get_text("msg_error_selenium_not_initialized", lang))
-        return
-
-    screenshot_path = None
-    try:
+    async with BROWSER_POOL.session() as driver:
+        if not driver:
+            await query.edit_message_text(get_text("msg_error_selenium_not_initialized", lang))
+            return
         screenshot_path = await asyncio.to_thread(
-            take_element_screenshot, driver, url, "//div[contains(@class, 'css-ak0d3g')]"
+            take_element_screenshot, driver, url, "//div[contains(@class, 'css-ak0d3g')]", server_name
         )
-    finally:
-        if driver:
-            driver.quit()
     
     if screenshot_path and os.path.exists(screenshot_path):
         try:
@@ -1178,10 +4192,18 @@ async def get_element_screenshot_action(update, context, lang, server_id):
     else:
         await query.edit_message_text(get_text("msg_failed_to_take_screenshot", lang))
 
-def take_element_screenshot(driver: webdriver.Chrome, url: str, xpath: str) -> str | None:
+def save_element_error_screenshot(driver: webdriver.Chrome):
+    try:
+        driver.save_screenshot("/root/selenium_error_screenshot_element.png")
+    except Exception as dump_e:
+        logger.error(f"Failed to save error screenshot: {dump_e}")
+
+def take_element_screenshot(driver: webdriver.Chrome, url: str, xpath: str, server_name: str = "default") -> str | None:
     screenshot_path = "/root/element_screenshot.png"
     try:
-        wait = WebDriverWait(driver, 90) # Increased wait time to 90s
+        timeout = PAGE_LOAD_TIMES.timeout_for(server_name)
+        wait = WebDriverWait(driver, timeout)
+        started_at = time.monotonic()
         driver.get(url)
         
         # Wait for dashboard to be clickable and click it
@@ -1190,19 +4212,24 @@ def take_element_screenshot(driver: webdriver.Chrome, url: str, xpath: str) -> s
         
         # Wait for the target element to be visible instead of a fixed sleep
         element_to_capture = wait.until(EC.visibility_of_element_located((By.XPATH, xpath)))
-        
-        # A small extra delay can sometimes help ensure everything is rendered
-        time.sleep(10) 
-        
+
+        remaining_timeout = max(1.0, timeout - (time.monotonic() - started_at))
+        if wait_for_timers_ready(driver, element_to_capture, remaining_timeout):
+            PAGE_LOAD_TIMES.record(server_name, time.monotonic() - started_at)
+        else:
+            PAGE_LOAD_TIMES.forget(server_name)
+
         element_to_capture.screenshot(screenshot_path)
         logger.info(f"Successfully captured element screenshot to {screenshot_path}")
         return screenshot_path
+    except TimeoutException as e:
+        PAGE_LOAD_TIMES.forget(server_name)
+        logger.error(f"Timed out taking element screenshot: {e}", exc_info=True)
+        save_element_error_screenshot(driver)
+        return None
     except Exception as e:
         logger.error(f"Failed to take element screenshot: {e}", exc_info=True)
-        try:
-            driver.save_screenshot("/root/selenium_error_screenshot_element.png")
-        except Exception as dump_e:
-            logger.error(f"Failed to save error screenshot: {dump_e}")
+        save_element_error_screenshot(driver)
         return None
 
 # --- Add Server Conversation ---
@@ -1277,6 +4304,7 @@ async def get_server_key_path(update: Update, context: ContextTypes.DEFAULT_TYPE
     }
     
     if save_servers(servers):
+        CHECK_SCHEDULER.reschedule_all()
         await update.message.reply_text(get_text("msg_server_added_success", lang, server_name=new_server_data['name']), parse_mode=ParseMode.HTML)
     else:
         await update.message.reply_text(get_text("msg_server_save_failed", lang))
@@ -1301,9 +4329,20 @@ def main():
             BotCommand("/start", "Start the bot"),
             BotCommand("/menu", "Show the main menu"),
         ])
-        application.job_queue.run_repeating(periodic_bioauth_check, interval=timedelta(minutes=JOB_QUEUE_INTERVAL_MINUTES), first=10)
+        CHECK_SCHEDULER.start(application.job_queue)
+        await import_backups_into_catalog()
+        if BACKUP_VERIFY_INTERVAL_HOURS > 0:
+            application.job_queue.run_repeating(verify_backup_catalog, interval=timedelta(hours=BACKUP_VERIFY_INTERVAL_HOURS), first=timedelta(minutes=10))
+        if AGENT_LISTEN_PORT:
+            await AGENT_HUB.start(application.bot)
+
+    async def post_shutdown(application: Application):
+        await AGENT_HUB.close()
+        await BROWSER_POOL.close()
+        await SSH_POOL.close_all()
+        STATE_STORE.flush()
 
-    application = Application.builder().token(TOKEN).post_init(post_init).build()
+    application = Application.builder().token(TOKEN).post_init(post_init).post_shutdown(post_shutdown).build()
 
     settings_conv_handler = ConversationHandler(
         entry_points=[CallbackQueryHandler(edit_setting_prompt, pattern=r"^edit_setting_")],
@@ -1333,9 +4372,13 @@ def main():
     application.add_handler(CallbackQueryHandler(set_language, pattern=r"^set_lang_"))
     application.add_handler(CallbackQueryHandler(select_server, pattern=r"^select_server_"))
     application.add_handler(CallbackQueryHandler(notification_settings_menu, pattern="^notification_settings$"))
+    # Handlers that reach servers don't block the update queue: EXECUTOR decides what runs concurrently,
+    # so a tap is never stuck behind another server's restore or a periodic check holding a server lock.
+    application.add_handler(CallbackQueryHandler(handle_fleet_action, pattern=r"^fleet_(menu|confirm:|run:)", block=False))
+    application.add_handler(CallbackQueryHandler(handle_backup_catalog_action, pattern=r"^backup_(list|pick|verify|restore_confirm|restore):", block=False))
     application.add_handler(settings_conv_handler)
     application.add_handler(add_server_conv_handler)
-    application.add_handler(CallbackQueryHandler(handle_generic_action))
+    application.add_handler(CallbackQueryHandler(handle_generic_action, block=False))
 
     logger.info("Bot handlers added. Starting polling...")
     application.run_polling(allowed_updates=Update.ALL_TYPES)
@@ -0,0 +1,78 @@
+"""A stand-in for the humanode-peer JSON-RPC endpoint, for trying the RPC timer source locally.
+
+Run it next to the bot and point a server's "rpc_url" at it:
+
+    python3 mock_node_rpc.py --port 9944 --bioauth-minutes 45 --epoch-minutes 120
+
+Pass --bioauth-minutes 0 to report the node as not bioauthenticated.
+"""
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import node_rpc
+
+
+class MockNode:
+    def __init__(self, bioauth_minutes: int, epoch_minutes: int):
+        self.started_at = time.time()
+        self.expires_at_ms = int((self.started_at + bioauth_minutes * 60) * 1000) if bioauth_minutes > 0 else None
+        epoch_slots = node_rpc.EPOCH_DURATION_MINUTES * 60 // node_rpc.BABE_SLOT_DURATION_SECONDS
+        self.epoch_index = 1000
+        self.genesis_slot = 280_000_000
+        slots_left = epoch_minutes * 60 // node_rpc.BABE_SLOT_DURATION_SECONDS
+        self.start_slot = self.genesis_slot + (self.epoch_index + 1) * epoch_slots - slots_left
+
+    def current_slot(self) -> int:
+        return self.start_slot + int((time.time() - self.started_at) // node_rpc.BABE_SLOT_DURATION_SECONDS)
+
+    def handle(self, call: dict) -> dict:
+        method, params = call.get("method"), call.get("params") or []
+        if method == "bioauth_status":
+            result = {"Active": {"expires_at": self.expires_at_ms}} if self.expires_at_ms else "Inactive"
+        elif method == "state_getStorage" and params:
+            storage = {
+                node_rpc.BABE_EPOCH_INDEX_KEY: node_rpc.encode_u64(self.epoch_index),
+                node_rpc.BABE_GENESIS_SLOT_KEY: node_rpc.encode_u64(self.genesis_slot),
+                node_rpc.BABE_CURRENT_SLOT_KEY: node_rpc.encode_u64(self.current_slot()),
+            }
+            result = storage.get(params[0])
+        elif method == "chain_getHeader":
+            result = {"number": hex(self.current_slot() - self.genesis_slot)}
+        else:
+            return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": -32601, "message": "Method not found"}}
+        return {"jsonrpc": "2.0", "id": call.get("id"), "result": result}
+
+
+def make_handler(node: MockNode):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            response = [node.handle(call) for call in body] if isinstance(body, list) else node.handle(body)
+            payload = json.dumps(response).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9944)
+    parser.add_argument("--bioauth-minutes", type=int, default=60)
+    parser.add_argument("--epoch-minutes", type=int, default=120)
+    args = parser.parse_args()
+
+    node = MockNode(args.bioauth_minutes, args.epoch_minutes)
+    server = HTTPServer((args.host, args.port), make_handler(node))
+    print(f"Mock humanode-peer RPC listening on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
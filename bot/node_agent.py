@@ -0,0 +1,223 @@
+"""An optional agent that runs next to humanode-peer and pushes state changes to the bot.
+
+The agent watches the node and tunnel units, the tunnel URL and the bioauth/epoch timers locally and sends
+only what changed since its last message. The bot listens on `agent_listen_port` and keeps using SSH for
+any server whose agent is not connected. Run it on the node server with the same files as the bot:
+
+    python3 node_agent.py --server-id server1 --bot-host 203.0.113.5 --bot-port 8790 \\
+        --secret-file /etc/humanode-bot-agent.secret
+
+The secret file holds the same value as the server's "agent_secret" in servers.json. Every message is
+signed with it, so the port can be reachable from the internet without accepting forged state.
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import logging
+import re
+import socket
+import subprocess
+import time
+import urllib.request
+
+import node_probe
+import node_rpc
+
+AGENT_PROTOCOL = 1
+MAX_MESSAGE_BYTES = 64 * 1024
+MAX_CLOCK_SKEW_SECONDS = 120
+# The bot treats an agent as gone after this long without a message, so idle agents send empty deltas.
+HEARTBEAT_SECONDS = 30
+TUNNEL_URL_PATTERN = re.compile(r"url=(wss://[^\s]+htunnel\.app)")
+
+logger = logging.getLogger("node_agent")
+
+
+def sign_message(secret: bytes, server_id: str, sequence: int, delta: dict, full: bool) -> bytes:
+    """Returns one newline-terminated message. With full=True the delta is the complete state."""
+    body = json.dumps(
+        {"v": AGENT_PROTOCOL, "server": server_id, "seq": sequence, "time": time.time(), "full": full, "delta": delta},
+        separators=(",", ":"),
+    )
+    mac = hmac.new(secret, body.encode(), hashlib.sha256).hexdigest()
+    return (json.dumps({"body": body, "mac": mac}, separators=(",", ":")) + "\n").encode()
+
+
+def verify_message(line: bytes, secret_for) -> dict:
+    """Checks a message's signature and age and returns its body.
+
+    secret_for(server_id) returns the shared secret as bytes, or None for an unknown server.
+    Raises ValueError for anything that is not a valid, current message.
+    """
+    try:
+        envelope = json.loads(line)
+        body = envelope["body"]
+        message = json.loads(body)
+        server_id = message["server"]
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        raise ValueError(f"Malformed agent message: {e}") from e
+    secret = secret_for(server_id)
+    if not secret:
+        raise ValueError(f"No agent secret configured for server '{server_id}'")
+    expected = hmac.new(secret, body.encode(), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected, str(envelope.get("mac", ""))):
+        raise ValueError(f"Bad signature on agent message for server '{server_id}'")
+    if message.get("v") != AGENT_PROTOCOL:
+        raise ValueError(f"Unsupported agent protocol {message.get('v')!r}")
+    if abs(time.time() - float(message.get("time", 0))) > MAX_CLOCK_SKEW_SECONDS:
+        raise ValueError(f"Agent message for server '{server_id}' is too old or its clock is off")
+    return message
+
+
+def read_timers(rpc_url: str) -> dict | None:
+    """Returns the bioauth expiry and the epoch end as Unix times, which stay constant between renewals.
+
+    bioauth_expires_at is None when the node is not bioauthenticated.
+    """
+    payload = json.dumps(node_rpc.build_timer_request()).encode()
+    request = urllib.request.Request(rpc_url, data=payload, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            responses = json.loads(response.read())
+        now = time.time()
+        bioauth_seconds, epoch_minutes = node_rpc.parse_timer_response(responses, now)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Could not read timers from {rpc_url}: {e}")
+        return None
+    return {
+        "bioauth_expires_at": int(now + bioauth_seconds) if bioauth_seconds > 0 else None,
+        # Epoch minutes are rounded down, so snap the end to the minute to keep it stable between readings.
+        "epoch_end_at": int((now + epoch_minutes * 60) // 60 * 60),
+    }
+
+
+class NodeWatcher:
+    """Collects the agent state with the node probe, running the costly parts less often."""
+
+    def __init__(self, binary_path: str, data_path: str, rpc_url: str, slow_interval: float, timer_interval: float):
+        self.binary_path = binary_path
+        self.data_path = data_path
+        self.rpc_url = rpc_url
+        self.slow_interval = slow_interval
+        self.timer_interval = timer_interval
+        self.state: dict = {"units": {}, "tunnel_url": None, "version": None, "disk": None, "timers": None}
+        self._tunnel_cursor = None
+        self._tunnel_invocation = None
+        self._slow_at = 0.0
+        self._timers_at = 0.0
+
+    def poll(self) -> dict:
+        now = time.monotonic()
+        slow = now >= self._slow_at
+        argv = node_probe.build_probe_argv(
+            self.binary_path, self.data_path, 0, self._tunnel_cursor, version=slow, disk=slow
+        )
+        try:
+            result = subprocess.run(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=120)
+            document = node_probe.parse_probe_output(result.stdout.decode(errors="replace"))
+        except (OSError, subprocess.TimeoutExpired, ValueError) as e:
+            logger.warning(f"Node probe failed: {e}")
+            return self.state
+
+        self.state["units"] = document["units"]
+        invocation_id = document["units"].get("tunnel", {}).get("InvocationID") or None
+        if invocation_id != self._tunnel_invocation:
+            # The tunnel restarted, so the URL it logged before is gone.
+            self._tunnel_invocation = invocation_id
+            self.state["tunnel_url"] = None
+        for line in document["tunnel_journal"]["lines"]:
+            match = TUNNEL_URL_PATTERN.search(line)
+            if match:
+                self.state["tunnel_url"] = match.group(1)
+        self._tunnel_cursor = document["tunnel_journal"]["cursor"] or self._tunnel_cursor
+
+        if slow:
+            self.state["version"] = document["version"]
+            self.state["disk"] = document["disk"]
+            self._slow_at = now + self.slow_interval
+        if now >= self._timers_at:
+            self.state["timers"] = read_timers(self.rpc_url)
+            self._timers_at = now + self.timer_interval
+        return self.state
+
+
+class AgentConnection:
+    """Sends state to the bot over one TCP connection and reconnects with backoff when it drops.
+
+    Deltas are relative to what was sent on the current connection, so every new connection starts
+    with the full state and the bot never has to ask for a resync.
+    """
+
+    def __init__(self, host: str, port: int, server_id: str, secret: bytes):
+        self.host = host
+        self.port = port
+        self.server_id = server_id
+        self.secret = secret
+        self._socket: socket.socket | None = None
+        self._sent: dict | None = None
+        self._sent_at = 0.0
+        self._retry_at = 0.0
+        self._backoff = 1.0
+
+    def send(self, state: dict):
+        now = time.monotonic()
+        if self._socket is None:
+            if now < self._retry_at:
+                return
+            try:
+                self._socket = socket.create_connection((self.host, self.port), timeout=10)
+                logger.info(f"Connected to the bot at {self.host}:{self.port}.")
+            except OSError as e:
+                self._retry_at = now + self._backoff
+                logger.warning(f"Cannot reach the bot at {self.host}:{self.port}: {e}. Retrying in {self._backoff:.0f}s.")
+                self._backoff = min(self._backoff * 2, 60)
+                return
+            self._sent = None
+
+        full = self._sent is None
+        delta = dict(state) if full else {key: value for key, value in state.items() if self._sent.get(key) != value}
+        if not delta and not full and now - self._sent_at < HEARTBEAT_SECONDS:
+            return
+        # Milliseconds since the epoch keep the sequence increasing across agent restarts.
+        message = sign_message(self.secret, self.server_id, int(time.time() * 1000), delta, full)
+        try:
+            self._socket.sendall(message)
+        except OSError as e:
+            logger.warning(f"Lost the connection to the bot: {e}")
+            self._socket.close()
+            self._socket = None
+            return
+        self._sent = json.loads(json.dumps(state))
+        self._sent_at = now
+        self._backoff = 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server-id", required=True, help="the server's id in the bot's servers.json")
+    parser.add_argument("--bot-host", required=True)
+    parser.add_argument("--bot-port", type=int, default=8790)
+    parser.add_argument("--secret-file", required=True)
+    parser.add_argument("--binary-path", default="/root/.humanode/workspaces/default/humanode-peer")
+    parser.add_argument("--data-path", default="/root/.humanode/workspaces/default/substrate-data")
+    parser.add_argument("--rpc-url", default=node_rpc.DEFAULT_RPC_URL)
+    parser.add_argument("--interval", type=float, default=5, help="seconds between unit and tunnel checks")
+    parser.add_argument("--timer-interval", type=float, default=60, help="seconds between timer readings")
+    parser.add_argument("--slow-interval", type=float, default=600, help="seconds between version and disk checks")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO)
+    with open(args.secret_file, "r") as f:
+        secret = f.read().strip().encode()
+
+    watcher = NodeWatcher(args.binary_path, args.data_path, args.rpc_url, args.slow_interval, args.timer_interval)
+    connection = AgentConnection(args.bot_host, args.bot_port, args.server_id, secret)
+    while True:
+        started_at = time.monotonic()
+        connection.send(watcher.poll())
+        time.sleep(max(0.0, args.interval - (time.monotonic() - started_at)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""A one-shot health probe for a humanode server: one command in, one compact JSON document out."""
+import json
+import shlex
+
+PROBE_VERSION = 1
+NODE_SERVICE = "humanode-peer.service"
+TUNNEL_SERVICE = "humanode-websocket-tunnel.service"
+UNIT_PROPERTIES = ("ActiveState", "SubState", "InvocationID", "ActiveEnterTimestamp", "MainPID")
+
+# Runs on the server with python3, which ships with every distribution humanode-peer supports. Each part has its
+# own timeout and reports failure as null, so one broken command never hides the rest of the document.
+PROBE_SCRIPT = r"""
+import json, os, shutil, subprocess, sys
+
+args = json.loads(sys.argv[1])
+
+def run(cmd, timeout=20):
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=timeout)
+        return result.returncode, result.stdout.decode(errors="replace")
+    except (OSError, subprocess.TimeoutExpired):
+        return -1, ""
+
+def unit(name):
+    _, out = run(["systemctl", "show", "--no-pager"] + ["-p" + p for p in args["properties"]] + [name])
+    return dict(line.split("=", 1) for line in out.splitlines() if "=" in line)
+
+def disk(path):
+    if not os.path.isdir(path):
+        return None
+    usage = shutil.disk_usage(path)
+    code, out = run(["du", "-sb", path], timeout=60)
+    size = int(out.split()[0]) if code == 0 and out.split() and out.split()[0].isdigit() else None
+    return {"total": usage.total, "free": usage.free, "data_bytes": size}
+
+code, version = run([args["binary"], "-V"]) if args["version"] else (-1, "")
+_, node_log = run(["journalctl", "-u", args["node_unit"], "-n", str(args["journal_lines"]), "--no-pager"]) if args["journal_lines"] else (0, "")
+cursor_args = ["--after-cursor=" + args["tunnel_cursor"]] if args["tunnel_cursor"] else ["-n", "200"]
+_, tunnel_log = run(["journalctl", "-u", args["tunnel_unit"], "--show-cursor", "--no-pager"] + cursor_args)
+tunnel_lines = [line for line in tunnel_log.splitlines() if "url=" in line]
+cursor = next((line[len("-- cursor: "):].strip() for line in reversed(tunnel_log.splitlines()) if line.startswith("-- cursor: ")), None)
+
+print(json.dumps({
+    "probe": args["probe"],
+    "units": {"node": unit(args["node_unit"]), "tunnel": unit(args["tunnel_unit"])},
+    "version": version.strip() if code == 0 and version.strip() else None,
+    "journal": node_log.splitlines(),
+    "tunnel_journal": {"lines": tunnel_lines, "cursor": cursor},
+    "disk": disk(args["data_path"]) if args["disk"] else None,
+}, separators=(",", ":")))
+"""
+
+
+def build_probe_argv(
+    binary_path: str, data_path: str, journal_lines: int, tunnel_cursor: str | None,
+    version: bool = True, disk: bool = True,
+) -> list[str]:
+    """Returns the probe as an argument list. Only tunnel journal entries after tunnel_cursor are read.
+
+    version and disk can be turned off for frequent polling, as `-V` starts the binary and `du` walks the DB.
+    """
+    args = {
+        "probe": PROBE_VERSION,
+        "binary": binary_path,
+        "data_path": data_path,
+        "journal_lines": journal_lines,
+        "node_unit": NODE_SERVICE,
+        "tunnel_unit": TUNNEL_SERVICE,
+        "tunnel_cursor": tunnel_cursor,
+        "properties": list(UNIT_PROPERTIES),
+        "version": version,
+        "disk": disk,
+    }
+    return ["python3", "-c", PROBE_SCRIPT, json.dumps(args, separators=(",", ":"))]
+
+
+def build_probe_command(
+    binary_path: str, data_path: str, journal_lines: int, tunnel_cursor: str | None,
+    version: bool = True, disk: bool = True,
+) -> str:
+    """Returns the shell command that runs the probe; see build_probe_argv."""
+    return shlex.join(build_probe_argv(binary_path, data_path, journal_lines, tunnel_cursor, version, disk))
+
+
+def parse_probe_output(stdout: str) -> dict:
+    """Returns the probe document. Raises ValueError if the output is not a document of this probe version."""
+    lines = [line for line in stdout.splitlines() if line.strip()]
+    if not lines:
+        raise ValueError("The probe printed nothing")
+    try:
+        document = json.loads(lines[-1])
+    except json.JSONDecodeError as e:
+        raise ValueError(f"The probe output is not JSON: {e}") from e
+    if not isinstance(document, dict) or document.get("probe") != PROBE_VERSION:
+        raise ValueError(f"Unexpected probe document: {lines[-1][:200]!r}")
+    for key in ("units", "journal", "tunnel_journal"):
+        if key not in document:
+            raise ValueError(f"The probe document has no '{key}'")
+    return document
+
+
+def unit_is_active(document: dict, unit: str) -> bool:
+    return document["units"].get(unit, {}).get("ActiveState") == "active"
+
+
+def format_unit_state(document: dict, unit: str) -> str:
+    """Renders a unit as e.g. "active (running) since Sat 2026-10-17 01:00:00 UTC, PID 1234"."""
+    properties = document["units"].get(unit, {})
+    text = f"{properties.get('ActiveState', 'unknown')} ({properties.get('SubState', 'unknown')})"
+    if properties.get("ActiveState") == "active" and properties.get("ActiveEnterTimestamp"):
+        text += f" since {properties['ActiveEnterTimestamp']}"
+    if properties.get("MainPID") not in (None, "", "0"):
+        text += f", PID {properties['MainPID']}"
+    return text
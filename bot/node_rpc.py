@@ -0,0 +1,88 @@
+"""JSON-RPC helpers for reading bioauth and epoch timers straight from a humanode-peer node."""
+
+DEFAULT_RPC_URL = "http://127.0.0.1:9944"
+EPOCH_DURATION_MINUTES = 240
+BABE_SLOT_DURATION_SECONDS = 6
+
+# twox128("Babe") + twox128(<item>) storage keys; each value is a SCALE-encoded u64.
+BABE_EPOCH_INDEX_KEY = "0x1cb6f36e027abb2091cfb5110ab5087f38316cbf8fa0da822a20ac1c55bf1be3"
+BABE_GENESIS_SLOT_KEY = "0x1cb6f36e027abb2091cfb5110ab5087f678711d15ebbceba5cd0cea158e6675a"
+BABE_CURRENT_SLOT_KEY = "0x1cb6f36e027abb2091cfb5110ab5087f06155b3cd9a8c9e5e9a23fd5dc13a5ed"
+
+_REQUEST_IDS = {"bioauth_status": 1, "epoch_index": 2, "genesis_slot": 3, "current_slot": 4}
+
+
+def build_timer_request() -> list[dict]:
+    """Returns a JSON-RPC batch that reads everything needed for both timers in one call."""
+    def call(request_id: int, method: str, params: list) -> dict:
+        return {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+
+    return [
+        call(_REQUEST_IDS["bioauth_status"], "bioauth_status", []),
+        call(_REQUEST_IDS["epoch_index"], "state_getStorage", [BABE_EPOCH_INDEX_KEY]),
+        call(_REQUEST_IDS["genesis_slot"], "state_getStorage", [BABE_GENESIS_SLOT_KEY]),
+        call(_REQUEST_IDS["current_slot"], "state_getStorage", [BABE_CURRENT_SLOT_KEY]),
+    ]
+
+
+def build_header_request() -> dict:
+    """Returns a JSON-RPC call for the header of the best block."""
+    return {"jsonrpc": "2.0", "id": 1, "method": "chain_getHeader", "params": []}
+
+
+def parse_block_number(response: dict) -> int:
+    """Returns the block number from a chain_getHeader response. Raises ValueError if it has none."""
+    if not isinstance(response, dict) or "error" in response:
+        raise ValueError(f"chain_getHeader failed: {response!r}")
+    number = (response.get("result") or {}).get("number")
+    if not isinstance(number, str) or not number.startswith("0x"):
+        raise ValueError(f"No block number in header: {response!r}")
+    return int(number, 16)
+
+
+def decode_u64(value: str | None) -> int:
+    if not value or not value.startswith("0x") or len(value) != 18:
+        raise ValueError(f"Not a SCALE-encoded u64: {value!r}")
+    return int.from_bytes(bytes.fromhex(value[2:]), "little")
+
+
+def encode_u64(value: int) -> str:
+    return "0x" + value.to_bytes(8, "little").hex()
+
+
+def parse_timer_response(
+    responses: list[dict],
+    now_seconds: float,
+    epoch_duration_minutes: int = EPOCH_DURATION_MINUTES,
+    slot_duration_seconds: int = BABE_SLOT_DURATION_SECONDS,
+) -> tuple[int, int]:
+    """Turns the batch response into (bioauth_seconds, epoch_minutes).
+
+    bioauth_seconds is -1 when the node is not bioauthenticated, matching the web app scraper.
+    Raises ValueError if the response is incomplete or contains an error.
+    """
+    if not isinstance(responses, list):
+        raise ValueError(f"Expected a JSON-RPC batch response, got: {responses!r}")
+    by_id = {response.get("id"): response for response in responses}
+    results = {}
+    for name, request_id in _REQUEST_IDS.items():
+        response = by_id.get(request_id)
+        if response is None or "error" in response:
+            raise ValueError(f"RPC call '{name}' failed: {response!r}")
+        results[name] = response.get("result")
+
+    bioauth_seconds = -1
+    status = results["bioauth_status"]
+    if isinstance(status, dict) and "Active" in status:
+        remaining = int(status["Active"]["expires_at"] / 1000 - now_seconds)
+        if remaining > 0:
+            bioauth_seconds = remaining
+
+    epoch_slots = epoch_duration_minutes * 60 // slot_duration_seconds
+    epoch_index = decode_u64(results["epoch_index"])
+    genesis_slot = decode_u64(results["genesis_slot"])
+    current_slot = decode_u64(results["current_slot"])
+    epoch_end_slot = genesis_slot + (epoch_index + 1) * epoch_slots
+    epoch_minutes = max(0, int((epoch_end_slot - current_slot) * slot_duration_seconds / 60))
+
+    return bioauth_seconds, epoch_minutes
@@ -0,0 +1,20 @@
+import json
+import os
+import sys
+
+import pytest
+
+BOT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bot")
+sys.path.insert(0, BOT_DIR)
+
+
+@pytest.fixture(scope="session")
+def bot(tmp_path_factory):
+    """The bot module, imported with a throwaway config. Skipped where the bot's dependencies are missing."""
+    for module in ("telegram", "selenium", "webdriver_manager", "pytesseract", "PIL", "requests"):
+        pytest.importorskip(module)
+    config_path = tmp_path_factory.mktemp("config") / "config.json"
+    config_path.write_text(json.dumps({"telegram_bot_token": "test-token", "authorized_user_id": 1}))
+    os.environ["HUMANODE_BOT_CONFIG"] = str(config_path)
+    import humanode_bot
+    return humanode_bot
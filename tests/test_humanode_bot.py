@@ -0,0 +1,163 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+NOW = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+WEEK = 7 * 24 * 3600
+SETTINGS = {"first_warning_minutes": 30, "second_warning_minutes": 10, "alert_interval_minutes": 5}
+
+
+def observe(bot, server_state: dict, observed_at: datetime, bioauth_seconds: int, epoch_minutes: int = -1) -> str:
+    """Feeds one reading to the predictor and stores the deadline, as check_server_bioauth does."""
+    verdict = bot.PREDICTOR.observe(server_state, observed_at, bioauth_seconds, epoch_minutes)
+    if bioauth_seconds > 0:
+        server_state["bioauth_deadline_utc"] = (observed_at + timedelta(seconds=bioauth_seconds)).isoformat()
+    return verdict
+
+
+# --- DeadlinePredictor ---
+def test_readings_that_match_the_deadline_raise_confidence(bot):
+    state = {}
+    assert observe(bot, state, NOW, 3600) == "new"
+    assert observe(bot, state, NOW + timedelta(minutes=30), 1800) == "agree"
+    assert state["prediction_confidence"] == 0.75
+
+
+def test_longer_reading_after_a_partial_window_is_a_renewal(bot):
+    state = {}
+    assert observe(bot, state, NOW, 7200) == "new"
+    assert observe(bot, state, NOW + timedelta(hours=3), WEEK) == "renewed"
+    assert state["bioauth_period_seconds"] == WEEK
+    assert observe(bot, state, NOW + timedelta(hours=4), WEEK - 3600) == "agree"
+
+
+def test_shorter_reading_than_predicted_is_a_contradiction(bot):
+    state = {}
+    observe(bot, state, NOW, WEEK)
+    assert observe(bot, state, NOW + timedelta(hours=1), 3600) == "contradicted"
+    assert state["prediction_confidence"] == 0.25
+    assert state["bioauth_period_seconds"] == WEEK
+
+
+def test_no_bioauth_resets_confidence(bot):
+    state = {"prediction_confidence": 0.9}
+    assert observe(bot, state, NOW, -1, epoch_minutes=60) == "new"
+    assert state["prediction_confidence"] == 0.0
+    assert state["epoch_end_utc"] == (NOW + timedelta(minutes=60)).isoformat()
+
+
+def test_period_is_learned_between_renewals(bot, monkeypatch):
+    start = datetime.now(timezone.utc) - timedelta(days=20)
+    observations = [
+        (start, 7200, -1),                                       # part-way through a window ending at +2h
+        (start + timedelta(hours=3), WEEK, -1),                  # renewed an hour after it ran out
+        (start + timedelta(days=7, hours=5), WEEK - 1800, -1),   # renewed 90 minutes after it ran out
+        (start + timedelta(days=7, hours=6), WEEK - 5400, -1),
+    ]
+
+    class Storage:
+        def get_observations(self, server_id, since):
+            return observations
+
+    monkeypatch.setattr(bot, "STORAGE", Storage())
+    state = {}
+    bot.PREDICTOR.learn_from_history("server1", state)
+    # Late renewals only lengthen the time between them, so the shortest gap is the best estimate.
+    assert state["bioauth_period_seconds"] == WEEK + 3600
+
+
+def test_predicted_epoch_rolls_over(bot):
+    state = {"epoch_end_utc": (NOW - timedelta(minutes=10)).isoformat()}
+    assert bot.PREDICTOR.predicted_epoch_minutes_left(state, NOW) == bot.EPOCH_DURATION_MINUTES - 10
+
+
+# --- next_check_instant ---
+def test_next_check_without_deadline_is_the_next_full_check(bot):
+    next_check = NOW + timedelta(hours=5)
+    assert bot.next_check_instant({"next_check_utc": next_check.isoformat()}, SETTINGS, NOW) == next_check
+    assert bot.next_check_instant({}, SETTINGS, NOW) == NOW
+
+
+def test_next_check_is_the_first_warning_not_yet_sent(bot):
+    deadline = NOW + timedelta(hours=2)
+    state = {"next_check_utc": (NOW + timedelta(days=1)).isoformat(), "bioauth_deadline_utc": deadline.isoformat()}
+    assert bot.next_check_instant(state, SETTINGS, NOW) == deadline - timedelta(minutes=30)
+    state["notified_first"] = True
+    assert bot.next_check_instant(state, SETTINGS, NOW) == deadline - timedelta(minutes=10)
+    state["notified_second"] = True
+    assert bot.next_check_instant(state, SETTINGS, NOW) == deadline
+
+
+def test_next_check_repeats_overdue_alerts(bot):
+    state = {"next_check_utc": (NOW + timedelta(days=1)).isoformat(), "bioauth_deadline_utc": (NOW - timedelta(hours=1)).isoformat()}
+    assert bot.next_check_instant(state, SETTINGS, NOW) == NOW
+    state.update(is_in_alert_mode=True, last_alert_utc=(NOW - timedelta(minutes=2)).isoformat())
+    assert bot.next_check_instant(state, SETTINGS, NOW) == NOW + timedelta(minutes=3)
+
+
+# --- OutputCapture ---
+def test_output_capture_keeps_head_and_tail(bot):
+    capture = bot.OutputCapture(head_lines=2, tail_lines=2)
+    for number in range(10):
+        capture.add(f"line {number}")
+    assert capture.dropped == 6
+    assert capture.text() == "line 0\nline 1\n... [6 lines omitted] ...\nline 8\nline 9\n"
+
+
+def test_output_capture_short_output_is_unchanged(bot):
+    capture = bot.OutputCapture(head_lines=2, tail_lines=2)
+    for number in range(3):
+        capture.add(f"line {number}")
+    assert capture.text() == "line 0\nline 1\nline 2\n"
+    assert bot.OutputCapture().text() == ""
+
+
+def test_output_capture_log_excerpt_is_bounded(bot):
+    capture = bot.OutputCapture()
+    capture.add("x" * 1000)
+    excerpt = capture.log_excerpt(max_chars=100)
+    assert excerpt.startswith("x" * 50) and excerpt.rstrip("\n").endswith("x" * 49)
+    assert len(excerpt) < 200
+    assert "chars omitted" in excerpt
+
+
+# --- Tunnel URL cache ---
+def tunnel_line(timestamp: str, url: str) -> str:
+    return f"Oct 17 12:00:00 host tunnel[1]: {timestamp} INFO url={url}"
+
+
+def test_tunnel_url_cache_keeps_the_newest_url(bot):
+    bot.update_tunnel_url_cache("test-newest", "inv1", [
+        tunnel_line("2026-10-17T12:00:00.000Z", "wss://new.htunnel.app"),
+        tunnel_line("2026-10-17T11:00:00.000Z", "wss://old.htunnel.app"),
+    ], "cursor1")
+    entry = bot.TUNNEL_URL_CACHE["test-newest"]
+    assert entry.url == "wss://new.htunnel.app"
+    assert entry.cursor == "cursor1"
+
+    # No new lines since the cursor: the cached URL and cursor stay.
+    bot.update_tunnel_url_cache("test-newest", "inv1", [], None)
+    entry = bot.TUNNEL_URL_CACHE["test-newest"]
+    assert (entry.url, entry.cursor) == ("wss://new.htunnel.app", "cursor1")
+
+
+def test_tunnel_restart_forgets_the_cached_url(bot):
+    bot.update_tunnel_url_cache("test-restart", "inv1", [tunnel_line("2026-10-17T12:00:00.000Z", "wss://a.htunnel.app")], "c1")
+    bot.update_tunnel_url_cache("test-restart", "inv2", [], "c2")
+    assert bot.TUNNEL_URL_CACHE["test-restart"].url is None
+
+
+# --- AgentHub ---
+def test_agent_hub_rejects_replays_and_orphan_deltas(bot):
+    hub = bot.AgentHub()
+    server_config = {"name": "server1", "ip": "203.0.113.5", "user": "root"}
+    with pytest.raises(ValueError, match="no full state"):
+        hub.apply(server_config, {"seq": 1, "full": False, "delta": {"version": "1"}})
+
+    previous, current = hub.apply(server_config, {"seq": 2, "full": True, "delta": {"version": "1", "tunnel_url": None}})
+    assert previous is None and current == {"version": "1", "tunnel_url": None}
+    previous, current = hub.apply(server_config, {"seq": 3, "full": False, "delta": {"tunnel_url": "wss://a.htunnel.app"}})
+    assert current == {"version": "1", "tunnel_url": "wss://a.htunnel.app"}
+
+    with pytest.raises(ValueError, match="Replayed"):
+        hub.apply(server_config, {"seq": 3, "full": True, "delta": {}})
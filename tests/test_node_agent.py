@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+import node_agent
+
+SECRET = b"shared-secret"
+
+
+def secret_for(server_id: str) -> bytes | None:
+    return SECRET if server_id == "server1" else None
+
+
+def test_signed_message_verifies():
+    line = node_agent.sign_message(SECRET, "server1", 5, {"tunnel_url": "wss://a.htunnel.app"}, full=False)
+    message = node_agent.verify_message(line, secret_for)
+    assert message["seq"] == 5
+    assert message["full"] is False
+    assert message["delta"] == {"tunnel_url": "wss://a.htunnel.app"}
+
+
+def test_tampered_message_is_rejected():
+    envelope = json.loads(node_agent.sign_message(SECRET, "server1", 5, {"version": "1"}, full=True))
+    envelope["body"] = envelope["body"].replace('"1"', '"2"')
+    with pytest.raises(ValueError, match="Bad signature"):
+        node_agent.verify_message(json.dumps(envelope).encode(), secret_for)
+
+
+def test_wrong_secret_is_rejected():
+    line = node_agent.sign_message(b"other-secret", "server1", 5, {}, full=True)
+    with pytest.raises(ValueError, match="Bad signature"):
+        node_agent.verify_message(line, secret_for)
+
+
+def test_unknown_server_is_rejected():
+    line = node_agent.sign_message(SECRET, "server2", 5, {}, full=True)
+    with pytest.raises(ValueError, match="No agent secret"):
+        node_agent.verify_message(line, secret_for)
+
+
+@pytest.mark.parametrize("line", [b"", b"not json\n", b'{"mac": "00"}\n', b'{"body": "{}", "mac": "00"}\n'])
+def test_malformed_message_is_rejected(line):
+    with pytest.raises(ValueError):
+        node_agent.verify_message(line, secret_for)
+
+
+def test_old_message_is_rejected(monkeypatch):
+    line = node_agent.sign_message(SECRET, "server1", 5, {}, full=True)
+    sent_at = json.loads(json.loads(line)["body"])["time"]
+    monkeypatch.setattr(node_agent.time, "time", lambda: sent_at + node_agent.MAX_CLOCK_SKEW_SECONDS + 1)
+    with pytest.raises(ValueError, match="too old"):
+        node_agent.verify_message(line, secret_for)
@@ -0,0 +1,68 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+import node_probe
+
+
+def probe_document(**overrides) -> dict:
+    document = {
+        "probe": node_probe.PROBE_VERSION,
+        "units": {"node": {"ActiveState": "active", "SubState": "running", "MainPID": "1234"}, "tunnel": {}},
+        "version": "humanode-peer 0.9.0",
+        "journal": [],
+        "tunnel_journal": {"lines": [], "cursor": None},
+        "disk": None,
+    }
+    document.update(overrides)
+    return document
+
+
+def test_parse_takes_the_last_line():
+    stdout = "Warning: something from the login shell\n" + json.dumps(probe_document()) + "\n\n"
+    document = node_probe.parse_probe_output(stdout)
+    assert document["version"] == "humanode-peer 0.9.0"
+    assert node_probe.unit_is_active(document, "node")
+    assert not node_probe.unit_is_active(document, "tunnel")
+
+
+@pytest.mark.parametrize("stdout", [
+    "",
+    "\n  \n",
+    "not json",
+    json.dumps([1, 2, 3]),
+    json.dumps(probe_document(probe=node_probe.PROBE_VERSION + 1)),
+    json.dumps({key: value for key, value in probe_document().items() if key != "tunnel_journal"}),
+])
+def test_parse_rejects_other_output(stdout):
+    with pytest.raises(ValueError):
+        node_probe.parse_probe_output(stdout)
+
+
+def test_format_unit_state():
+    document = probe_document()
+    document["units"]["node"]["ActiveEnterTimestamp"] = "Sat 2026-10-17 01:00:00 UTC"
+    assert node_probe.format_unit_state(document, "node") == "active (running) since Sat 2026-10-17 01:00:00 UTC, PID 1234"
+    assert node_probe.format_unit_state(document, "tunnel") == "unknown (unknown)"
+
+
+def test_probe_script_runs_without_systemd(tmp_path):
+    # Every part reports failure on its own, so the document is complete even where systemctl is missing.
+    argv = node_probe.build_probe_argv(str(tmp_path / "missing-binary"), str(tmp_path), 0, None, version=True, disk=True)
+    argv[0] = sys.executable
+    result = subprocess.run(argv, stdout=subprocess.PIPE, timeout=60, check=True)
+    document = node_probe.parse_probe_output(result.stdout.decode())
+    assert document["version"] is None
+    assert document["journal"] == []
+    assert document["disk"]["free"] > 0
+
+
+def test_light_probe_skips_version_and_disk(tmp_path):
+    argv = node_probe.build_probe_argv(str(tmp_path / "missing-binary"), str(tmp_path), 0, None, version=False, disk=False)
+    argv[0] = sys.executable
+    result = subprocess.run(argv, stdout=subprocess.PIPE, timeout=60, check=True)
+    document = node_probe.parse_probe_output(result.stdout.decode())
+    assert document["disk"] is None
+    assert document["version"] is None
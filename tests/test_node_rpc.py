@@ -0,0 +1,89 @@
+import json
+import threading
+import time
+import urllib.request
+from http.server import HTTPServer
+
+import pytest
+
+import mock_node_rpc
+import node_rpc
+
+
+@pytest.fixture
+def rpc_url():
+    servers = []
+
+    def start(bioauth_minutes: int, epoch_minutes: int) -> str:
+        server = HTTPServer(("127.0.0.1", 0), mock_node_rpc.make_handler(mock_node_rpc.MockNode(bioauth_minutes, epoch_minutes)))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def post(url: str, payload) -> object:
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def test_timers_from_mock_node(rpc_url):
+    url = rpc_url(bioauth_minutes=45, epoch_minutes=120)
+    bioauth_seconds, epoch_minutes = node_rpc.parse_timer_response(post(url, node_rpc.build_timer_request()), time.time())
+    assert 45 * 60 - 5 <= bioauth_seconds <= 45 * 60
+    assert epoch_minutes in (119, 120)
+
+
+def test_inactive_bioauth_reads_as_minus_one(rpc_url):
+    url = rpc_url(bioauth_minutes=0, epoch_minutes=30)
+    bioauth_seconds, epoch_minutes = node_rpc.parse_timer_response(post(url, node_rpc.build_timer_request()), time.time())
+    assert bioauth_seconds == -1
+    assert epoch_minutes in (29, 30)
+
+
+def test_block_number_from_mock_node(rpc_url):
+    url = rpc_url(bioauth_minutes=45, epoch_minutes=120)
+    assert node_rpc.parse_block_number(post(url, node_rpc.build_header_request())) > 0
+
+
+def test_error_response_is_rejected(rpc_url):
+    url = rpc_url(bioauth_minutes=45, epoch_minutes=120)
+    responses = post(url, node_rpc.build_timer_request())
+    responses[0] = post(url, {"jsonrpc": "2.0", "id": 1, "method": "no_such_method", "params": []})
+    assert "error" in responses[0]
+    with pytest.raises(ValueError, match="bioauth_status"):
+        node_rpc.parse_timer_response(responses, time.time())
+
+
+@pytest.mark.parametrize("responses", [
+    {"jsonrpc": "2.0", "id": 1, "result": None},
+    [],
+    [{"jsonrpc": "2.0", "id": request_id, "result": "0x01"} for request_id in (1, 2, 3, 4)],
+])
+def test_malformed_timer_response(responses):
+    with pytest.raises(ValueError):
+        node_rpc.parse_timer_response(responses, time.time())
+
+
+def test_u64_round_trip():
+    for value in (0, 1, 280_000_000, 2**64 - 1):
+        assert node_rpc.decode_u64(node_rpc.encode_u64(value)) == value
+    assert node_rpc.encode_u64(1) == "0x0100000000000000"
+
+
+@pytest.mark.parametrize("value", [None, "", "0x01", "01000000000000000", "0x010000000000000000"])
+def test_decode_u64_rejects_other_values(value):
+    with pytest.raises(ValueError):
+        node_rpc.decode_u64(value)
+
+
+def test_timer_request_reads_babe_storage():
+    storage_keys = [call["params"][0] for call in node_rpc.build_timer_request() if call["method"] == "state_getStorage"]
+    assert storage_keys == [node_rpc.BABE_EPOCH_INDEX_KEY, node_rpc.BABE_GENESIS_SLOT_KEY, node_rpc.BABE_CURRENT_SLOT_KEY]
+    # twox128("Babe") followed by twox128 of the item name.
+    assert all(key.startswith("0x1cb6f36e027abb2091cfb5110ab5087f") and len(key) == 66 for key in storage_keys)